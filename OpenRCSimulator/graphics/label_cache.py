@@ -0,0 +1,66 @@
+"""This module caches rendered labels, e.g. sensor distances. Distances repeat from frame to
+frame and only take a bounded set of values, so each value is rasterized once and later frames
+only blit the cached surface."""
+from collections import OrderedDict
+from typing import Tuple
+
+import pygame as py
+
+
+# the amount of rendered labels kept, the least recently used are dropped first
+LABEL_CACHE_SIZE = 1024
+
+
+class LabelCache:
+    """The LabelCache renders each label text once per font and color and keeps the most
+    recently used labels.
+    """
+
+    def __init__(self, font: py.font.Font, color: Tuple[int, int, int],
+                 size: int = LABEL_CACHE_SIZE, antialiasing: bool = True) -> None:
+        """Creates an empty cache.
+
+        Args:
+            font (py.font.Font): The font to render with.
+            color (Tuple[int, int, int]): The color in RGB.
+            size (int, optional): The maximum amount of cached labels. Defaults to
+            LABEL_CACHE_SIZE.
+            antialiasing (bool, optional): Smooth edges. Defaults to True.
+        """
+        self._font = font
+        self._color = color
+        self._size = size
+        self._antialiasing = antialiasing
+        self._labels = OrderedDict()
+
+    def get(self, text: str) -> py.Surface:
+        """Returns the rendered label, rendering it on first use.
+
+        Args:
+            text (str): The label.
+
+        Returns:
+            py.Surface: The rendered label, it must not be changed.
+        """
+        label = self._labels.get(text)
+        if label is None:
+            label = self._font.render(text, self._antialiasing, self._color)
+            self._labels[text] = label
+            if len(self._labels) > self._size:
+                self._labels.popitem(last=False)
+        else:
+            self._labels.move_to_end(text)
+        return label
+
+    def blit(self, surface: py.Surface, text: str, position: Tuple[int, int]) -> py.Rect:
+        """Draws a label with its top left corner at a position.
+
+        Args:
+            surface (py.Surface): The surface to draw on.
+            text (str): The label.
+            position (Tuple[int, int]): The top left corner in pixels.
+
+        Returns:
+            py.Rect: The area drawn on.
+        """
+        return surface.blit(self.get(text), position)
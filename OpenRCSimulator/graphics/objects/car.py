@@ -3,12 +3,34 @@ import math
 import pkg_resources
 import pygame as py
 import numpy as np
-from typing import List, Tuple
+from typing import List, NamedTuple, Tuple
 
 from OpenRCSimulator.graphics.font import FontWrapper
+from OpenRCSimulator.graphics.label_cache import LabelCache
 from OpenRCSimulator.state import ROOT_FOLDER
 from OpenRCSimulator.graphics import CENTIMETER_TO_PIXEL
 from OpenRCSimulator.graphics.objects.sprite import Sprite
+from OpenRCSimulator.graphics.rotation_cache import RotationCache, ROTATION_STEP
+from OpenRCSimulator.graphics.snapshot import SnapshotBuffer
+
+
+# distance labels are drawn for every n-th sensor
+LABEL_EVERY = 1
+
+# if positive, only the labels of this amount of sensors with the shortest distances are drawn
+LABEL_NEAREST = 0
+
+# the label decimations (every, nearest) to switch between, the first one labels all sensors
+LABEL_DECIMATIONS = ((LABEL_EVERY, LABEL_NEAREST), (2, 0), (1, 3))
+
+
+class CarState(NamedTuple):
+    """The displayed state of a car, published at once by the controller thread."""
+    x: float
+    y: float
+    angle: float
+    sensors: Tuple
+    distances: Tuple
 
 
 class Car(Sprite):
@@ -29,7 +51,8 @@ class Car(Sprite):
     CONFIG = 1
 
     def __init__(self, surface: py.Surface, x: int, y: int, chassis_size: Tuple[float, float], 
-                 font: FontWrapper, mode: int = NORMAL) -> None:
+                 font: FontWrapper, mode: int = NORMAL,
+                 rotation_step: float = ROTATION_STEP) -> None:
         """Initialization
 
         Args:
@@ -39,6 +62,8 @@ class Car(Sprite):
             chassis_size (Tuple[float, float]): Size of the car in either dimension (width, height).
             font (FontWrapper): The font to use when displaying information.
             mode (int, optional): Either Car.NORMAL or Car.CONFIG to switch between textures. Defaults to NORMAL.
+            rotation_step (float, optional): The texture is drawn rotated to multiples of this angle in
+            degrees. Defaults to ROTATION_STEP.
         """
         super().__init__(surface)
 
@@ -55,15 +80,22 @@ class Car(Sprite):
             self._car_surface, self._pixel_size)
         self._car_surface = self._car_surface.convert_alpha()
 
-        self._x = x
-        self._y = y
-        self._sensors = []
-        self._distances = []
+        # the rotated textures are cached, drawing then only needs a lookup and a blit
+        self._rotations = RotationCache(self._car_surface, rotation_step)
 
-        self.set_direction(90)
+        # the state is replaced as a whole, so drawing never mixes two states
+        self._state = SnapshotBuffer(CarState(x, y, 90, (), ()))
 
         self._font = font.unpack()
 
+        # distance labels are rendered once per value
+        self._labels = LabelCache(self._font, (255, 255, 255))
+
+        # the area covered by the last draw
+        self._rect = None
+        self._label_every = LABEL_EVERY
+        self._label_nearest = LABEL_NEAREST
+
     def get_size(self) -> Tuple[int, int]:
         """Returns the car's size.
 
@@ -78,7 +110,7 @@ class Car(Sprite):
         Args:
             angle (float): Angle in radians.
         """
-        self._angle = angle
+        self._state.publish(self._state.snapshot._replace(angle=angle))
 
     def get_direction(self) -> float:
         """Returns the current car's direction in radians.
@@ -86,7 +118,7 @@ class Car(Sprite):
         Returns:
             float: Direction in radians.
         """
-        return self._angle
+        return self._state.snapshot.angle
 
     def set_position(self, pos: Tuple[int, int]) -> None:
         """Sets the position of the car.
@@ -94,7 +126,8 @@ class Car(Sprite):
         Args:
             pos (Tuple[int, int]): Position given as (x, y)
         """
-        self._x, self._y = pos
+        x, y = pos
+        self._state.publish(self._state.snapshot._replace(x=x, y=y))
 
     def get_position(self) -> Tuple[int, int]:
         """Returns the current car's position
@@ -102,7 +135,8 @@ class Car(Sprite):
         Returns:
             Tuple[int, int]: Position in (x, y)
         """
-        return self._x, self._y
+        state = self._state.snapshot
+        return state.x, state.y
 
     def set_alpha(self, alpha: float = 1.0) -> None:
         """Sets an alpha value to the car's texture.
@@ -117,6 +151,7 @@ class Car(Sprite):
             raise RuntimeError
 
         self._car_surface.set_alpha(math.ceil(alpha * 255))
+        self._rotations.clear()
 
     def set_sensors(self, sensors: List[Tuple[int, int]]):
         """Position of sensor given as a point (x, y)
@@ -124,7 +159,7 @@ class Car(Sprite):
         Args:
             sensors (List): Expected list of sensors.
         """
-        self._sensors = sensors
+        self._state.publish(self._state.snapshot._replace(sensors=tuple(sensors)))
 
     def set_distances(self, distances: List[float]):
         """Sets the distance readings of each sensor.
@@ -132,21 +167,45 @@ class Car(Sprite):
         Args:
             distances (List): Distances given as float in a list.
         """
-        self._distances = distances
+        self._state.publish(self._state.snapshot._replace(distances=tuple(distances)))
+
+    def set_state(self, position: Tuple[float, float], angle: float,
+                  sensors: List[Tuple[float, float]], distances: List[float]) -> bool:
+        """Replaces the whole displayed state at once, e.g. from the controller thread.
+
+        Args:
+            position (Tuple[float, float]): Position given as (x, y).
+            angle (float): Angle in radians.
+            sensors (List[Tuple[float, float]]): The sensors' end points.
+            distances (List[float]): The distance readings of each sensor.
+
+        Returns:
+            bool: False if the state did not change and nothing was published.
+        """
+        x, y = position
+        state = CarState(x, y, angle, tuple(sensors), tuple(distances))
+        if state == self._state.snapshot:
+            return False
 
-    def __rotate_pivoted(self, surface: py.Surface, angle: float, pivot: Tuple):
+        self._state.publish(state)
+        return True
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    def __rotate_pivoted(self, angle: float, pivot: Tuple):
         """Rotates the car around a pivot point.
 
         Args:
-            surface (py.Surface): The surface of the car, which will be rotated.
-            angle (float): The angle of rotation.
+            angle (float): The angle of rotation in degrees.
             pivot (Tuple): The pivot point in pixel dimension.
 
         Returns:
             Tuple: The rotated image of the car and its center point.
         """
         # rotate the leg image around the pivot
-        image = py.transform.rotate(surface, angle)
+        image = self._rotations.get(angle)
         rect = image.get_rect()
         rect.center = pivot
         return image, rect
@@ -154,28 +213,63 @@ class Car(Sprite):
     def draw(self) -> None:
         """Draws the car, 1 call for the car and 2 times the amount of sensors.
         """
+        # the state is read once, a state published meanwhile is drawn in the next frame
+        state = self._state.snapshot
+
         # rotate the car
         car, car_rect = self.__rotate_pivoted(
-            self._car_surface, -math.degrees(self._angle) - 90, (self._x, self._y))
+            -math.degrees(state.angle) - 90, (state.x, state.y))
 
         # calculate the correct center
         x = car_rect[0] + (car_rect[2] / 2)
         y = car_rect[1] + (car_rect[3] / 2)
 
-        for sensor_point in self._sensors:
-            py.draw.line(self._surface, (255, 255, 255), (x, y), sensor_point)
+        rects = [py.draw.line(self._surface, (255, 255, 255), (x, y), sensor_point)
+                 for sensor_point in state.sensors]
 
         # draw car, first rotate to correct direction
-        self._surface.blit(car, car_rect)
+        rects.append(self._surface.blit(car, car_rect))
 
         # draw sensors
-        for index, sensor in enumerate(self._sensors):
-            label = self._font.render(
-                str(self._distances[index]), True, (255, 255, 255))
-            self._surface.blit(label, sensor)
+        for index in self._labeled_sensors(state.distances):
+            rects.append(self._labels.blit(self._surface, str(state.distances[index]),
+                                           state.sensors[index]))
+        self._rect = rects[0].unionall(rects[1:])
 
         super().draw()
 
+    def get_rect(self) -> py.Rect:
+        return self._rect
+
+    def set_label_decimation(self, every: int = LABEL_EVERY, nearest: int = LABEL_NEAREST) -> None:
+        """Limits the drawn distance labels, so their cost does not grow with the sensor count.
+
+        Args:
+            every (int, optional): Only every n-th sensor is labeled. Defaults to LABEL_EVERY.
+            nearest (int, optional): If positive, only the labels of this amount of sensors
+            with the shortest distances are drawn. Defaults to LABEL_NEAREST.
+        """
+        if every < 1:
+            raise ValueError("Every n-th sensor has to be at least 1.")
+        self._label_every = every
+        self._label_nearest = nearest
+
+    def _labeled_sensors(self, distances: Tuple) -> List[int]:
+        """Selects the sensors whose distances are drawn.
+
+        Args:
+            distances (Tuple): The distance of each sensor.
+
+        Returns:
+            List[int]: The indices of the labeled sensors.
+        """
+        indices = range(0, len(distances), self._label_every)
+        if 0 < self._label_nearest < len(indices):
+            candidates = np.asarray(distances)[::self._label_every]
+            nearest = np.argpartition(candidates, self._label_nearest - 1)[:self._label_nearest]
+            indices = (np.sort(nearest) * self._label_every).tolist()
+        return indices
+
     def collidepoint(self, point: Tuple[int, int]) -> bool:
         """Checks if the car collides with a given point.
 
@@ -10,6 +10,9 @@ class Rectangle(Sprite):
     Args:
         Sprite (Sprite): The super class.
     """
+
+    static = True
+
     def __init__(self, surface: py.Surface, x: int, y: int, w: int, h: int, c: Tuple[int, int, int]) -> None:
         """Initialization of the rectangle.
 
@@ -47,6 +50,7 @@ class Rectangle(Sprite):
             pos (Tuple[int, int]): X and y pixel coordinate.
         """
         self._x, self._y = pos
+        self._changed()
 
     def get_position(self) -> Tuple[int, int]:
         """Returns the rectangle's position.
@@ -56,6 +60,9 @@ class Rectangle(Sprite):
         """
         return (self._x, self._y)
 
+    def get_rect(self) -> py.Rect:
+        return py.Rect(self._x, self._y, self._w, self._h)
+
     def draw(self) -> None:
         """Draws the rectangle, 1 call needed.
         """
@@ -88,7 +95,12 @@ class Rectangle(Sprite):
         """
         self._clicked_c = c
 
+        # only rectangles with a clicked color react to clicks
+        self.interactive = True
+        self._changed()
+
     def _clicked(self) -> None:
         """Sets the rectangle to clicked state or removes this state.
         """
         self._activated = not self._activated
+        self._changed()
@@ -1,11 +1,17 @@
 """This module is a base for other sprites used within this project."""
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 import pygame as py
 
 
 class Sprite:
-    """The base class for other elements.
+    """The base class for other elements. Static sprites only change through their setters,
+    which notify the window, so the window composites them once into a cached layer. Dynamic
+    sprites are drawn every frame. Only interactive sprites are hit-tested by the window.
     """
+
+    static = False
+    interactive = False
+
     def __init__(self, surface: py.Surface) -> None:
         """Initializes a sprite with basic arguments.
 
@@ -16,6 +22,31 @@ class Sprite:
         self._active = False
         self._button_down = False
         self._size = None
+        self._change_listener = None
+
+    def set_change_listener(self, listener: Callable[["Sprite"], None]) -> None:
+        """Registers the function called with the sprite whenever its appearance changed.
+
+        Args:
+            listener (Callable[[Sprite], None]): The callback, e.g. of the window showing the
+            sprite.
+        """
+        self._change_listener = listener
+
+    def _changed(self) -> None:
+        """Notifies the change listener, child classes call it from their setters.
+        """
+        if self._change_listener:
+            self._change_listener(self)
+
+    def get_rect(self) -> Optional[py.Rect]:
+        """Returns the area covered by the sprite, used to only update changed regions of the
+        screen.
+
+        Returns:
+            Optional[py.Rect]: The covered area or None if it is unknown.
+        """
+        return None
 
     def set_position(self, pos: Tuple[int, int]) -> None:
         """Sets the sprite's position
@@ -48,22 +79,32 @@ class Sprite:
         return self._size
 
     def draw(self) -> None:
-        """Draws this sprite and handles mouse inputs. 0 draw calls needed.
+        """Draws this sprite. 0 draw calls needed.
         """
-        mouse_pos = py.mouse.get_pos()
-        mouse_buttons = py.mouse.get_pressed()
+        pass
 
-        if self.collidepoint(mouse_pos):
-            if mouse_buttons[0]:
+    def handle_mouse(self, hit: bool, pressed: bool) -> None:
+        """Tracks a click on the sprite, called by the window for interactive sprites under
+        the mouse or pressed before. A click is a press and release on the sprite.
+
+        Args:
+            hit (bool): True if the mouse is on the sprite.
+            pressed (bool): True if the left mouse button is pressed.
+        """
+        if hit:
+            if pressed:
                 self._button_down = True
 
-            if self._button_down and not mouse_buttons[0]:
+            if self._button_down and not pressed:
                 self._clicked()
                 self._button_down = False
 
         elif self._button_down:
             self._button_down = False
 
+    def is_button_down(self) -> bool:
+        return self._button_down
+
     def active(self, val: bool) -> None:
         """
         Only active sprites can call the hover and click event.
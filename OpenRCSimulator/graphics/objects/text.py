@@ -13,6 +13,8 @@ class Text(Sprite):
     ANCHOR_TOP_LEFT = 0
     ANCHOR_CENTER = 1
 
+    static = True
+
     def __init__(self, surface: py.Surface, text: str, x: int, y: int, c: Tuple[int, int, int], 
                  font: FontWrapper) -> None:
         """Initialization of a Text sprite.
@@ -44,6 +46,7 @@ class Text(Sprite):
         self._font = font.unpack()
         self._text_surface = self._font.render(
             self._text, self._antialiasing, self._c)
+        self._changed()
 
     def get_size(self) -> Tuple[int, int]:
         """Returns the text's size
@@ -62,6 +65,7 @@ class Text(Sprite):
         self._c = c
         self._text_surface = self._font.render(
             self._text, self._antialiasing, self._c)
+        self._changed()
 
     def set_text(self, text: str) -> None:
         """Changes the text of this sprite.
@@ -72,6 +76,7 @@ class Text(Sprite):
         self._text = text
         self._text_surface = self._font.render(
             text, self._antialiasing, self._c)
+        self._changed()
         # TODO: change psoition may be needed
 
     def get_text(self) -> str:
@@ -94,6 +99,7 @@ class Text(Sprite):
         """
         if anchor == Text.ANCHOR_TOP_LEFT:
             self._x, self._y = pos
+            self._changed()
             return
 
         if anchor == Text.ANCHOR_CENTER:
@@ -102,6 +108,7 @@ class Text(Sprite):
             _x, _y = pos
             self._x = _x - w // 2
             self._y = _y - h // 2
+            self._changed()
             return
 
         raise RuntimeError("Wrong anchor point provided.")
@@ -114,6 +121,9 @@ class Text(Sprite):
         """
         return (self._x, self._y)
 
+    def get_rect(self) -> py.Rect:
+        return self._text_surface.get_rect(topleft=(self._x, self._y))
+
     def draw(self) -> None:
         """Draws the sprite, uses 1 call.
         """
@@ -53,6 +53,8 @@ class TextField(Text):
     FILTER_TEXT = 1
     FILTER_NONE = -1
 
+    interactive = True
+
     def __init__(self, surface: py.Surface, x: int, y: int, text: str = "", 
                  fontwrapper: FontWrapper = None) -> None:
         """Initializes the text field.
@@ -127,6 +129,7 @@ class TextField(Text):
             self._ac = c
         elif mode == TextField.COLOR:
             self._bc = c
+        self._changed()
 
     def set_text(self, text: str) -> None:
         """Changes the text of this sprite.
@@ -144,6 +147,7 @@ class TextField(Text):
         h = self._text_surface.get_height()
         self._box = (self._x - self._margin[0], self._y -
                      self._margin[1], w + self._margin[2], h + self._margin[3])
+        self._changed()
 
     def is_activated(self) -> bool:
         """Returns the activation state of the text field.
@@ -157,6 +161,7 @@ class TextField(Text):
         """Deactivates the text field.
         """
         self._active = False
+        self._changed()
 
     def update_text(self, text: str) -> None:
         """Sets text if field is active.
@@ -167,6 +172,7 @@ class TextField(Text):
         if self._active:
             if text == "\n":
                 self._active = False
+                self._changed()
                 return
 
             if self._filter == TextField.FILTER_TEXT:
@@ -195,6 +201,7 @@ class TextField(Text):
             self._y += self._margin[1]
             self._box = (self._x - self._margin[0], self._y -
                          self._margin[1], w + self._margin[2], h + self._margin[3])
+            self._changed()
             return
 
         if anchor == ANCHOR_CENTER:
@@ -205,6 +212,7 @@ class TextField(Text):
             self._y += self._margin[1]
             self._box = (self._x - self._margin[0], self._y -
                          self._margin[1], w + self._margin[2], h + self._margin[3])
+            self._changed()
             return
 
         raise RuntimeError("Wrong anchor point provided.")
@@ -221,6 +229,9 @@ class TextField(Text):
         # draw the text
         self._surface.blit(self._text_surface, (self._x, self._y))
 
+    def get_rect(self) -> py.Rect:
+        return py.Rect(self._box)
+
     def collidepoint(self, point: Tuple[int, int]) -> bool:
         """Calculates the collision of the text field with another point.
 
@@ -239,6 +250,6 @@ class TextField(Text):
     def _clicked(self) -> None:
         """Sets the text field active, if the user clicks on it.
         """
-        if self.collidepoint(py.mouse.get_pos()):
-            self._callback()
-            self._active = True
+        self._callback()
+        self._active = True
+        self._changed()
@@ -12,6 +12,9 @@ class Wall(Sprite):
     Args:
         Sprite (Sprite): The sprite super-class handles most interactions.
     """
+
+    static = True
+
     def __init__(self, surface: Surface, start_pos: Tuple[int, int], end_pos: Tuple[int, int], c: Tuple[int, int, int], thickness: int = 5) -> None:
         """Creates the wall object, which is defined by start, end coordinates, as well as color and thickness.
 
@@ -45,6 +48,7 @@ class Wall(Sprite):
             pos (Tuple[int, int]): The start position in pixel-coordinates.
         """
         self._sx, self._sy = pos
+        self._changed()
 
     def get_start(self) -> Tuple[int, int]:
         """Returns the wall's start position.
@@ -61,6 +65,7 @@ class Wall(Sprite):
             pos (Tuple[int, int]): x and y pixel coordinate.
         """
         self._ex, self._ey = pos
+        self._changed()
 
     def get_end(self) -> Tuple[int, int]:
         """Returns the wall's end position.
@@ -77,17 +82,31 @@ class Wall(Sprite):
             c (Tuple[int, int, int]): Color given in RGB.
         """
         self._c = c
+        self._changed()
+
+    def get_rect(self) -> py.Rect:
+        # the line and its round caps reach half the thickness beyond the end points
+        x, y = min(self._sx, self._ex), min(self._sy, self._ey)
+        w, h = abs(self._ex - self._sx), abs(self._ey - self._sy)
+        return py.Rect(x, y, w, h).inflate(self._t + 2, self._t + 2)
 
     def draw(self) -> None:
         """Draw the line, uses 3 calls.
         """
         super().draw()
+        self.draw_to(self._surface)
 
-        py.draw.line(self._surface, self._c, (self._sx, self._sy),
+    def draw_to(self, surface: Surface) -> None:
+        """Draws the line onto another surface, e.g. a cached layer. Uses 3 calls.
+
+        Args:
+            surface (Surface): The surface to draw on.
+        """
+        py.draw.line(surface, self._c, (self._sx, self._sy),
                      (self._ex, self._ey), self._t)
-        py.draw.circle(self._surface, self._c,
+        py.draw.circle(surface, self._c,
                        (self._sx, self._sy), self._t // 2)
-        py.draw.circle(self._surface, self._c,
+        py.draw.circle(surface, self._c,
                        (self._ex, self._ey), self._t // 2)
 
     def collidepoint(self, point: Tuple[int, int]) -> bool:
@@ -0,0 +1,157 @@
+"""This module displays many walls as a single sprite. The walls are rasterized into a cached
+surface, which is updated incrementally, so the cost of a frame does not depend on the amount of
+walls."""
+from collections import deque
+from typing import Dict, Iterable, Tuple
+
+import pygame as py
+from OpenRCSimulator.graphics.objects.sprite import Sprite
+from OpenRCSimulator.graphics.objects.wall import Wall
+from OpenRCSimulator.graphics.spatial_hash import SpatialHash
+
+
+class WallLayer(Sprite):
+    """The WallLayer owns the finished walls of a map. Added walls are drawn onto the cached
+    surface, if a wall is changed or removed only its region is rasterized again. Changes are
+    queued and applied by draw(), so they can be made from another thread than the one
+    drawing.
+
+    Args:
+        Sprite (Sprite): The sprite super-class.
+    """
+
+    static = True
+
+    def __init__(self, surface: py.Surface) -> None:
+        """Creates an empty layer of the surface's size.
+
+        Args:
+            surface (py.Surface): The surface the layer is displayed on.
+        """
+        super().__init__(surface)
+
+        self._layer = py.Surface(surface.get_size(), py.SRCALPHA)
+        self._size = surface.get_size()
+
+        # walls in the order they are drawn, the rects they were last drawn in and an index
+        # to find the walls overlapping a region
+        self._walls: Dict[Wall, int] = {}
+        self._rects: Dict[Wall, py.Rect] = {}
+        self._index = SpatialHash()
+        self._next_order = 0
+
+        # walls to draw and regions to rasterize again with the next draw
+        self._pending = deque()
+
+    def __len__(self) -> int:
+        return len(self._walls)
+
+    def __contains__(self, wall: Wall) -> bool:
+        return wall in self._walls
+
+    def add_wall(self, wall: Wall) -> None:
+        """Adds a wall on top of the layer.
+
+        Args:
+            wall (Wall): The wall, it must not be added to the window on its own.
+        """
+        self.add_walls([wall])
+
+    def add_walls(self, walls: Iterable[Wall]) -> None:
+        """Adds many walls at once, in the given order.
+
+        Args:
+            walls (Iterable[Wall]): The walls.
+        """
+        for wall in walls:
+            self._walls[wall] = self._next_order
+            self._next_order += 1
+            self._rects[wall] = wall.get_rect()
+            self._index.insert(wall, self._rects[wall])
+            wall.set_change_listener(self._wall_changed)
+            self._pending.append(wall)
+        self._changed()
+
+    def remove_wall(self, wall: Wall) -> None:
+        """Removes a wall, unknown walls are ignored.
+
+        Args:
+            wall (Wall): The wall.
+        """
+        if wall not in self._walls:
+            return
+
+        del self._walls[wall]
+        self._index.remove(wall)
+        wall.set_change_listener(None)
+        self._pending.append(self._rects.pop(wall))
+        self._changed()
+
+    def clear(self) -> None:
+        """Removes all walls.
+        """
+        for wall in self._walls:
+            wall.set_change_listener(None)
+        self._walls = {}
+        self._rects = {}
+        self._index.clear()
+        self._pending.append(self._layer.get_rect())
+        self._changed()
+
+    def _wall_changed(self, wall: Wall) -> None:
+        """Rasterizes the regions a changed wall covered before and covers now.
+
+        Args:
+            wall (Wall): The changed wall.
+        """
+        rect = wall.get_rect()
+        self._pending.append(self._rects[wall].union(rect))
+        self._rects[wall] = rect
+        self._index.insert(wall, rect)
+        self._changed()
+
+    def _rasterize(self, rect: py.Rect) -> None:
+        """Clears a region and draws all walls overlapping it again, in their order.
+
+        Args:
+            rect (py.Rect): The region.
+        """
+        rect = rect.clip(self._layer.get_rect())
+        if rect.w == 0 or rect.h == 0:
+            return
+
+        self._layer.fill((0, 0, 0, 0), rect)
+        self._layer.set_clip(rect)
+        walls = [wall for wall in self._index.query_rect(rect) if wall in self._walls]
+        for wall in sorted(walls, key=self._walls.get):
+            wall.draw_to(self._layer)
+        self._layer.set_clip(None)
+
+    def get_rect(self) -> py.Rect:
+        return self._layer.get_rect()
+
+    def draw(self) -> None:
+        """Applies the queued changes and draws the layer, uses 1 call.
+        """
+        super().draw()
+
+        while self._pending:
+            change = self._pending.popleft()
+            if isinstance(change, Wall):
+                if change in self._walls:
+                    change.draw_to(self._layer)
+            else:
+                self._rasterize(change)
+
+        self._surface.blit(self._layer, (0, 0))
+
+    def collidepoint(self, point: Tuple[int, int]) -> bool:
+        """The layer does not react to the mouse, see WallController.get_wall_at.
+
+        Args:
+            point (Tuple[int, int]): The point of collision to test.
+
+        Returns:
+            bool: Always False.
+        """
+        return False
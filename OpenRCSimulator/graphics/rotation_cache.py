@@ -0,0 +1,62 @@
+"""This module caches rotated copies of a surface. Angles are quantized, so a sprite turning
+smoothly reuses a bounded set of rotated surfaces instead of rotating its texture every frame."""
+from collections import OrderedDict
+
+import pygame as py
+
+
+# angles are rounded to multiples of this step in degrees
+ROTATION_STEP = 0.5
+
+# the amount of rotated surfaces kept, the least recently used are dropped first
+ROTATION_CACHE_SIZE = 720
+
+
+class RotationCache:
+    """The RotationCache rotates a surface lazily for each quantized angle and keeps the most
+    recently used rotations.
+    """
+
+    def __init__(self, surface: py.Surface, step: float = ROTATION_STEP,
+                 size: int = ROTATION_CACHE_SIZE) -> None:
+        """Creates an empty cache.
+
+        Args:
+            surface (py.Surface): The surface to rotate.
+            step (float, optional): The quantization of angles in degrees. Defaults to
+            ROTATION_STEP.
+            size (int, optional): The maximum amount of cached rotations. Defaults to
+            ROTATION_CACHE_SIZE.
+        """
+        if step <= 0:
+            raise ValueError("The rotation step has to be positive.")
+
+        self._surface = surface
+        self._step = step
+        self._size = size
+        self._rotations = OrderedDict()
+
+    def clear(self) -> None:
+        """Drops all rotations, e.g. after the surface was changed.
+        """
+        self._rotations.clear()
+
+    def get(self, angle: float) -> py.Surface:
+        """Returns the surface rotated by the quantized angle.
+
+        Args:
+            angle (float): The angle in degrees, counterclockwise as py.transform.rotate.
+
+        Returns:
+            py.Surface: The rotated surface, it must not be changed.
+        """
+        key = round(angle / self._step) % round(360 / self._step)
+        rotation = self._rotations.get(key)
+        if rotation is None:
+            rotation = py.transform.rotate(self._surface, key * self._step)
+            self._rotations[key] = rotation
+            if len(self._rotations) > self._size:
+                self._rotations.popitem(last=False)
+        else:
+            self._rotations.move_to_end(key)
+        return rotation
@@ -0,0 +1,183 @@
+"""This module schedules the simulation at a fixed rate, independent of the rate the window
+renders at. Real time is accumulated and consumed in steps of a fixed size, the remainder is used
+to interpolate the rendered state between the last two steps. A time warp simulates faster than
+real time."""
+import math
+import time
+from typing import Callable
+
+
+# simulation steps per second if not configured otherwise
+PHYSICS_RATE = 100
+
+# at most this amount of steps (times the warp) is simulated per update, real time beyond is
+# dropped so a slow host does not fall further and further behind
+MAX_STEPS_PER_UPDATE = 10
+
+# the time warps to choose from, WARP_MAX simulates as fast as possible
+WARP_MAX = math.inf
+TIME_WARPS = (1, 4, 16, WARP_MAX)
+
+# at WARP_MAX the simulation runs for this long before the state is displayed
+WARP_MAX_BUDGET = 0.1
+
+# the real time factor is measured over intervals of this length in seconds
+REAL_TIME_INTERVAL = 0.5
+
+
+class FixedStepScheduler:
+    """The FixedStepScheduler tells a loop how many fixed steps are due since its last update
+    and sleeps until the next step is due, so the loop does not spin. Every step advances the
+    simulation by the same step size, which makes its results independent of the host's speed.
+    The warp scales the simulated time per real second.
+    """
+
+    def __init__(self, rate: float = PHYSICS_RATE, max_steps: int = MAX_STEPS_PER_UPDATE,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        """Creates the scheduler, the first update happens one step after creation.
+
+        Args:
+            rate (float, optional): The steps per second. Defaults to PHYSICS_RATE.
+            max_steps (int, optional): The maximum steps per update. Defaults to
+            MAX_STEPS_PER_UPDATE.
+            clock (Callable[[], float], optional): The clock in seconds. Defaults to
+            time.perf_counter.
+        """
+        self._rate = 0.0
+        self._step_size = 0.0
+        self.rate = rate
+
+        self._max_steps = max_steps
+        self._clock = clock
+        self._last = clock()
+        self._accumulator = 0.0
+        self._warp = 1.0
+
+        # simulated and real time of the current measurement interval
+        self._measure_start = self._last
+        self._simulated = 0.0
+        self._real_time_factor = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate: float) -> None:
+        if rate <= 0:
+            raise ValueError("The physics rate has to be positive.")
+        self._rate = float(rate)
+        self._step_size = 1 / self._rate
+
+    @property
+    def step_size(self) -> float:
+        return self._step_size
+
+    @property
+    def warp(self) -> float:
+        return self._warp
+
+    @warp.setter
+    def warp(self, warp: float) -> None:
+        if warp <= 0:
+            raise ValueError("The time warp has to be positive.")
+        self._warp = float(warp)
+        self.reset()
+
+    @property
+    def real_time_factor(self) -> float:
+        """The simulated time per real time, measured over the last complete interval.
+
+        Returns:
+            float: The achieved factor, e.g. 4.0 if 4 seconds are simulated per second.
+        """
+        return self._real_time_factor
+
+    @property
+    def alpha(self) -> float:
+        """The progress towards the next step, used to interpolate between the last two steps.
+
+        Returns:
+            float: The progress between 0 and 1.
+        """
+        return min(self._accumulator / self._step_size, 1.0)
+
+    def reset(self) -> None:
+        """Drops the accumulated time, e.g. after the loop was suspended.
+        """
+        self._last = self._clock()
+        self._accumulator = 0.0
+
+    def update(self) -> int:
+        """Accumulates the real time passed since the last update.
+
+        Returns:
+            int: The number of steps to simulate now.
+        """
+        now = self._clock()
+        self._accumulator += (now - self._last) * self._warp
+        self._last = now
+
+        steps = int(self._accumulator / self._step_size)
+        self._accumulator -= steps * self._step_size
+        if steps > self._max_steps * self._warp:
+            steps = int(self._max_steps * self._warp)
+            self._accumulator = 0.0
+        return steps
+
+    def run(self, step: Callable[[float], None], budget: float = WARP_MAX_BUDGET) -> int:
+        """Simulates the due steps. At WARP_MAX steps are simulated until the budget is spent,
+        the state is shown as simulated by the last step.
+
+        Args:
+            step (Callable[[float], None]): Simulates one step of the given size in seconds.
+            budget (float, optional): The time in seconds spent per call at WARP_MAX. Defaults
+            to WARP_MAX_BUDGET.
+
+        Returns:
+            int: The number of simulated steps.
+        """
+        if math.isinf(self._warp):
+            deadline = self._clock() + budget
+            steps = 0
+            while True:
+                step(self._step_size)
+                steps += 1
+                if self._clock() >= deadline:
+                    break
+            self._last = self._clock()
+            self._accumulator = self._step_size
+        else:
+            steps = self.update()
+            for _ in range(steps):
+                step(self._step_size)
+
+        self._measure(steps)
+        return steps
+
+    def _measure(self, steps: int) -> None:
+        """Updates the real time factor once per REAL_TIME_INTERVAL.
+
+        Args:
+            steps (int): The steps simulated since the last call.
+        """
+        self._simulated += steps * self._step_size
+        elapsed = self._clock() - self._measure_start
+        if elapsed >= REAL_TIME_INTERVAL:
+            self._real_time_factor = self._simulated / elapsed
+            self._measure_start += elapsed
+            self._simulated = 0.0
+
+    def wait(self, limit: float = None) -> None:
+        """Sleeps until the next step is due. The thread always yields, even if a step is due
+        already.
+
+        Args:
+            limit (float, optional): The longest sleep in seconds, e.g. a frame's duration to
+            interpolate at least once per frame. Defaults to None.
+        """
+        remaining = (self._step_size - self._accumulator) / self._warp - \
+            (self._clock() - self._last)
+        if limit is not None:
+            remaining = min(remaining, limit)
+        time.sleep(max(remaining, 0))
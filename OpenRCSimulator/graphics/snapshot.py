@@ -0,0 +1,46 @@
+"""This module hands state over from the controller thread to the render thread. The state is
+published as an immutable snapshot by swapping a single reference, which is atomic in Python, so
+neither thread waits for the other and the render thread never sees a half updated state."""
+from typing import Any, Tuple
+
+
+class SnapshotBuffer:
+    """The SnapshotBuffer holds the latest published snapshot and its version. The writer
+    builds a new snapshot in the back and publishes it at once, the reader always gets a
+    complete snapshot. There must only be one writing thread, snapshots must not be changed
+    after they were published.
+    """
+
+    def __init__(self, snapshot: Any = None) -> None:
+        """Creates the buffer.
+
+        Args:
+            snapshot (Any, optional): The initial snapshot. Defaults to None.
+        """
+        self._front = (0, snapshot)
+
+    def publish(self, snapshot: Any) -> None:
+        """Replaces the published snapshot.
+
+        Args:
+            snapshot (Any): The new, immutable snapshot.
+        """
+        version, _ = self._front
+        self._front = (version + 1, snapshot)
+
+    def read(self) -> Tuple[int, Any]:
+        """Returns the latest snapshot.
+
+        Returns:
+            Tuple[int, Any]: The snapshot's version, which increases with every publish, and
+            the snapshot.
+        """
+        return self._front
+
+    @property
+    def snapshot(self) -> Any:
+        return self._front[1]
+
+    @property
+    def version(self) -> int:
+        return self._front[0]
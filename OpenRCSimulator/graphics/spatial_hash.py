@@ -0,0 +1,111 @@
+"""This module indexes rectangular areas on the screen in a uniform grid of cells. Queries only
+visit the cells around a point, so their cost does not grow with the amount of indexed items."""
+from typing import Dict, Hashable, Iterator, List, Set, Tuple
+
+
+# the width and height of a cell in pixels
+SPATIAL_CELL_SIZE = 64
+
+
+class SpatialHash:
+    """The SpatialHash maps items to all cells overlapped by their rectangle. Queries return
+    candidates from the visited cells, the caller tests them exactly, e.g. with collidepoint.
+    """
+
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE) -> None:
+        """Creates an empty index.
+
+        Args:
+            cell_size (int, optional): The size of a cell in pixels. Defaults to
+            SPATIAL_CELL_SIZE.
+        """
+        if cell_size <= 0:
+            raise ValueError("The cell size has to be positive.")
+
+        self._cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Hashable]] = {}
+        self._items: Dict[Hashable, List[Tuple[int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._items
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(x // self._cell_size), int(y // self._cell_size))
+
+    def _cells_of(self, rect: Tuple[float, float, float, float]) -> Iterator[Tuple[int, int]]:
+        """Iterates the cells overlapped by a rectangle.
+
+        Args:
+            rect (Tuple[float, float, float, float]): The x, y, width and height.
+
+        Yields:
+            Tuple[int, int]: The column and row of a cell.
+        """
+        x, y, w, h = rect
+        min_x, min_y = self._cell(x, y)
+        max_x, max_y = self._cell(x + max(w, 0), y + max(h, 0))
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                yield (cx, cy)
+
+    def insert(self, item: Hashable, rect: Tuple[float, float, float, float]) -> None:
+        """Adds an item, an item already indexed is moved to the new rectangle.
+
+        Args:
+            item (Hashable): The item.
+            rect (Tuple[float, float, float, float]): The item's x, y, width and height, e.g.
+            a py.Rect.
+        """
+        if item in self._items:
+            self.remove(item)
+
+        cells = list(self._cells_of(rect))
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(item)
+        self._items[item] = cells
+
+    def remove(self, item: Hashable) -> None:
+        """Removes an item, unknown items are ignored.
+
+        Args:
+            item (Hashable): The item.
+        """
+        for cell in self._items.pop(item, ()):
+            items = self._cells[cell]
+            items.remove(item)
+            if not items:
+                del self._cells[cell]
+
+    def clear(self) -> None:
+        """Removes all items.
+        """
+        self._cells = {}
+        self._items = {}
+
+    def query_point(self, point: Tuple[float, float]) -> List[Hashable]:
+        """Returns the items of the cell containing a point.
+
+        Args:
+            point (Tuple[float, float]): The x and y position.
+
+        Returns:
+            List[Hashable]: The candidates in the order they were inserted.
+        """
+        return list(self._cells.get(self._cell(*point), ()))
+
+    def query_rect(self, rect: Tuple[float, float, float, float]) -> Set[Hashable]:
+        """Returns the items of all cells overlapped by a rectangle.
+
+        Args:
+            rect (Tuple[float, float, float, float]): The x, y, width and height.
+
+        Returns:
+            Set[Hashable]: The candidates.
+        """
+        candidates = set()
+        for cell in self._cells_of(rect):
+            candidates.update(self._cells.get(cell, ()))
+        return candidates
@@ -0,0 +1,134 @@
+"""This module keeps the sprites of a window ordered by their zindex. Sprites are inserted at
+their place instead of sorting all sprites again, and many sprites, e.g. the walls of a map, can be
+added or removed at once."""
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+from OpenRCSimulator.graphics.objects.sprite import Sprite
+
+
+class SpriteStore:
+    """The SpriteStore holds named sprites ordered from back (highest zindex) to front. Sprites
+    of the same zindex keep the order they were added in. Only one thread may change the store,
+    other threads read it through ordered().
+    """
+
+    def __init__(self) -> None:
+        self._sprites: Dict[str, Tuple[int, Sprite]] = {}
+
+        # the ordered sprites and their negated zindex, which is ascending for bisect
+        self._list: List[Tuple[int, Sprite]] = []
+        self._keys: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sprites
+
+    def get(self, name: str) -> Sprite:
+        """Returns a sprite by its name.
+
+        Args:
+            name (str): The sprite's name.
+
+        Returns:
+            Sprite: The sprite or None if there is no sprite of this name.
+        """
+        entry = self._sprites.get(name)
+        return entry[1] if entry else None
+
+    def ordered(self) -> List[Tuple[int, Sprite]]:
+        """Returns the sprites from back to front.
+
+        Returns:
+            List[Tuple[int, Sprite]]: A copy of the zindex and sprite pairs.
+        """
+        return list(self._list)
+
+    def add(self, name: str, sprite: Sprite, zindex: int = 0) -> None:
+        """Adds a sprite in front of all sprites of the same zindex. A sprite of the same name
+        is replaced, it keeps its place if the zindex is unchanged.
+
+        Args:
+            name (str): The sprite's name.
+            sprite (Sprite): The sprite.
+            zindex (int, optional): The layer, higher values are further back. Defaults to 0.
+        """
+        # the same tuple is stored in both containers, which identifies it in the list
+        entry = (zindex, sprite)
+        previous = self._sprites.get(name)
+        if previous is not None and previous[0] == zindex:
+            self._list[self._index(previous)] = entry
+            self._sprites[name] = entry
+            return
+
+        if previous is not None:
+            self.remove(name)
+
+        index = bisect_right(self._keys, -zindex)
+        self._keys.insert(index, -zindex)
+        self._list.insert(index, entry)
+        self._sprites[name] = entry
+
+    def add_many(self, sprites: Iterable[Tuple[str, Sprite]], zindex: int = 0) -> None:
+        """Adds many sprites of the same zindex at once, in the given order.
+
+        Args:
+            sprites (Iterable[Tuple[str, Sprite]]): The names and sprites.
+            zindex (int, optional): The layer, higher values are further back. Defaults to 0.
+        """
+        entries = {name: (zindex, sprite) for name, sprite in sprites}
+        self.remove_many([name for name in entries if name in self._sprites])
+
+        index = bisect_right(self._keys, -zindex)
+        self._list = self._list[:index] + list(entries.values()) + self._list[index:]
+        self._keys[index:index] = [-zindex] * len(entries)
+        self._sprites.update(entries)
+
+    def remove(self, name: str) -> None:
+        """Removes a sprite, unknown names are ignored.
+
+        Args:
+            name (str): The sprite's name.
+        """
+        entry = self._sprites.pop(name, None)
+        if entry is None:
+            return
+
+        index = self._index(entry)
+        del self._list[index]
+        del self._keys[index]
+
+    def remove_many(self, names: Iterable[str]) -> None:
+        """Removes many sprites at once, unknown names are ignored.
+
+        Args:
+            names (Iterable[str]): The sprites' names.
+        """
+        removed = set()
+        for name in names:
+            entry = self._sprites.pop(name, None)
+            if entry is not None:
+                removed.add(id(entry))
+        if not removed:
+            return
+
+        self._list = [entry for entry in self._list if id(entry) not in removed]
+        self._keys = [-zindex for zindex, _ in self._list]
+
+    def _index(self, entry: Tuple[int, Sprite]) -> int:
+        """Finds a stored entry among the sprites of its zindex, starting with the latest.
+
+        Args:
+            entry (Tuple[int, Sprite]): The stored zindex and sprite pair.
+
+        Returns:
+            int: The sprite's index in the ordered list.
+        """
+        zindex, sprite = entry
+        start = bisect_left(self._keys, -zindex)
+        for index in range(bisect_right(self._keys, -zindex) - 1, start - 1, -1):
+            if self._list[index] is entry:
+                return index
+        raise KeyError(f"{sprite} is not stored")
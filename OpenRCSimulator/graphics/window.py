@@ -1,18 +1,23 @@
-from multiprocessing import Lock
-from typing import List, Tuple, Any
+from typing import Dict, Iterable, List, Tuple, Any
+import itertools
 import pygame as py
 from OpenRCSimulator.graphics.callback import BaseListener, KeyListener, MouseListener, TextListener, WindowListener
 from OpenRCSimulator.graphics.objects.sprite import Sprite
 from OpenRCSimulator.graphics.font import FontWrapper
+from OpenRCSimulator.graphics.spatial_hash import SpatialHash
+from OpenRCSimulator.graphics.sprite_store import SpriteStore
 
 
-MUTEX = Lock()
+# the listener types events are dispatched to
+LISTENER_TYPES = (KeyListener, MouseListener, TextListener, WindowListener)
 
 
 class BaseWindow:
     """This class structurizes a game and the corresponding GUI for 
     it. The main loop will block the main thread, so be sure to 
-    specify all callbacks before.
+    specify all callbacks before. Static sprites in the back are composited 
+    once into a cached layer, only the regions covered by dynamic sprites are 
+    restored and updated on screen each frame.
 
     Args:
         window_size (Tuple[int, int]): The size of the window in pixels (width, height)
@@ -44,14 +49,37 @@ class BaseWindow:
 
         # set up everything else
         self._running = False
-        self._callbacks: List[Tuple[Any, BaseListener]] = []
+        # listeners are classified once when set, each event type only visits its own
+        # listeners. Registrations are indexed by their object and listener for removal.
+        self._registration_ids = itertools.count()
+        self._listeners: Dict[type, Dict[int, Tuple[Any, BaseListener]]] = {
+            listener_type: {} for listener_type in LISTENER_TYPES}
+        self._entries: Dict[int, Tuple[Any, BaseListener]] = {}
+        self._registrations: Dict[int, Dict[int, None]] = {}
         self._text_input = False
         self._text_cache = ""
         self._mous_pos = py.mouse.get_pos()
 
-        # sprite containers
-        self._sprites = {}
-        self._sprite_list = []
+        # sprites ordered by their zindex
+        self._sprites = SpriteStore()
+
+        # the mouse is polled once per frame and only tested against interactive sprites,
+        # which are indexed by their rect. Sprites without a rect are always tested.
+        self._hit_index = SpatialHash()
+        self._unindexed_sprites = []
+        self._pressed_sprites = []
+        self._hit_index_dirty = True
+
+        # frames are only drawn if an event occurred or the scene was invalidated
+        self._invalidated = True
+
+        # the static sprites behind all dynamic ones are drawn into a cached layer, the
+        # regions drawn by dynamic sprites in the last frame are restored from it. None
+        # means the regions are unknown and the whole screen is restored.
+        self._static_layer = None
+        self._static_dirty = True
+        self._dynamic_sprites = []
+        self._dirty_rects = None
 
     def set_title(self, title: str) -> None:
         """Sets the window's title
@@ -120,10 +148,24 @@ class BaseWindow:
             zindex (int, optional): Layering the sprites (higher values = send to
             back). Defaults to 0.
         """
-        self._sprites[name] = (zindex, sprite)
+        self._sprites.add(name, sprite, zindex)
+        sprite.set_change_listener(self._sprite_changed)
+        self._static_changed()
 
-        # convert to list and sort
-        self._update_sprite_list()
+    def add_sprites(self, sprites: Iterable[Tuple[str, Sprite]], zindex: int = 0) -> None:
+        """This method adds many sprites of the same zindex at once, e.g. the 
+        walls of a map.
+
+        Args:
+            sprites (Iterable[Tuple[str, Sprite]]): Names and sprite objects.
+            zindex (int, optional): Layering the sprites (higher values = send to
+            back). Defaults to 0.
+        """
+        sprites = list(sprites)
+        self._sprites.add_many(sprites, zindex)
+        for _, sprite in sprites:
+            sprite.set_change_listener(self._sprite_changed)
+        self._static_changed()
 
     def remove_sprite(self, name: str) -> None:
         """This method removes a registered sprite based on the name.
@@ -131,44 +173,181 @@ class BaseWindow:
         Args:
             name (str): The name of the sprite to remove.
         """
-        self._sprites.pop(name, "")
+        self._sprites.remove(name)
+        self._static_changed()
+
+    def remove_sprites(self, names: Iterable[str]) -> None:
+        """This method removes many registered sprites at once.
+
+        Args:
+            names (Iterable[str]): The names of the sprites to remove.
+        """
+        self._sprites.remove_many(names)
+        self._static_changed()
+
+    def invalidate(self) -> None:
+        """Requests a new frame, e.g. after a sprite was changed outside of an event. Can be
+        called from any thread.
+        """
+        self._invalidated = True
+
+    def _static_changed(self) -> None:
+        """Rebuilds the static layer in the next frame, called if a sprite was added, removed 
+        or a static sprite changed.
+        """
+        self._static_dirty = True
+        self._hit_index_dirty = True
+        self._invalidated = True
+
+    def _sprite_changed(self, sprite: Sprite) -> None:
+        """Called by a changed sprite, only static sprites require a new static layer.
+
+        Args:
+            sprite (Sprite): The changed sprite.
+        """
+        if sprite.static:
+            self._static_changed()
+        else:
+            self._hit_index_dirty = True
+            self._invalidated = True
+
+    def _update_hit_index(self) -> None:
+        """Indexes the interactive sprites by their current rect.
+        """
+        self._hit_index_dirty = False
+        self._hit_index.clear()
+        self._unindexed_sprites = []
+        for _, sprite in self._sprites.ordered():
+            if not sprite.interactive:
+                continue
+
+            rect = sprite.get_rect()
+            if rect is None:
+                self._unindexed_sprites.append(sprite)
+            else:
+                self._hit_index.insert(sprite, rect)
+
+    def _handle_mouse(self) -> None:
+        """Polls the mouse once and passes clicks to the interactive sprites under it or
+        pressed before.
+        """
+        if self._hit_index_dirty:
+            self._update_hit_index()
+
+        mouse_pos = py.mouse.get_pos()
+        pressed = py.mouse.get_pressed()[0]
+
+        candidates = self._hit_index.query_point(mouse_pos) + self._unindexed_sprites
+        hits = [sprite for sprite in candidates if sprite.collidepoint(mouse_pos)]
+        for sprite in hits:
+            sprite.handle_mouse(True, pressed)
+
+        # sprites pressed before but no longer under the mouse drop their press
+        for sprite in self._pressed_sprites:
+            if sprite not in hits:
+                sprite.handle_mouse(False, pressed)
+        self._pressed_sprites = [sprite for sprite in hits if sprite.is_button_down()]
+
+    def _draw_static_layer(self) -> None:
+        """Draws the static sprites in the back into the cached layer. All sprites from the 
+        first dynamic one on are drawn every frame, which keeps the order of the zindex.
+        """
+        self._static_dirty = False
+        sprite_list = self._sprites.ordered()
 
-        # convert to list and sort
-        self._update_sprite_list()
+        split = 0
+        while split < len(sprite_list) and sprite_list[split][1].static:
+            split += 1
 
-    def _update_sprite_list(self) -> None:
-        # the sprite list is used to sort sprites corresponding to their
-        # zindex value.
-        def comp(sprite): return sprite[0]
-        self._sprite_list = list(self._sprites.values())
-        self._sprite_list.sort(key=comp, reverse=True)
+        self._screen.fill((0, 0, 0))
+        for _, sprite in sprite_list[:split]:
+            sprite.draw()
+
+        self._static_layer = self._screen.copy()
+        self._dynamic_sprites = [sprite for _, sprite in sprite_list[split:]]
+
+    def _draw_frame(self) -> None:
+        """Draws a frame, only the changed regions are updated on screen.
+        """
+        self._handle_mouse()
+
+        full = self._static_dirty or self._dirty_rects is None
+        if self._static_dirty:
+            self._draw_static_layer()
+        elif self._dirty_rects is None:
+            self._screen.blit(self._static_layer, (0, 0))
+        else:
+            for rect in self._dirty_rects:
+                self._screen.blit(self._static_layer, rect, rect)
+
+        # draw all dynamic sprites and collect the regions they cover
+        rects = []
+        for sprite in self._dynamic_sprites:
+            sprite.draw()
+            rects.append(sprite.get_rect())
+
+        self.draw()
+
+        # cap at the given frame rate, regions covering the whole screen are flipped at once
+        self._clock.tick(self._frame_rate)
+        known = None not in rects
+        if not full and known:
+            area = sum(rect.w * rect.h for rect in self._dirty_rects + rects)
+            full = area >= self._width * self._height
+        if full:
+            py.display.flip()
+        else:
+            py.display.update(self._dirty_rects + rects)
+        self._dirty_rects = rects if known else None
 
     def set_listener(self, listener: BaseListener, object: Any = None) -> None:
         """
         Using this method, callbacks can be registered. If the 
         defined event occurs, then the given function is executed.
         """
-        self._callbacks.append((object, listener))
+        registration = next(self._registration_ids)
+        self._entries[registration] = (object, listener)
+        for listener_type in LISTENER_TYPES:
+            if isinstance(listener, listener_type):
+                self._listeners[listener_type][registration] = (object, listener)
+
+        for key in self._registration_keys(listener, object):
+            self._registrations.setdefault(key, {})[registration] = None
 
     def remove_listener(self, listener: BaseListener, object: Any = None) -> None:
         """
-        This method removes a registered callback
+        This method removes a registered callback. If an object is given, the 
+        oldest registration of the object is removed, otherwise the oldest of 
+        the listener.
         """
-        if len(self._callbacks) != 0:
-            if object:
-                for i, (registered_object, _) in enumerate(self._callbacks):
-                    if object == registered_object:
-                        self._callbacks.pop(i)
-                        break
-                return
-
-            for i, (_, registered_listener) in enumerate(self._callbacks):
-                if listener == registered_listener:
-                    self._callbacks.pop(i)
-                    break
-
-    def _get_listeners(self, listener: object) -> List[str]:
-        return [c.__name__ for c in listener.__class__.__bases__]
+        registrations = self._registrations.get(id(object) if object else id(listener))
+        if not registrations:
+            return
+
+        registration = next(iter(registrations))
+        registered_object, registered_listener = self._entries.pop(registration)
+        for listener_type in LISTENER_TYPES:
+            self._listeners[listener_type].pop(registration, None)
+
+        for key in self._registration_keys(registered_listener, registered_object):
+            self._registrations[key].pop(registration, None)
+            if not self._registrations[key]:
+                del self._registrations[key]
+
+    def _registration_keys(self, listener: BaseListener, object: Any) -> set:
+        return {id(listener), id(object)} if object else {id(listener)}
+
+    def _get_listeners(self, listener_type: type) -> List[Tuple[Any, BaseListener]]:
+        """Returns the registrations of a listener type, copied so callbacks can set or 
+        remove listeners while an event is dispatched.
+
+        Args:
+            listener_type (type): One of LISTENER_TYPES.
+
+        Returns:
+            List[Tuple[Any, BaseListener]]: The objects and listeners in registration order.
+        """
+        return list(self._listeners[listener_type].values())
 
     def start(self) -> None:
         """
@@ -177,18 +356,17 @@ class BaseWindow:
         """
         self._running = True
         while self._running:
-            for event in py.event.get():
+            events = py.event.get()
+            for event in events:
                 self.event(event)
 
-            # draw all registered sprites first
-            for _, sprite in self._sprite_list:
-                sprite.draw()
-
-            self.draw()
-
-            # cap at the given frame rate
-            self._clock.tick(self._frame_rate)
-            py.display.flip()
+            # frames without any change are skipped, changes made while drawing invalidate
+            # the next frame
+            if events or self._invalidated:
+                self._invalidated = False
+                self._draw_frame()
+            else:
+                self._clock.tick(self._frame_rate)
 
         print("Graphics has stopped.")
 
@@ -199,9 +377,8 @@ class BaseWindow:
         if event.type == py.QUIT:
             self._running = False
 
-            for object, callback in self._callbacks:
-                if WindowListener.__name__ in self._get_listeners(callback):
-                    callback.on_quit()
+            for object, callback in self._get_listeners(WindowListener):
+                callback.on_quit()
 
         # keyboard input
         if event.type == py.KEYDOWN:
@@ -209,49 +386,45 @@ class BaseWindow:
             if self._text_input:
                 if event.key == py.K_ESCAPE or event.key == py.K_RETURN:
                     self._text_input = False
-                    for object, callback in self._callbacks:
-                        if TextListener.__name__ in self._get_listeners(callback):
-                            callback.on_text_end(object)
+                    for object, callback in self._get_listeners(TextListener):
+                        callback.on_text_end(object)
                     self._text_cache = ""
                 else:
                     self._text_cache += event.unicode
                     if event.key == py.K_BACKSPACE:
                         self._text_cache = self._text_cache[:-2]
 
-                    for object, callback in self._callbacks:
-                        if TextListener.__name__ in self._get_listeners(callback):
-                            callback.on_text_changed(object, self._text_cache)
+                    for object, callback in self._get_listeners(TextListener):
+                        callback.on_text_changed(object, self._text_cache)
 
             else:
                 # execute a key pressed callback, the name has to be the key name
-                for object, callback in self._callbacks:
-                    if KeyListener.__name__ in self._get_listeners(callback):
-                        callback.on_key_pressed(event.key)
+                for object, callback in self._get_listeners(KeyListener):
+                    callback.on_key_pressed(event.key)
         if event.type == py.KEYUP:
             # execute a key pressed callback, the name has to be the key name
-            for object, callback in self._callbacks:
-                if KeyListener.__name__ in self._get_listeners(callback):
-                    callback.on_key_released(event.key)
+            for object, callback in self._get_listeners(KeyListener):
+                callback.on_key_released(event.key)
 
         # mouse input
         mouse_pos = py.mouse.get_pos()
         mouse_buttons = py.mouse.get_pressed()
 
         if True in mouse_buttons:
-            for object, callback in self._callbacks:
-                if MouseListener.__name__ in self._get_listeners(callback):
-                    callback.on_click(mouse_buttons, mouse_pos)
+            for object, callback in self._get_listeners(MouseListener):
+                callback.on_click(mouse_buttons, mouse_pos)
 
         if mouse_pos != self._mous_pos:
             delta = (self._mous_pos[0] - mouse_pos[0],
                      self._mous_pos[1] - mouse_pos[1])
             self._mous_pos = mouse_pos
-            for object, callback in self._callbacks:
-                if MouseListener.__name__ in self._get_listeners(callback):
-                    callback.on_movement(self._mous_pos, delta)
+            for object, callback in self._get_listeners(MouseListener):
+                callback.on_movement(self._mous_pos, delta)
 
     def draw(self) -> None:
         """
-        This method can be used to draw elements on the GUI.
+        This method can be used to draw elements on the GUI. It is called 
+        after the sprites in every drawn frame, changes outside of the dynamic 
+        sprites' regions are only shown with the next full update.
         """
         raise NotImplementedError
@@ -1,9 +1,10 @@
 """This module handles the map creation."""
+import os
 from typing import Tuple
 import pygame as py
 import yaml
 from OpenRCSimulator.gui.sub_controller.shortcut_controller import ShortcutController
-from OpenRCSimulator.state import MAPS_FOLDER, get_data_folder
+from OpenRCSimulator.simulation.compiled_map import MAP_LOADER, compile_map
 from OpenRCSimulator.graphics.controller import BaseController
 from OpenRCSimulator.graphics.objects.rectangle import Rectangle
 from OpenRCSimulator.graphics.objects.text import Text
@@ -129,20 +130,28 @@ class CreatorController(BaseController):
             dict_file = dict_file | controller.to_dict()
 
         # save the dict
-        path = f"{get_data_folder(MAPS_FOLDER)}{self._file_name}.yaml"
+        path = MAP_LOADER.path(self._file_name)
         with open(path, "w", encoding="UTF-8") as file:
             _ = yaml.dump(dict_file, file)
 
+        # the compiled map is written right away, so loading the map skips parsing the YAML
+        compile_map(path, dict_file)
+
         # show saved status
         self._window.set_title(self._window_title)
 
     def load(self, name: str) -> None:
-        """This method sets the name of a map.
+        """This method sets the name of a map. An existing map is loaded to continue editing it.
 
         Args:
             name (str): The map's name.
         """
         self._file_name = name
+        if name and os.path.exists(MAP_LOADER.path(name)):
+            compiled = MAP_LOADER.get(name)
+            self._car.from_map(compiled)
+            self._wall.from_map(compiled)
+            self._window.set_title(self._window_title)
 
     def loop(self) -> None:
         pass
@@ -3,16 +3,18 @@ as well as watching the AI drive."""
 import os
 from typing import Callable, Dict, Tuple
 import pygame as py
-import yaml
 from OpenRCSimulator.graphics.callback import KeyListener
 from OpenRCSimulator.graphics.objects.text import Text
+from OpenRCSimulator.graphics.scheduler import FixedStepScheduler, PHYSICS_RATE, \
+    TIME_WARPS, WARP_MAX
 from OpenRCSimulator.gui.sub_controller.car_controller import CarController
 from OpenRCSimulator.gui.sub_controller.shortcut_controller import ShortcutController
 from OpenRCSimulator.gui.sub_controller.wall_controller import WallController
-from OpenRCSimulator.state import MAPS_FOLDER, MODELS_FOLDER, get_data_folder
+from OpenRCSimulator.state import MODELS_FOLDER, get_data_folder
+from OpenRCSimulator.simulation.compiled_map import MAP_LOADER
 from OpenRCSimulator.graphics.controller import BaseController
 from OpenRCSimulator.graphics.objects.rectangle import Rectangle
-from OpenRCSimulator.gui import BACKGROUND_COLOR, MANUAL, MODE_TEXT_COLOR
+from OpenRCSimulator.gui import BACKGROUND_COLOR, MANUAL, MODE_TEXT_COLOR, SHORTCUT_TEXT_COLOR
 from OpenRCSimulator.gui.window import MainWindow
 
 
@@ -22,6 +24,11 @@ MANUAL_TURN_LEFT = "turn_left"
 MANUAL_TURN_RIGHT = "turn_right"
 MANUAL_MOTOR_STOP = "motor_stop"
 SIMULATION_PAUSE = "pause"
+SIMULATION_WARP = "time_warp"
+SIMULATION_LABELS = "labels"
+
+# while simulating at WARP_MAX the window only renders at this rate
+WARP_MAX_FRAME_RATE = 10
 
 
 class SimulationController(BaseController, KeyListener):
@@ -31,10 +38,12 @@ class SimulationController(BaseController, KeyListener):
     Args:
         window_size (Tuple[int, int]): Width and height of the window.
         flags (int, optional): Fullscreen, hardware acceleration, ... Defaults to 0.
+        physics_rate (float, optional): Simulation steps per second. Defaults to PHYSICS_RATE.
     """
-    def __init__(self, window_size: Tuple[int, int], flags: int = 0) -> None:
+    def __init__(self, window_size: Tuple[int, int], flags: int = 0,
+                 physics_rate: float = PHYSICS_RATE) -> None:
         super().__init__()
-        self._t = py.time.get_ticks()
+        self._scheduler = FixedStepScheduler(physics_rate)
         self._file_name = None
 
         self._width, self._height = window_size
@@ -72,6 +81,42 @@ class SimulationController(BaseController, KeyListener):
         self._shortcuts = ShortcutController(self._window)
         self._shortcuts.add_shortcut(
             SIMULATION_PAUSE, self._car.pause, "'P' Pause", py.K_p)
+        self._shortcuts.add_shortcut(
+            SIMULATION_WARP, self._next_time_warp, "'T' Time warp", py.K_t)
+        self._shortcuts.add_shortcut(
+            SIMULATION_LABELS, self._car.next_label_decimation, "'L' Sensor labels", py.K_l)
+
+        # show the time warp and the achieved real time factor, the text changes while
+        # simulating, so it is drawn every frame instead of rebuilding the static layer
+        self._frame_rate = self._window.frame_rate
+        self._real_time_factor = None
+        self._text_warp = Text(self._surface, "", self._width - 20, 20, SHORTCUT_TEXT_COLOR,
+                               self._window.get_font())
+        self._text_warp.static = False
+        self._window.add_sprite("text_warp", self._text_warp)
+        self._show_time_warp()
+
+    def _next_time_warp(self) -> None:
+        """Switches to the next time warp. At WARP_MAX the window renders at a low rate, so the
+        simulation gets most of the time.
+        """
+        index = TIME_WARPS.index(self._scheduler.warp) if self._scheduler.warp in TIME_WARPS \
+            else -1
+        self._scheduler.warp = TIME_WARPS[(index + 1) % len(TIME_WARPS)]
+
+        warp_max = self._scheduler.warp == WARP_MAX
+        self._window.frame_rate = WARP_MAX_FRAME_RATE if warp_max else self._frame_rate
+        self._show_time_warp()
+
+    def _show_time_warp(self) -> None:
+        """Updates the on-screen time warp and real time factor.
+        """
+        warp = "max" if self._scheduler.warp == WARP_MAX else f"{self._scheduler.warp:g}x"
+        self._real_time_factor = self._scheduler.real_time_factor
+        self._text_warp.set_text(f"{warp} (real time factor {self._real_time_factor:.1f})")
+        width, _ = self._text_warp.get_size()
+        self._text_warp.set_position((self._width - 20 - width, 20), Text.ANCHOR_TOP_LEFT)
+        self._window.invalidate()
 
     def on_key_pressed(self, key: int) -> None:
         if key in self._callback_register:
@@ -89,15 +134,13 @@ class SimulationController(BaseController, KeyListener):
             map_name (str): Map name to load.
             car_name (str): Car to load. Defaults to None (no car loaded.)
         """
-        path = f"{get_data_folder(MAPS_FOLDER)}/{map_name}.yaml"
-        if not os.path.exists(path):
+        if not os.path.exists(MAP_LOADER.path(map_name)):
             return
 
-        # load the car's position and map
-        with open(path, "r", encoding="UTF-8") as file:
-            dict_file = yaml.load(file, Loader=yaml.FullLoader)
-            self._car.from_dict(dict_file["car"])
-            self._wall.from_dict(dict_file["walls"])
+        # load the car's position and map, the compiled map is shared with the simulation
+        compiled = MAP_LOADER.get(map_name)
+        self._car.from_map(compiled)
+        self._wall.from_map(compiled)
 
         # load the agent if given [todo]
         path = f"{get_data_folder(MODELS_FOLDER)}/car_{car_name}.pkl"
@@ -120,12 +163,19 @@ class SimulationController(BaseController, KeyListener):
 
             self._window.set_title(self._window_title + " (Manual Controls)")
 
-    def loop(self) -> None:
-        # calculate the time delta
-        delta = (py.time.get_ticks() - self._t) / 1_000
-        self._t = py.time.get_ticks()
+        # the time spent loading is not simulated
+        self._scheduler.reset()
 
-        walls = self._wall.get_walls()
-        self._car.loop(delta, walls)
-
-        self._t += delta
+    def loop(self) -> None:
+        # simulate the due steps with a fixed delta, independent of the host's speed, only the
+        # state after the last step is displayed
+        walls = self._wall.get_wall_set()
+        self._scheduler.run(lambda delta: self._car.step(delta, walls))
+
+        if self._scheduler.real_time_factor != self._real_time_factor:
+            self._show_time_warp()
+
+        # display the car between the last two steps and sleep until the next step or frame
+        if self._car.interpolate(self._scheduler.alpha):
+            self._window.invalidate()
+        self._scheduler.wait(1 / self._window.frame_rate)
@@ -4,11 +4,13 @@ import math
 from time import sleep
 from typing import Dict, Tuple
 import numpy as np
+from OpenRCSimulator.graphics import CENTIMETER_TO_PIXEL
 from OpenRCSimulator.graphics.callback import MouseListener
-from OpenRCSimulator.graphics.window import MUTEX
+from OpenRCSimulator.simulation.compiled_map import CompiledMap
 from OpenRCSimulator.simulation.openrc import OpenRC
+from OpenRCSimulator.simulation.wall import WallSet
 from OpenRCSimulator.simulation import CHASSIS_SIZE
-from OpenRCSimulator.graphics.objects.car import Car
+from OpenRCSimulator.graphics.objects.car import Car, LABEL_DECIMATIONS
 from OpenRCSimulator.graphics.sub_controller import BaseSubController
 from OpenRCSimulator.gui import CREATOR, GARAGE, SIMULATION
 from OpenRCSimulator.gui.window import MainWindow
@@ -36,6 +38,10 @@ class CarController(BaseSubController, MouseListener):
         # accelerate, backwards, break, left, right
         self._controls = np.array([False, False, False, False, False])
 
+        # the last two simulated states (angle, position, sensors, distances) in pixels
+        self._previous_state = None
+        self._state = None
+
         # window and surface information
         self._window = window
         self._ww, self._wh = window.get_window_size()
@@ -48,8 +54,14 @@ class CarController(BaseSubController, MouseListener):
             self._surface, -CHASSIS_SIZE[0] * 2, -CHASSIS_SIZE[1] * 2, CHASSIS_SIZE,
             self._sensor_font, car_mode)
         self._window.add_sprite("sprite_car", self._sprite_car)
+        self._label_decimation = 0
         self._sprite_position_set = True
 
+        if self._app_mode == SIMULATION:
+            # TODO: pass the sensors to the trained robocart and use its decision to control
+            # the car
+            print("Simulation not implemented. WIP")
+
     def accelerate(self):
         """This method calls the simulation to accelerate the car.
         """
@@ -80,6 +92,13 @@ class CarController(BaseSubController, MouseListener):
         """
         self._is_paused = not self._is_paused
 
+    def next_label_decimation(self) -> None:
+        """Switches to the next decimation of the sensors' distance labels, see
+        LABEL_DECIMATIONS.
+        """
+        self._label_decimation = (self._label_decimation + 1) % len(LABEL_DECIMATIONS)
+        self._sprite_car.set_label_decimation(*LABEL_DECIMATIONS[self._label_decimation])
+
     def toggle(self, call: bool = True) -> None:
         """This method toggles a special mode for this controller. In CREATOR mode, the car's 
         position can be changed.
@@ -131,30 +150,65 @@ class CarController(BaseSubController, MouseListener):
         self._sprite_car.set_position(position)
         self._sprite_car.set_direction(direction)
 
+        # the sprite shows the negated angle of the simulation, see OpenRC.drive()
         self._car = OpenRC(np.array([d["x"], d["y"]], dtype=float))
+        self._car.set_theta(-direction)
+        self._previous_state = None
+        self._state = None
 
-    def loop(self, delta, lines) -> None:
-        """
-        This loop is always executed by the main controller.
+    def from_map(self, compiled: CompiledMap) -> None:
+        """Places the car at the spawn pose of a loaded map.
+
+        Args:
+            compiled (CompiledMap): The map, e.g. from the MAP_LOADER.
         """
+        x, y, direction = compiled.car.tolist()
+        self.from_dict({"x": x, "y": y, "direction": direction})
+
+    def step(self, delta: float, walls: WallSet) -> None:
+        """Simulates one tick. The sprite is not changed, call interpolate() to display the
+        simulated states.
 
+        Args:
+            delta (float): The simulated time in seconds.
+            walls (WallSet): The compiled walls of the map.
+        """
         if self._app_mode != CREATOR:
-            # get the simulations info about the car and update the sprite
+            # get the simulations info about the car
             if self._is_paused:
                 delta = 0
-            
-            # run the simulation
+
+            # run the simulation, the last two states are kept for interpolation, in pixels
+            # but not truncated to whole pixels as returned by drive()
             self._car.set_time_delta(delta)
-            walls = [[line.get_start(), line.get_end()] for line in lines]
-            angle, x, y, sensor_lines, distances = self._car.drive(walls, self._controls)
+            angle, _, _, _, distances = self._car.drive(walls, self._controls)
+            self._previous_state = self._state
+            self._state = (angle, self._car.position.copy(),
+                           np.asarray(self._car.sensor_lines, dtype=float) * CENTIMETER_TO_PIXEL,
+                           distances)
 
-            # update the car's position
-            self._sprite_car.set_position((x, y))
-            self._sprite_car.set_direction(angle)
-            self._sprite_car.set_sensors(sensor_lines)
-            self._sprite_car.set_distances(distances)
+    def interpolate(self, alpha: float) -> bool:
+        """Displays the car between the last two simulated states. The state is handed to the
+        render thread at once.
 
-        if self._app_mode == SIMULATION:
-            # pass through the sensors to the trained robocart and use its decision
-            # to controll the car
-            print("Simulation not implemented. WIP")
+        Args:
+            alpha (float): The progress from the previous (0) to the last state (1).
+
+        Returns:
+            bool: True if the displayed state changed.
+        """
+        if self._state is None:
+            return False
+        previous = self._previous_state or self._state
+        angle, position, sensors, distances = self._state
+        previous_angle, previous_position, previous_sensors, _ = previous
+
+        # the angle is turned the shorter way around
+        turn = (angle - previous_angle + math.pi) % (2 * math.pi) - math.pi
+        position = previous_position + (position - previous_position) * alpha
+        if len(sensors) == len(previous_sensors):
+            sensors = previous_sensors + (sensors - previous_sensors) * alpha
+
+        return self._sprite_car.set_state(tuple(position), previous_angle + turn * alpha,
+                                          [tuple(sensor) for sensor in sensors.tolist()],
+                                          distances)
@@ -3,14 +3,21 @@ import math
 from typing import Dict, Tuple, List
 from OpenRCSimulator.graphics.callback import MouseListener
 from OpenRCSimulator.graphics.objects.wall import Wall
+from OpenRCSimulator.graphics.objects.wall_layer import WallLayer
+from OpenRCSimulator.graphics.spatial_hash import SpatialHash
 from OpenRCSimulator.graphics.sub_controller import BaseSubController
 from OpenRCSimulator.gui.window import MainWindow
+from OpenRCSimulator.simulation.compiled_map import CompiledMap
+from OpenRCSimulator.simulation.wall import WallSet
 
 
 WALL_COLOR = (255, 120, 120)
 WALL_THICKNESS = 11
 SNAP_THRESHOLD = 25
 
+# walls within this distance in pixels of the cursor can be picked
+PICK_THRESHOLD = WALL_THICKNESS // 2 + 2
+
 
 class WallController(BaseSubController, MouseListener):
     """The wall controller manages wall placement and beahviour.
@@ -30,9 +37,20 @@ class WallController(BaseSubController, MouseListener):
         self._ww, self._wh = window.get_window_size()
         self._surface = window.get_surface()
 
-        # wall sprites
+        # wall sprites, the finished walls are drawn by a single layer and only the active
+        # wall is drawn every frame
         self._walls = []
         self._active_wall = None
+        self._layer = WallLayer(self._surface)
+        self._window.add_sprite("sprite_walls", self._layer, zindex=2)
+
+        # the finished walls' end points and rects are indexed, so snapping and picking only
+        # test the walls near the cursor. The active wall is indexed once it is finished.
+        self._endpoints = SpatialHash(2 * SNAP_THRESHOLD)
+        self._wall_rects = SpatialHash()
+
+        # compiled walls for the simulation, rebuilt lazily after the walls have changed
+        self._wall_set = None
 
     def get_walls(self) -> List:
         """This method returns the walls as a List to be further processed.
@@ -42,6 +60,57 @@ class WallController(BaseSubController, MouseListener):
         """
         return self._walls
 
+    def get_wall_set(self) -> WallSet:
+        """This method returns the walls compiled for the simulation. The set is only 
+        rebuilt if the walls have changed.
+
+        Returns:
+            WallSet: The compiled walls, ordered as get_walls().
+        """
+        if self._wall_set is None:
+            self._wall_set = WallSet.from_walls(self._walls)
+        return self._wall_set
+
+    def _index_wall(self, wall: Wall) -> None:
+        """Adds a wall to the spatial indices or updates it after it was moved.
+
+        Args:
+            wall (Wall): The finished wall.
+        """
+        for endpoint, (x, y) in (((wall, 0), wall.get_start()), ((wall, 1), wall.get_end())):
+            self._endpoints.insert(endpoint, (x, y, 0, 0))
+        self._wall_rects.insert(wall, wall.get_rect())
+
+    def _unindex_wall(self, wall: Wall) -> None:
+        """Removes a wall from the spatial indices.
+
+        Args:
+            wall (Wall): The wall.
+        """
+        self._endpoints.remove((wall, 0))
+        self._endpoints.remove((wall, 1))
+        self._wall_rects.remove(wall)
+
+    def get_wall_at(self, pos: Tuple[int, int], threshold: float = PICK_THRESHOLD) -> Wall:
+        """Picks the finished wall closest to a position, e.g. the cursor.
+
+        Args:
+            pos (Tuple[int, int]): The position in pixels.
+            threshold (float, optional): The maximum distance to the wall's line. Defaults to
+            PICK_THRESHOLD.
+
+        Returns:
+            Wall: The closest wall or None if no wall is within the threshold.
+        """
+        x, y = pos
+        closest, closest_distance = None, threshold
+        for wall in self._wall_rects.query_rect((x - threshold, y - threshold,
+                                                 2 * threshold, 2 * threshold)):
+            distance = _segment_distance(pos, wall.get_start(), wall.get_end())
+            if distance <= closest_distance:
+                closest, closest_distance = wall, distance
+        return closest
+
     def toggle(self, call: bool = True) -> None:
         super().toggle(call)
 
@@ -52,21 +121,34 @@ class WallController(BaseSubController, MouseListener):
 
             # remove the latest wall which is never finished
             if self._active_wall:
-                wall_index = len(self._walls)
                 self._walls.remove(self._active_wall)
-                self._window.remove_sprite(f"sprite_wall_{wall_index}")
+                self._unindex_wall(self._active_wall)
+                self._window.remove_sprite("sprite_wall_active")
 
                 self._active_wall = None
+                self._wall_set = None
 
     def _new_wall(self, pos: Tuple[int, int]) -> Wall:
         """Method adds a new wall to the set of walls.
         """
         wall = Wall(self._surface, pos, pos, WALL_COLOR, WALL_THICKNESS)
         self._walls.append(wall)
-        self._window.add_sprite(
-            f"sprite_wall_{len(self._walls)}", wall, zindex=2)
+
+        # the active wall follows the cursor, so it is drawn every frame in front of the layer
+        wall.static = False
+        self._window.add_sprite("sprite_wall_active", wall, zindex=2)
 
         self._active_wall = wall
+        self._wall_set = None
+
+    def _finish_wall(self) -> None:
+        """Moves the active wall into the layer of finished walls.
+        """
+        wall = self._active_wall
+        self._window.remove_sprite("sprite_wall_active")
+        wall.static = True
+        self._layer.add_wall(wall)
+        self._index_wall(wall)
 
     def on_click(self, buttons: Tuple[bool, bool, bool], position: Tuple[int, int]) -> None:
         if self.is_toggled() and buttons[0]:
@@ -80,6 +162,7 @@ class WallController(BaseSubController, MouseListener):
                 # set end point of last added wall
                 pos = self._snap(position)
                 self._active_wall.set_end(pos)
+                self._finish_wall()
 
                 # create a new wall to continue
                 self._new_wall(pos)
@@ -92,9 +175,11 @@ class WallController(BaseSubController, MouseListener):
             snap_pos = self._snap(position)
             if self._active_wall:
                 self._active_wall.set_end(snap_pos)
+                self._wall_set = None
 
     def _snap(self, pos: Tuple[int, int]) -> Tuple[int, int]:
-        """This method snaps a position to a wall's position given some threshold.
+        """This method snaps a position to the closest end point of a finished wall 
+        given some threshold.
 
         Args:
             pos (Tuple[int, int]): The position, which can be snapped.
@@ -103,20 +188,16 @@ class WallController(BaseSubController, MouseListener):
             Tuple[int, int]: The snapped or original position.
         """
         x, y = pos
-        for wall in self._walls[:-1]:
-            wx, wy = wall.get_start()
+        closest, closest_distance = pos, SNAP_THRESHOLD
+        for wall, end in self._endpoints.query_rect((x - SNAP_THRESHOLD, y - SNAP_THRESHOLD,
+                                                     2 * SNAP_THRESHOLD, 2 * SNAP_THRESHOLD)):
+            wx, wy = wall.get_end() if end else wall.get_start()
             distance = math.hypot(x - wx, y - wy)
 
-            if distance <= SNAP_THRESHOLD:
-                return (wx, wy)
+            if distance <= closest_distance:
+                closest, closest_distance = (wx, wy), distance
 
-            wx, wy = wall.get_end()
-            distance = math.hypot(x - wx, y - wy)
-
-            if distance <= SNAP_THRESHOLD:
-                return (wx, wy)
-
-        return pos
+        return closest
 
     def app_mode(self, mode: int) -> None:
         """Defines the controller mode.
@@ -145,6 +226,7 @@ class WallController(BaseSubController, MouseListener):
         return final_dict
 
     def from_dict(self, d: Dict) -> None:
+        walls = []
         for wall_name in d.keys():
             wall_dict = d[wall_name]
             start_pos = (wall_dict["start_x"], wall_dict["start_y"])
@@ -153,4 +235,38 @@ class WallController(BaseSubController, MouseListener):
             wall = Wall(self._surface, start_pos, end_pos,
                         WALL_COLOR, WALL_THICKNESS)
             self._walls.append(wall)
-            self._window.add_sprite(wall_name, wall, zindex=2)
+            self._index_wall(wall)
+            walls.append(wall)
+
+        self._layer.add_walls(walls)
+        self._wall_set = None
+
+    def from_map(self, compiled: CompiledMap) -> None:
+        """Adds the walls of a loaded map. The map's compiled walls are used by the simulation
+        until the walls are changed.
+
+        Args:
+            compiled (CompiledMap): The map, e.g. from the MAP_LOADER.
+        """
+        self.from_dict(compiled.to_dict()["walls"])
+        if len(self._walls) == len(compiled.lines):
+            self._wall_set = compiled.wall_set
+
+
+def _segment_distance(point: Tuple[float, float], start: Tuple[float, float],
+                      end: Tuple[float, float]) -> float:
+    """Calculates the distance of a point to a line segment.
+
+    Args:
+        point (Tuple[float, float]): The point.
+        start (Tuple[float, float]): The segment's start.
+        end (Tuple[float, float]): The segment's end.
+
+    Returns:
+        float: The distance in the points' unit.
+    """
+    (x, y), (sx, sy), (ex, ey) = point, start, end
+    dx, dy = ex - sx, ey - sy
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((x - sx) * dx + (y - sy) * dy) / length))
+    return math.hypot(x - (sx + t * dx), y - (sy + t * dy))
@@ -1,9 +1,6 @@
 """This module handles the app's startup and starting configuration."""
 import argparse
 import sys
-from OpenRCSimulator.gui.configurator_controller import ConfiguratorController
-from OpenRCSimulator.gui.creator_controller import CreatorController
-from OpenRCSimulator.gui.simulation_controller import SimulationController
 
 
 def main():
@@ -24,22 +21,31 @@ def main():
         "--name", help="The name of a map (needed to create or load a map).")
     parser.add_argument("--model", help="The trained agent, this contains the NN for " +
                         "controlling the agent.")
+    parser.add_argument("--profile", help="Measures the simulation's hot path and prints " +
+                        "the results at exit.", action="store_true")
     parser.add_argument("--garage", help="Editor to adjust the car measurments and sensors.",
                         action="store_true")
 
     args = parser.parse_args()
 
+    # instrument the simulation
+    if args.profile:
+        from OpenRCSimulator.simulation.profiler import PROFILER
+        PROFILER.enable(dump_at_exit=True)
+
     # configure car
     if args.garage:
+        from OpenRCSimulator.gui.configurator_controller import ConfiguratorController
         application = ConfiguratorController(window_size=(1600, 900))
         application.load()
         application.boot()
         sys.exit(0)
 
-    # train an agent
+    # train an agent, the GUI (and pygame) is never loaded in this mode
     if args.train:
-        # Training module WIP # [todo]
-        pass
+        from OpenRCSimulator.simulation.trainer import Trainer
+        Trainer(args.train, args.name).train()
+        sys.exit(0)
 
     # all other modes depend on a map name
     if not args.name:
@@ -48,12 +54,14 @@ def main():
 
     # create a new map
     if args.create:
+        from OpenRCSimulator.gui.creator_controller import CreatorController
         application = CreatorController(window_size=(1200, 900))
         application.load(args.name)
         application.boot()
         sys.exit(0)
 
     # test an agent on a map, or test drive manually
+    from OpenRCSimulator.gui.simulation_controller import SimulationController
     application = SimulationController(window_size=(1200, 900))
     application.load(args.name, args.model)
     application.boot()
@@ -0,0 +1,362 @@
+"""This module simulates a whole fleet of cars at once. The state of all cars is kept in arrays
+(struct of arrays) and every tick steps all cars with vectorized physics, sensors and collision
+checks. A batch of one car behaves exactly like the OpenRC."""
+import math
+import time
+from typing import Tuple, Union, List
+
+import numpy as np
+
+from OpenRCSimulator.graphics import CENTIMETER_TO_PIXEL, PIXEL_TO_CENTIMETER
+from OpenRCSimulator.simulation import CHASSIS_SIZE, INITIAL_THETA, MOTOR_POWER, \
+    SENSOR_DISTANCE, SENSOR_POINTS, TURNING_BOUNDARIES, WEIGHT
+from OpenRCSimulator.simulation import profiler
+from OpenRCSimulator.simulation.collision import collide
+from OpenRCSimulator.simulation.profiler import PROFILER
+from OpenRCSimulator.simulation.openrc import OpenRC
+from OpenRCSimulator.simulation.raycast import MARCH_ITERATIONS, MARCH_TOLERANCE, cast_rays, \
+    gather_walls, march_rays, sensor_rays
+from OpenRCSimulator.simulation.wall import WallSet
+
+
+# upper bound of ray-wall pairs intersected in one broadcast, limits the memory used
+MAX_BROADCAST_SIZE = 2_000_000
+
+
+class OpenRCBatch:
+    """This class simulates N racing cars in parallel. Position, angle, velocity, turn angle and
+    sensor distances of all cars are stored in (N,) and (N, SENSOR_POINTS) arrays.
+    """
+
+    def __init__(self, pixel_positions: np.ndarray, delta: float = 0.1,
+                 sensor_mode: int = OpenRC.SENSOR_NUMPY) -> None:
+        """Creates the fleet.
+
+        Args:
+            pixel_positions (np.ndarray): The starting positions of all cars in pixels (N, 2).
+            delta (float, optional): The time between two ticks. Defaults to 0.1.
+            sensor_mode (int, optional): OpenRC.SENSOR_SPHERE_TRACE sphere traces the sensors
+            if the walls have a distance field, otherwise they are intersected exactly. Defaults
+            to OpenRC.SENSOR_NUMPY.
+        """
+        positions = np.array(pixel_positions, dtype=float).reshape(-1, 2)
+        size = len(positions)
+
+        self._pos = positions * PIXEL_TO_CENTIMETER
+        self._theta = np.full(size, INITIAL_THETA, dtype=float)
+        self._velocity = np.zeros(size)
+        self._turn_angle = np.zeros(size)
+
+        # acceleration is the same for all cars, see OpenRC
+        self._acceleration = math.sqrt(MOTOR_POWER / WEIGHT) / 2 * delta
+        self._delta = delta
+
+        self.sensor_lines = np.zeros((size, SENSOR_POINTS, 2))
+        self._distances = np.full((size, SENSOR_POINTS), float(SENSOR_DISTANCE))
+        self._collided = np.zeros(size, dtype=bool)
+
+        self._sensor_mode = sensor_mode
+        self._march_tolerance = MARCH_TOLERANCE
+        self._march_iterations = MARCH_ITERATIONS
+
+    @property
+    def size(self) -> int:
+        """The number of cars in this batch.
+
+        Returns:
+            int: Number of cars.
+        """
+        return len(self._pos)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """The positions of all cars in centimeters.
+
+        Returns:
+            np.ndarray: Positions of shape (N, 2).
+        """
+        return self._pos
+
+    @property
+    def thetas(self) -> np.ndarray:
+        """The angles of all cars to the coordinate system's x-axis.
+
+        Returns:
+            np.ndarray: Angles of shape (N,).
+        """
+        return self._theta
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """The internal velocities of all cars.
+
+        Returns:
+            np.ndarray: Velocities of shape (N,).
+        """
+        return self._velocity
+
+    @property
+    def turn_angles(self) -> np.ndarray:
+        """The turn angles of all cars in degree.
+
+        Returns:
+            np.ndarray: Turn angles of shape (N,).
+        """
+        return self._turn_angle
+
+    @property
+    def distances(self) -> np.ndarray:
+        """The sensor distances of all cars in centimeters, measured in the last tick.
+
+        Returns:
+            np.ndarray: Distances of shape (N, SENSOR_POINTS).
+        """
+        return self._distances
+
+    @property
+    def collided(self) -> np.ndarray:
+        """Marks the cars which collided with a wall in the last tick.
+
+        Returns:
+            np.ndarray: Boolean mask of shape (N,).
+        """
+        return self._collided
+
+    def set_time_delta(self, delta: float) -> None:
+        """Sets the delta time between each tick, see OpenRC.set_time_delta().
+
+        Args:
+            delta (float): Should be low if the simulation is executed frequently.
+        """
+        self._delta = delta
+        self._acceleration = math.sqrt(MOTOR_POWER / WEIGHT) / 2
+
+    def set_march_parameters(self, tolerance: float, max_iterations: int) -> None:
+        """Configures the sphere tracing sensors, see OpenRC.set_march_parameters().
+
+        Args:
+            tolerance (float): The distance to a wall counted as hit in centimeters.
+            max_iterations (int): The maximum number of steps of a sensor ray.
+        """
+        self._march_tolerance = tolerance
+        self._march_iterations = max_iterations
+
+    def reset(self, indices: np.ndarray, pixel_positions: np.ndarray,
+              thetas: np.ndarray = INITIAL_THETA) -> None:
+        """Places the selected cars at new positions and resets their state.
+
+        Args:
+            indices (np.ndarray): The cars to reset, as indices or a boolean mask.
+            pixel_positions (np.ndarray): The new positions in pixels.
+            thetas (np.ndarray, optional): The new angles. Defaults to INITIAL_THETA.
+        """
+        self._pos[indices] = np.asarray(pixel_positions, dtype=float) * PIXEL_TO_CENTIMETER
+        self._theta[indices] = thetas
+        self._velocity[indices] = 0
+        self._turn_angle[indices] = 0
+        self._distances[indices] = SENSOR_DISTANCE
+        self.sensor_lines[indices] = 0
+        self._collided[indices] = False
+
+    def measure(self, walls: Union[WallSet, List], indices: np.ndarray = None) -> np.ndarray:
+        """Measures the sensors of the selected cars at their current pose without moving
+        them, e.g. to observe cars which were just reset.
+
+        Args:
+            walls (Union[WallSet, List]): The compiled walls of the map.
+            indices (np.ndarray, optional): The cars to measure, as indices or a boolean mask.
+            Defaults to None, which measures all cars.
+
+        Returns:
+            np.ndarray: The measured distances of the selected cars (K, SENSOR_POINTS).
+        """
+        if not isinstance(walls, WallSet):
+            walls = WallSet(walls, indexed=False)
+
+        if indices is None:
+            self._update_sensors(walls)
+            return self._distances.astype(int)
+
+        # the selected cars are measured as a batch of their own
+        selection = OpenRCBatch(np.zeros((len(self._pos[indices]), 2)), self._delta,
+                                self._sensor_mode)
+        selection._pos = self._pos[indices].copy()
+        selection._theta = self._theta[indices].copy()
+        selection.set_march_parameters(self._march_tolerance, self._march_iterations)
+        selection._update_sensors(walls)
+
+        self._distances[indices] = selection._distances
+        self.sensor_lines[indices] = selection.sensor_lines
+        return selection._distances.astype(int)
+
+    def _apply_controls(self, controls: np.ndarray) -> None:
+        """Applies the control input to all cars, in the same order as OpenRC.drive().
+
+        Args:
+            controls (np.ndarray): Control input of shape (N, 5).
+        """
+        accelerate, backwards, brake, left, right = controls.T
+
+        self._velocity += accelerate
+        self._velocity -= backwards
+        self._velocity = np.where(brake, self._velocity / 2, self._velocity)
+        self._turn_angle = np.where(left, np.minimum(
+            TURNING_BOUNDARIES[1], self._turn_angle + 1), self._turn_angle)
+        self._turn_angle = np.where(right, np.maximum(
+            TURNING_BOUNDARIES[0], self._turn_angle - 1), self._turn_angle)
+
+        # roll out if neither gas nor brake is pressed
+        rolling = ~(accelerate | backwards | brake)
+        self._velocity = np.where(rolling, self._velocity / 1.005, self._velocity)
+
+        # straighten the steering if no direction is pressed
+        straight = ~(left | right)
+        turn_angle = self._turn_angle / 2
+        turn_angle = np.where(turn_angle < 0.5, 0, turn_angle)
+        self._turn_angle = np.where(straight, turn_angle, self._turn_angle)
+
+        # if the kinetic energy is 0 (or lower) then the car has stopped
+        energy = (self._velocity / 2) * WEIGHT
+        self._velocity = np.where(energy <= 1, 0, self._velocity)
+
+    def _update_sensors(self, walls: WallSet) -> None:
+        """Measures the sensors of all cars. Cars are processed in chunks, so the broadcast of
+        rays and walls stays within MAX_BROADCAST_SIZE.
+
+        Args:
+            walls (WallSet): The compiled walls.
+        """
+        starts, directions, ends = sensor_rays(self._pos, self._theta, SENSOR_DISTANCE)
+
+        # all rays of all cars are sphere traced at once if the walls have a distance field
+        if self._sensor_mode == OpenRC.SENSOR_SPHERE_TRACE and walls.distance_field is not None:
+            self._distances = march_rays(self._pos, ends, walls.distance_field, SENSOR_DISTANCE,
+                                         self._march_tolerance, self._march_iterations, walls)
+            self.sensor_lines = starts + directions * self._distances[..., None]
+            if PROFILER.enabled:
+                PROFILER.count(profiler.RAYS_CAST, self.size * SENSOR_POINTS)
+            return
+
+        lines, grid = walls.lines, walls.grid
+        if grid is not None:
+            # each car only tests the walls crossed by its own sensors, the candidates are
+            # padded with NaN walls which are never hit
+            cars, indices = grid.query_fans(self._pos, ends)
+            lines = gather_walls(lines, cars, indices, self.size)
+
+        chunk = max(1, MAX_BROADCAST_SIZE // (SENSOR_POINTS * max(1, lines.shape[-3])))
+        for low in range(0, self.size, chunk):
+            high = min(low + chunk, self.size)
+            chunk_lines = lines if grid is None else lines[low:high]
+            self._distances[low:high] = cast_rays(
+                self._pos[low:high], ends[low:high], chunk_lines, SENSOR_DISTANCE)
+
+        self.sensor_lines = starts + directions * self._distances[..., None]
+
+        if PROFILER.enabled:
+            PROFILER.count(profiler.RAYS_CAST, self.size * SENSOR_POINTS)
+            PROFILER.count(profiler.WALLS_TESTED, SENSOR_POINTS * (
+                self.size * len(lines) if grid is None else len(indices)))
+
+    def _update_state(self, walls: WallSet) -> None:
+        """Integrates the movement of all cars and resolves collisions with the walls.
+
+        Args:
+            walls (WallSet): The compiled walls.
+        """
+        profiling = PROFILER.enabled
+        if profiling:
+            now = time.perf_counter()
+
+        # calculate Pro-Ackerman condition of car turning
+        turning_angle = np.radians(180 - 90 - (90 - self._turn_angle))
+        with np.errstate(divide="ignore"):
+            rear_radius = np.where(turning_angle != 0, CHASSIS_SIZE[1] / np.tan(
+                turning_angle) - 0.5 * CHASSIS_SIZE[0], 0)
+
+        # calculate the vehicles angle emplyoing the distance traveled: distance = velocity * time
+        velocity = self._velocity * self._acceleration
+        with np.errstate(divide="ignore", invalid="ignore"):
+            theta = np.where(rear_radius != 0, self._theta + np.tanh(
+                velocity * self._delta) / rear_radius, self._theta)
+        self._theta = theta % (2 * math.pi)
+
+        # calculate the movement and rotation
+        update_pos = np.stack([velocity * np.cos(self._theta) * self._delta,
+                               -velocity * np.sin(self._theta) * self._delta], axis=-1)
+
+        # the direction the car slides along a wall on collision
+        vect = np.stack([np.cos(self._theta), -np.sin(self._theta)], axis=-1)
+        vect = vect / np.sqrt(np.sum(vect * vect, axis=-1))[:, None]
+        motions = vect * (velocity * self._delta)[:, None]
+
+        # the distance field tells in O(1) which cars are far from every wall, only the
+        # others need the exact test
+        radius = CHASSIS_SIZE[1] / 2
+        futures = self._pos + update_pos
+        near = np.ones(self.size, dtype=bool)
+        if walls.distance_field is not None:
+            near = ~walls.distance_field.far_from_walls(futures, radius)
+
+        # each car only tests the walls around its future position, the car is smaller than a
+        # grid cell, so the cells around it hold every wall it can touch
+        segments, grid = walls.segments, walls.grid
+        count = int(np.count_nonzero(near))
+        tested = count * len(segments)
+        if grid is not None and count:
+            cars, indices = grid.query_neighborhood(futures[near])
+            segments = gather_walls(walls.lines, cars, indices, count).reshape(count, -1, 4)
+            tested = len(indices)
+
+        if profiling:
+            now = PROFILER.lap(profiler.STATE, now)
+        positions, collided = futures, np.zeros(self.size, dtype=bool)
+        if near.any():
+            positions[near], collided[near], _ = collide(
+                self._pos[near], update_pos[near], motions[near], segments, radius)
+        self._pos, self._collided = positions, collided
+
+        if profiling:
+            PROFILER.lap(profiler.COLLISION, now)
+            PROFILER.count(profiler.WALLS_TESTED, tested)
+            PROFILER.count(profiler.COLLISIONS, int(np.count_nonzero(self._collided)))
+
+    def step(self, walls: Union[WallSet, List], controls: np.ndarray) -> Tuple:
+        """This method simulates one simulation tick for all cars, see OpenRC.drive().
+
+        Args:
+            walls (Union[WallSet, List]): The compiled walls of the map.
+            controls (np.ndarray): The control input of each car (N, 5) given as accelerate,
+            backwards, brake, left, right.
+
+        Returns:
+            Tuple: Current orientations (N,), positions (N, 2), sensors (N, SENSOR_POINTS, 2)
+            and measured distances (N, SENSOR_POINTS), all in pixels.
+        """
+        profiling = PROFILER.enabled
+        if profiling:
+            start = now = time.perf_counter()
+
+        if not isinstance(walls, WallSet):
+            walls = WallSet(walls, indexed=False)
+
+        controls = np.asarray(controls, dtype=bool).reshape(self.size, 5)
+        self._apply_controls(controls)
+
+        # calculate the rotation and movement
+        if profiling:
+            now = PROFILER.lap(profiler.CONTROLS, now)
+        self._update_sensors(walls)
+        if profiling:
+            PROFILER.lap(profiler.SENSORS, now)
+        self._update_state(walls)
+
+        # transfer back to pixel data
+        positions = (self._pos * CENTIMETER_TO_PIXEL).astype(int)
+        sensor_lines = (self.sensor_lines * CENTIMETER_TO_PIXEL).astype(int)
+        distances = self._distances.astype(int)
+
+        if profiling:
+            PROFILER.tick(time.perf_counter() - start)
+
+        return -self._theta, positions, sensor_lines, distances
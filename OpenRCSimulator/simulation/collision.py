@@ -0,0 +1,83 @@
+"""This module detects collisions of cars with walls for all walls at once using NumPy. If a car
+hits exactly one wall, it slides along that wall, if it hits more than one wall it stops."""
+from typing import Tuple
+
+import numpy as np
+
+
+def point_segment_distances(points: np.ndarray, segments: np.ndarray) -> np.ndarray:
+    """Calculates the distance of every point to every wall.
+
+    Args:
+        points (np.ndarray): Points of shape (..., 2).
+        segments (np.ndarray): Walls of shape (W, 4) given as (start_x, start_y, end_x, end_y),
+        or of shape (..., W, 4) to measure each point to its own walls. NaN walls have a NaN
+        distance.
+
+    Returns:
+        np.ndarray: The distances of shape (..., W).
+    """
+    points = np.asarray(points, dtype=float)[..., None, :]
+    segments = np.asarray(segments, dtype=float)
+    if segments.ndim < 2:
+        segments = segments.reshape(-1, 4)
+
+    starts = segments[..., :2]
+    directions = segments[..., 2:] - starts
+    length_sq = np.sum(directions * directions, axis=-1)
+
+    # project each point onto each wall, walls without length collapse to their start
+    to_point = points - starts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.sum(to_point * directions, axis=-1) / length_sq
+    t = np.clip(np.nan_to_num(t, nan=0.0), 0, 1)
+
+    closest = to_point - t[..., None] * directions
+    return np.sqrt(np.sum(closest * closest, axis=-1))
+
+
+def collide(positions: np.ndarray, updates: np.ndarray, motions: np.ndarray,
+            segments: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Moves cars by their position update unless they come closer than radius to a wall. A car
+    hitting exactly one wall slides along it by the projection of its motion onto the wall, a
+    car hitting more walls keeps its position.
+
+    Args:
+        positions (np.ndarray): The cars' positions of shape (N, 2).
+        updates (np.ndarray): The cars' position updates of shape (N, 2).
+        motions (np.ndarray): The cars' motion vectors used for sliding of shape (N, 2).
+        segments (np.ndarray): Walls of shape (W, 4), or of shape (N, W, 4) to test each car
+        against its own walls, padded with NaN walls which are never hit.
+        radius (float): The distance to a wall at which a car collides.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The new positions (N, 2), a mask of cars
+        which collided (N,) and the number of walls each car hit (N,).
+    """
+    positions = np.asarray(positions, dtype=float)
+    segments = np.asarray(segments, dtype=float)
+    if segments.ndim < 2:
+        segments = segments.reshape(-1, 4)
+
+    hits = point_segment_distances(positions + updates, segments) < radius
+    hit_count = np.count_nonzero(hits, axis=-1)
+    collided = hit_count > 0
+
+    moved = np.where(collided[:, None], positions, positions + updates)
+
+    # cars hitting a single wall slide along the wall's direction
+    sliding = np.flatnonzero(hit_count == 1)
+    if len(sliding):
+        hit_walls = np.argmax(hits[sliding], axis=-1)
+        walls = segments[sliding, hit_walls] if segments.ndim > 2 else segments[hit_walls]
+        directions = walls[:, 2:] - walls[:, :2]
+        norms = np.sqrt(np.sum(directions * directions, axis=-1))
+        valid = norms > 0
+
+        units = directions[valid] / norms[valid, None]
+        motion = motions[sliding[valid]]
+        projection = units * np.sum(motion * units, axis=-1)[:, None] / \
+            np.sum(units * units, axis=-1)[:, None]
+        moved[sliding[valid]] += projection
+
+    return moved, collided, hit_count
@@ -0,0 +1,320 @@
+"""This module compiles the YAML maps written by the editor into a compact binary file. The file
+holds a small header followed by the raw wall arrays and the spatial index, it is memory mapped
+on load, so nothing has to be parsed or compiled again. The MapLoader keeps the loaded maps of a
+process, so the GUI and the simulation share the same compiled map."""
+from typing import Dict, List, Tuple
+import json
+import os
+import struct
+import yaml
+
+import numpy as np
+
+from OpenRCSimulator.state import get_data_folder, MAPS_FOLDER
+from OpenRCSimulator.simulation.distance_field import load_distance_field
+from OpenRCSimulator.simulation.wall import WallSet
+
+
+# identifies a compiled map and the version of its layout, other versions are compiled again
+MAGIC = b"ORCMAP\x00\x01"
+
+# the compiled map is stored next to the YAML file with this extension
+COMPILED_EXTENSION = ".orcmap"
+
+# arrays start at multiples of this amount of bytes, which keeps memory mapped views aligned
+ALIGNMENT = 64
+
+
+class CompiledMap:
+    """The CompiledMap holds everything needed to simulate or display a map: the walls in
+    pixels, the car's spawn pose, the window size and the compiled WallSet with its spatial
+    index. The map is immutable, its arrays are read-only and loaded maps are views of the
+    memory mapped file.
+    """
+
+    def __init__(self, lines: np.ndarray, car: np.ndarray, map_size: List[int],
+                 wall_set: WallSet) -> None:
+        """Creates the map from compiled data.
+
+        Args:
+            lines (np.ndarray): The walls of shape (W, 4) in pixels.
+            car (np.ndarray): The car's spawn pose (x, y, direction) in pixels and radians, the
+            direction is the displayed angle returned by OpenRC.drive().
+            map_size (List[int]): The window's width and height.
+            wall_set (WallSet): The compiled walls.
+        """
+        self._lines = lines
+        self._car = car
+        self._map_size = tuple(map_size)
+        self._wall_set = wall_set
+
+        self._lines.flags.writeable = False
+        self._car.flags.writeable = False
+
+    @classmethod
+    def from_dict(cls, dict_file: Dict) -> "CompiledMap":
+        """Compiles a map given in the YAML structure written by the editor.
+
+        Args:
+            dict_file (Dict): The map with "app", "car" and "walls" entries.
+
+        Returns:
+            CompiledMap: The compiled map.
+        """
+        walls_dict: dict = dict_file.get("walls", None) or {}
+        lines = np.array([[wall["start_x"], wall["start_y"], wall["end_x"], wall["end_y"]]
+                          for wall in walls_dict.values()], dtype=float).reshape(-1, 4)
+
+        car_dict = dict_file["car"]
+        car = np.array([car_dict["x"], car_dict["y"], car_dict.get("direction", 0)],
+                       dtype=float)
+
+        size_dict = dict_file["app"]
+        map_size = [int(size_dict["width"]), int(size_dict["height"])]
+
+        # the spatial index is built right away, so it is stored with the walls
+        wall_set = WallSet(lines, pixel=True)
+        _ = wall_set.grid
+        return cls(lines, car, map_size, wall_set)
+
+    @property
+    def lines(self):
+        return self._lines
+
+    @property
+    def car(self):
+        return self._car
+
+    @property
+    def map_size(self):
+        return list(self._map_size)
+
+    @property
+    def wall_set(self):
+        return self._wall_set
+
+    def to_dict(self) -> Dict:
+        """Converts the map back into the YAML structure, e.g. to load it into the GUI.
+
+        Returns:
+            Dict: The map with "app", "car" and "walls" entries.
+        """
+        def number(value: float):
+            return int(value) if float(value).is_integer() else float(value)
+
+        walls = {}
+        for i, (sx, sy, ex, ey) in enumerate(self._lines):
+            walls[f"sprite_wall_{i + 1}"] = {"start_x": number(sx), "start_y": number(sy),
+                                             "end_x": number(ex), "end_y": number(ey)}
+
+        x, y, direction = self._car
+        return {
+            "app": {"width": self._map_size[0], "height": self._map_size[1]},
+            "car": {"x": number(x), "y": number(y), "direction": number(direction)},
+            "walls": walls
+        }
+
+    def save(self, path: str) -> None:
+        """Writes the map into a compiled file. The file is replaced at once, so readers never
+        see a partially written map.
+
+        Args:
+            path (str): The compiled file's path.
+        """
+        arrays = {"lines": self._lines, "car": self._car}
+        for name, array in self._wall_set.arrays().items():
+            # distance fields depend on their resolution and are cached on their own
+            if not name.startswith("field_"):
+                arrays[f"walls_{name}"] = array
+
+        # the header describes where each array is located within the file
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            arrays[name] = array
+            layout[name] = [offset, list(array.shape), array.dtype.str]
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        header = json.dumps({"map_size": list(self._map_size), "arrays": layout})
+        header = header.encode("UTF-8")
+        start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack("<Q", len(header)))
+            file.write(header)
+            for name, array in arrays.items():
+                file.seek(start + layout[name][0])
+                file.write(array.tobytes())
+            file.truncate(start + offset)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledMap":
+        """Memory maps a compiled file, the arrays are read from disk on first access.
+
+        Args:
+            path (str): The compiled file's path.
+
+        Raises:
+            ValueError: If the file is not a compiled map of this version.
+
+        Returns:
+            CompiledMap: The loaded map.
+        """
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled map of this version")
+            length, = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(length).decode("UTF-8"))
+        start = -(-(len(MAGIC) + 8 + length) // ALIGNMENT) * ALIGNMENT
+
+        memory = np.memmap(path, dtype=np.uint8, mode="r")
+        arrays = {}
+        for name, (offset, shape, dtype) in header["arrays"].items():
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape))
+            if count == 0:
+                arrays[name] = np.empty(shape, dtype)
+                continue
+            arrays[name] = np.frombuffer(memory, dtype, count, start + offset).reshape(shape)
+
+        wall_set = WallSet.from_arrays({name[6:]: array for name, array in arrays.items()
+                                        if name.startswith("walls_")})
+        return cls(arrays["lines"], arrays["car"], header["map_size"], wall_set)
+
+
+def compiled_path(path: str) -> str:
+    """The path of the compiled file belonging to a YAML map.
+
+    Args:
+        path (str): The YAML map's path.
+
+    Returns:
+        str: The compiled file's path.
+    """
+    return f"{os.path.splitext(path)[0]}{COMPILED_EXTENSION}"
+
+
+def compile_map(path: str, dict_file: Dict = None) -> CompiledMap:
+    """Compiles a YAML map and stores the compiled file next to it.
+
+    Args:
+        path (str): The YAML map's path.
+        dict_file (Dict, optional): The map's content if it is already at hand, e.g. in the
+        editor. Defaults to None, which reads the YAML file.
+
+    Returns:
+        CompiledMap: The compiled map.
+    """
+    if dict_file is None:
+        with open(path, "r", encoding="UTF-8") as file:
+            dict_file = yaml.load(file, Loader=yaml.FullLoader)
+
+    compiled = CompiledMap.from_dict(dict_file)
+    try:
+        compiled.save(compiled_path(path))
+    except OSError:
+        # the map works without its compiled file, e.g. for read-only map folders
+        pass
+    return compiled
+
+
+def load_map(path: str) -> CompiledMap:
+    """Loads a map, preferring its compiled file if it is at least as fresh as the YAML file.
+    Outdated, missing or broken compiled files are compiled again.
+
+    Args:
+        path (str): The YAML map's path.
+
+    Returns:
+        CompiledMap: The map.
+    """
+    compiled = compiled_path(path)
+    if os.path.exists(compiled) and \
+            (not os.path.exists(path) or os.path.getmtime(compiled) >= os.path.getmtime(path)):
+        try:
+            return CompiledMap.load(compiled)
+        except (OSError, KeyError, ValueError):
+            # a broken compiled file is simply compiled again
+            pass
+
+    return compile_map(path)
+
+
+class MapLoader:
+    """The MapLoader loads each map once per process and hands out the same immutable
+    CompiledMap on every further request. Maps are keyed by name and the YAML file's
+    modification time, so an edited map is loaded again.
+    """
+
+    def __init__(self) -> None:
+        self._maps: Dict[str, Tuple[float, CompiledMap]] = {}
+        self._wall_sets: Dict[Tuple[str, float], WallSet] = {}
+
+    @staticmethod
+    def path(name: str) -> str:
+        """The YAML file of a map.
+
+        Args:
+            name (str): The map's name.
+
+        Returns:
+            str: The map's path in the app's MAPS_FOLDER.
+        """
+        return f"{get_data_folder(MAPS_FOLDER)}{name}.yaml"
+
+    def get(self, name: str) -> CompiledMap:
+        """Returns a map, loading it only if it was not loaded before or changed since.
+
+        Args:
+            name (str): The map's name.
+
+        Returns:
+            CompiledMap: The map.
+        """
+        path = self.path(name)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+        cached = self._maps.get(name)
+        if cached is None or cached[0] != mtime:
+            self._maps[name] = (mtime, load_map(path))
+            self._wall_sets = {key: walls for key, walls in self._wall_sets.items()
+                               if key[0] != name}
+        return self._maps[name][1]
+
+    def get_wall_set(self, name: str, field_resolution: float = None) -> WallSet:
+        """Returns the compiled walls of a map, optionally with a distance field.
+
+        Args:
+            name (str): The map's name.
+            field_resolution (float, optional): The resolution of the distance field in
+            centimeters. Defaults to None, which returns the walls without a field.
+
+        Returns:
+            WallSet: The walls, shared by all callers asking for the same resolution.
+        """
+        compiled = self.get(name)
+        if not field_resolution:
+            return compiled.wall_set
+
+        key = (name, field_resolution)
+        if key not in self._wall_sets:
+            # the field is set on a new view of the shared arrays, the loaded map stays as is
+            walls = WallSet.from_arrays(compiled.wall_set.arrays())
+            walls.set_distance_field(load_distance_field(
+                self.path(name), walls.segments, field_resolution))
+            self._wall_sets[key] = walls
+        return self._wall_sets[key]
+
+    def clear(self) -> None:
+        """Forgets all loaded maps.
+        """
+        self._maps = {}
+        self._wall_sets = {}
+
+
+# the maps loaded by this process
+MAP_LOADER = MapLoader()
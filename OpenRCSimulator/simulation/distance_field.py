@@ -0,0 +1,204 @@
+"""This module rasterizes the distance to the closest wall of a map into a regular grid. Looking
+up the field is O(1) regardless of the number of walls, so collision checks only need the exact
+segment test if the field says the car is close to a wall."""
+from typing import Dict
+import hashlib
+import math
+import os
+import zipfile
+
+import numpy as np
+
+from OpenRCSimulator.simulation.collision import point_segment_distances
+
+
+# distance between two samples of the field in centimeters
+RESOLUTION = 5
+
+# the field covers this border around the walls (in centimeters), larger distances are stored as
+# this value, which limits the step size of sphere traced sensors
+PADDING = 200
+
+
+class DistanceField:
+    """The DistanceField stores the distance to the closest wall for the samples of a regular
+    grid. The field covers all walls with a border of padding, points outside of it are at least
+    padding away from every wall and larger distances are stored as padding. Walls are open
+    segments without an inside, so the distance is unsigned.
+    """
+
+    def __init__(self, segments: np.ndarray, resolution: float = RESOLUTION,
+                 padding: float = PADDING) -> None:
+        """Rasterizes the field.
+
+        Args:
+            segments (np.ndarray): The walls of shape (W, 4) in centimeters.
+            resolution (float, optional): The distance between two samples. Defaults to
+            RESOLUTION.
+            padding (float, optional): The border around the walls covered by the field.
+            Defaults to PADDING.
+        """
+        segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+        points = segments.reshape(-1, 2)
+        low = points.min(axis=0) if len(points) else np.zeros(2)
+        high = points.max(axis=0) if len(points) else np.zeros(2)
+
+        self._resolution = float(resolution)
+        self._padding = float(padding)
+        self._origin = low - padding
+        shape = np.ceil((high + padding - self._origin) / resolution).astype(int) + 1
+
+        # each wall only changes the samples within padding of it, distances beyond padding
+        # are stored as padding which keeps the field a lower bound
+        values = np.full(shape, self._padding)
+        for segment in segments:
+            low = np.floor((np.minimum(segment[:2], segment[2:]) - padding - self._origin) /
+                           resolution).astype(int).clip(0)
+            high = np.ceil((np.maximum(segment[:2], segment[2:]) + padding - self._origin) /
+                           resolution).astype(int).clip(max=shape - 1)
+
+            grid_x, grid_y = np.meshgrid(np.arange(low[0], high[0] + 1),
+                                         np.arange(low[1], high[1] + 1), indexing="ij")
+            samples = self._origin + np.stack([grid_x, grid_y], axis=-1) * resolution
+            distances = point_segment_distances(samples, segment[None])[..., 0]
+
+            window = values[low[0]:high[0] + 1, low[1]:high[1] + 1]
+            np.minimum(window, distances, out=window)
+
+        self._values = values
+        self._values.flags.writeable = False
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "DistanceField":
+        """Restores a field from the arrays returned by arrays() without rasterizing it again.
+
+        Args:
+            arrays (Dict[str, np.ndarray]): The field's arrays.
+
+        Returns:
+            DistanceField: The restored field.
+        """
+        field = cls.__new__(cls)
+        field._resolution = float(arrays["resolution"][0])
+        field._padding = float(arrays["padding"][0])
+        field._origin = np.array(arrays["origin"])
+        field._values = arrays["values"]
+        field._values.flags.writeable = False
+        return field
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The arrays describing this field, e.g. to cache it on disk or to share it.
+
+        Returns:
+            Dict[str, np.ndarray]: The field's arrays by name.
+        """
+        return {
+            "resolution": np.array([self._resolution]),
+            "padding": np.array([self._padding]),
+            "origin": self._origin,
+            "values": self._values
+        }
+
+    @property
+    def resolution(self) -> float:
+        return self._resolution
+
+    @property
+    def error(self) -> float:
+        """The maximum overestimation of a sampled distance. The distance changes at most as
+        fast as the position, so a bilinear sample exceeds the true distance by at most the
+        weighted distance to the cell's corners, which is largest in the cell's center.
+
+        Returns:
+            float: The error bound in centimeters.
+        """
+        return self._resolution * math.sqrt(2) / 2
+
+    def sample(self, points: np.ndarray) -> np.ndarray:
+        """Looks up the distance to the closest wall with bilinear interpolation.
+
+        Args:
+            points (np.ndarray): Points of shape (..., 2) in centimeters.
+
+        Returns:
+            np.ndarray: The distances of shape (...). Points outside of the field get the
+            field's padding, which is a lower bound of their distance.
+        """
+        cells = (np.asarray(points, dtype=float) - self._origin) / self._resolution
+        limit = np.array(self._values.shape) - 1
+        inside = np.all((cells >= 0) & (cells <= limit), axis=-1)
+
+        # the lower corner of the cell, the upper corner is clamped by the fractions below
+        low = np.minimum(np.floor(cells), limit - 1).clip(0)
+        fraction = (cells - low).clip(0, 1)
+        x, y = fraction[..., 0], fraction[..., 1]
+        low = low.astype(int)
+
+        # the four corners are read from the flat field
+        height = self._values.shape[1]
+        index = low[..., 0] * height + low[..., 1]
+        values = self._values.ravel()
+        distances = (values.take(index) * (1 - x) + values.take(index + height) * x) * (1 - y) + \
+            (values.take(index + 1) * (1 - x) + values.take(index + height + 1) * x) * y
+        return np.where(inside, distances, self._padding)
+
+    def far_from_walls(self, points: np.ndarray, distance: float) -> np.ndarray:
+        """Marks points which are certainly further away from every wall than a distance.
+
+        Args:
+            points (np.ndarray): Points of shape (..., 2) in centimeters.
+            distance (float): The distance to check.
+
+        Returns:
+            np.ndarray: A boolean mask of shape (...).
+        """
+        return self.sample(points) >= distance + self.error
+
+
+def load_distance_field(path: str, segments: np.ndarray, resolution: float = RESOLUTION,
+                        padding: float = PADDING) -> DistanceField:
+    """Loads a field cached on disk, or rasterizes and caches it if the cache is missing or
+    outdated. The cache is tied to the walls it was built from and the map file's modification
+    time, so changing the map invalidates it.
+
+    Args:
+        path (str): The map's file, the cache is stored next to it.
+        segments (np.ndarray): The map's walls of shape (W, 4) in centimeters.
+        resolution (float, optional): The distance between two samples. Defaults to
+        RESOLUTION.
+        padding (float, optional): The border around the walls. Defaults to PADDING.
+
+    Returns:
+        DistanceField: The field.
+    """
+    segments = np.ascontiguousarray(segments, dtype=float)
+    digest = hashlib.sha1(segments.tobytes())
+    digest.update(np.array([resolution, padding], dtype=float).tobytes())
+    digest = digest.hexdigest()
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+    cache = f"{os.path.splitext(path)[0]}.sdf.npz"
+    if os.path.exists(cache):
+        try:
+            with np.load(cache) as data:
+                if str(data["digest"]) == digest and float(data["mtime"]) == mtime:
+                    return DistanceField.from_arrays(
+                        {name: data[name] for name in data.files})
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # a broken cache is simply built again
+            pass
+
+    # the cache is replaced at once, so a crash or another process building the same field
+    # never leaves a partially written cache behind
+    field = DistanceField(segments, resolution, padding)
+    temporary = f"{cache}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            np.savez(file, digest=digest, mtime=mtime, **field.arrays())
+        os.replace(temporary, cache)
+    except OSError:
+        # the field works without a cache, e.g. for read-only map folders
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return field
@@ -0,0 +1,178 @@
+"""This module wraps the simulation into environments following the OpenAI Gym interface
+(reset() and step(action)) without depending on gym. The vectorized environment steps many cars
+with one call, so there is no Python overhead per environment."""
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from OpenRCSimulator.graphics import PIXEL_TO_CENTIMETER
+from OpenRCSimulator.simulation import SENSOR_POINTS
+from OpenRCSimulator.simulation.batch import OpenRCBatch
+from OpenRCSimulator.simulation.map import Map
+from OpenRCSimulator.simulation.openrc import OpenRC
+
+
+# an action is given as accelerate, backwards, brake, left, right
+ACTION_SIZE = 5
+
+# an episode ends after this amount of ticks if the car did not collide before
+MAX_EPISODE_STEPS = 1_000
+
+
+class OpenRCEnv:
+    """The OpenRCEnv drives a single car on a map. An observation is the vector of measured
+    sensor distances, the reward is the distance driven in centimeters and an episode is done
+    when the car hits a wall or MAX_EPISODE_STEPS are reached.
+    """
+
+    observation_shape = (SENSOR_POINTS, )
+    action_shape = (ACTION_SIZE, )
+
+    def __init__(self, map_name: Union[str, Map], delta: float = 0.1,
+                 max_steps: int = MAX_EPISODE_STEPS,
+                 sensor_mode: int = OpenRC.SENSOR_NUMPY) -> None:
+        """Loads the map the car drives on.
+
+        Args:
+            map_name (Union[str, Map]): The map's name or an already loaded (or attached) map.
+            delta (float, optional): The simulated time between two ticks. Defaults to 0.1.
+            max_steps (int, optional): The length of an episode. Defaults to MAX_EPISODE_STEPS.
+            sensor_mode (int, optional): How the sensors are measured, see OpenRC. Defaults to
+            OpenRC.SENSOR_NUMPY.
+        """
+        self._map = Map(map_name) if isinstance(map_name, str) else map_name
+        self._walls = self._map.wall_set
+        self._start = self._map.car.position
+        self._start_theta = self._map.car.theta
+
+        self._delta = delta
+        self._max_steps = max_steps
+        self._sensor_mode = sensor_mode
+        self._car = None
+        self._steps = 0
+
+    def reset(self) -> np.ndarray:
+        """Places a new car at the map's starting pose.
+
+        Returns:
+            np.ndarray: The first observation, measured at the starting pose.
+        """
+        self._car = OpenRC(self._start.copy(), self._delta, self._sensor_mode)
+        self._car.set_theta(self._start_theta)
+        self._steps = 0
+
+        return np.asarray(self._car.measure(self._walls), dtype=float)
+
+    def step(self, action: np.ndarray) -> Tuple[np.ndarray, float, bool, Dict]:
+        """Simulates one tick.
+
+        Args:
+            action (np.ndarray): The control input of shape (5,).
+
+        Returns:
+            Tuple[np.ndarray, float, bool, Dict]: The observation, the reward, if the episode
+            is done and info about the collision and position.
+        """
+        before = self._car.position * PIXEL_TO_CENTIMETER
+        action = np.asarray(action, dtype=bool).reshape(ACTION_SIZE)
+        _, _, _, _, distances = self._car.drive(self._walls, action)
+        self._steps += 1
+
+        moved = self._car.position * PIXEL_TO_CENTIMETER - before
+        reward = float(np.sqrt(np.sum(moved * moved)))
+
+        collided = self._car.collided
+        done = collided or self._steps >= self._max_steps
+        info = {"collided": collided, "position": self._car.position}
+
+        return np.asarray(distances, dtype=float), reward, done, info
+
+
+class VectorOpenRCEnv:
+    """The VectorOpenRCEnv drives K cars on the same map at once, based on the OpenRCBatch. All
+    results are stacked into arrays with the environments in the first dimension. Environments
+    which are done are reset automatically, their last observation is kept in the info as
+    "final_observation".
+    """
+
+    def __init__(self, map_name: Union[str, Map], num_envs: int, delta: float = 0.1,
+                 max_steps: int = MAX_EPISODE_STEPS,
+                 sensor_mode: int = OpenRC.SENSOR_NUMPY) -> None:
+        """Loads the map the cars drive on.
+
+        Args:
+            map_name (Union[str, Map]): The map's name or an already loaded (or attached) map.
+            num_envs (int): The number of environments K.
+            delta (float, optional): The simulated time between two ticks. Defaults to 0.1.
+            max_steps (int, optional): The length of an episode. Defaults to MAX_EPISODE_STEPS.
+            sensor_mode (int, optional): How the sensors are measured, see OpenRC. Defaults to
+            OpenRC.SENSOR_NUMPY.
+        """
+        self._map = Map(map_name) if isinstance(map_name, str) else map_name
+        self._walls = self._map.wall_set
+        self._start = self._map.car.position
+        self._start_theta = self._map.car.theta
+
+        self._num_envs = num_envs
+        self._delta = delta
+        self._max_steps = max_steps
+        self._sensor_mode = sensor_mode
+        self._batch = None
+        self._steps = np.zeros(num_envs, dtype=int)
+
+        self.observation_shape = (num_envs, SENSOR_POINTS)
+        self.action_shape = (num_envs, ACTION_SIZE)
+
+    @property
+    def num_envs(self) -> int:
+        """The number of environments stepped at once.
+
+        Returns:
+            int: K.
+        """
+        return self._num_envs
+
+    def reset(self) -> np.ndarray:
+        """Places new cars at the map's starting pose.
+
+        Returns:
+            np.ndarray: The first observations of shape (K, SENSOR_POINTS), measured at the
+            starting pose.
+        """
+        starts = np.repeat(self._start[None], self._num_envs, axis=0)
+        self._batch = OpenRCBatch(starts, self._delta, self._sensor_mode)
+        self._batch.reset(np.arange(self._num_envs), starts, self._start_theta)
+        self._steps[:] = 0
+
+        return self._batch.measure(self._walls).astype(float)
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict]:
+        """Simulates one tick in all environments.
+
+        Args:
+            actions (np.ndarray): The control inputs of shape (K, 5).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, Dict]: The observations (K, SENSOR_POINTS),
+            the rewards (K,), the done flags (K,) and info about collisions and positions.
+        """
+        before = self._batch.positions.copy()
+        _, positions, _, distances = self._batch.step(self._walls, actions)
+        self._steps += 1
+
+        moved = self._batch.positions - before
+        rewards = np.sqrt(np.sum(moved * moved, axis=-1))
+
+        collided = self._batch.collided.copy()
+        dones = collided | (self._steps >= self._max_steps)
+        observations = distances.astype(float)
+        info = {"collided": collided, "position": positions}
+
+        # start a new episode in every environment which is done
+        if dones.any():
+            info["final_observation"] = observations.copy()
+            self._batch.reset(dones, self._start, self._start_theta)
+            self._steps[dones] = 0
+            observations[dones] = self._batch.measure(self._walls, dones)
+
+        return observations, rewards, dones, info
@@ -0,0 +1,363 @@
+"""This module provides a uniform grid over the walls of a map, so sensor and collision queries
+only need to test the walls close to the car instead of every wall on the map."""
+import math
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+# edge length of a grid cell in centimeters
+CELL_SIZE = 50
+
+
+class WallGrid:
+    """The WallGrid buckets walls into the cells of a uniform grid. It is built once per map,
+    afterwards rays only visit the cells they cross and boxes only the cells they overlap.
+    """
+
+    def __init__(self, lines: np.ndarray, cell_size: float = CELL_SIZE) -> None:
+        """Builds the grid from walls given as start and end point.
+
+        Args:
+            lines (np.ndarray): The walls of shape (W, 2, 2) in centimeters.
+            cell_size (float, optional): The edge length of a cell. Defaults to CELL_SIZE.
+        """
+        self._lines = np.asarray(lines, dtype=float).reshape(-1, 2, 2)
+        self._cell_size = float(cell_size)
+
+        # the grid covers all walls with a border of one cell
+        points = self._lines.reshape(-1, 2)
+        low = points.min(axis=0) if len(points) else np.zeros(2)
+        high = points.max(axis=0) if len(points) else np.zeros(2)
+        self._origin = low - self._cell_size
+        self._shape = (np.floor((high - self._origin) / self._cell_size) + 2).astype(int)
+
+        self._cell_start, self._cell_walls = self._build()
+
+    @classmethod
+    def from_arrays(cls, lines: np.ndarray, arrays: Dict[str, np.ndarray]) -> "WallGrid":
+        """Restores a grid from the arrays returned by arrays() without building it again.
+        The arrays are used as they are, e.g. as views of shared memory.
+
+        Args:
+            lines (np.ndarray): The walls of shape (W, 2, 2) in centimeters.
+            arrays (Dict[str, np.ndarray]): The grid's arrays.
+
+        Returns:
+            WallGrid: The restored grid.
+        """
+        grid = cls.__new__(cls)
+        grid._lines = lines
+        grid._cell_size = float(arrays["cell_size"][0])
+        grid._origin = np.array(arrays["origin"])
+        grid._shape = np.array(arrays["shape"])
+        grid._cell_start = arrays["cell_start"]
+        grid._cell_walls = arrays["cell_walls"]
+        return grid
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The arrays describing this grid, e.g. to share the grid between processes.
+
+        Returns:
+            Dict[str, np.ndarray]: The grid's arrays by name.
+        """
+        return {
+            "cell_size": np.array([self._cell_size]),
+            "origin": self._origin,
+            "shape": self._shape,
+            "cell_start": self._cell_start,
+            "cell_walls": self._cell_walls
+        }
+
+    @property
+    def lines(self) -> np.ndarray:
+        """The walls this grid was built from.
+
+        Returns:
+            np.ndarray: Walls of shape (W, 2, 2) in centimeters.
+        """
+        return self._lines
+
+    @property
+    def cell_size(self) -> float:
+        """The edge length of a cell in centimeters.
+
+        Returns:
+            float: The cell size.
+        """
+        return self._cell_size
+
+    def _build(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Assigns each wall to every cell it touches. A cell is touched if the wall is closer
+        to the cell's center than half of the cell's diagonal.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Offsets into the wall indices for every cell and the
+            wall indices sorted by cell.
+        """
+        cells, walls = [], []
+        half_diagonal = self._cell_size * math.sqrt(2) / 2 + 1e-9
+        for index, (start, end) in enumerate(self._lines):
+            low = self._cell_of(np.minimum(start, end))
+            high = self._cell_of(np.maximum(start, end))
+
+            # candidate cells of the wall's bounding box
+            grid_x, grid_y = np.meshgrid(np.arange(low[0], high[0] + 1),
+                                         np.arange(low[1], high[1] + 1), indexing="ij")
+            grid_x, grid_y = grid_x.ravel(), grid_y.ravel()
+            centers = self._origin + (np.stack([grid_x, grid_y], axis=-1) + 0.5) * \
+                self._cell_size
+
+            # keep only the cells the wall passes through
+            touched = _point_segment_distance(centers, start, end) <= half_diagonal
+            cells.append(grid_x[touched] * self._shape[1] + grid_y[touched])
+            walls.append(np.full(np.count_nonzero(touched), index))
+
+        cells = np.concatenate(cells) if cells else np.zeros(0, dtype=int)
+        walls = np.concatenate(walls) if walls else np.zeros(0, dtype=int)
+
+        order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self._shape[0] * self._shape[1])
+        cell_start = np.concatenate([[0], np.cumsum(counts)])
+        return cell_start, walls[order]
+
+    def _cell_of(self, point: np.ndarray) -> np.ndarray:
+        """Returns the cell a point lies in, clamped to the grid.
+
+        Args:
+            point (np.ndarray): Points of shape (..., 2).
+
+        Returns:
+            np.ndarray: The cell coordinates of shape (..., 2).
+        """
+        cell = np.floor((point - self._origin) / self._cell_size).astype(int)
+        return np.clip(cell, 0, self._shape - 1)
+
+    def _walls_in(self, cells: np.ndarray) -> np.ndarray:
+        """Collects the walls registered in the given cells.
+
+        Args:
+            cells (np.ndarray): Flat cell indices.
+
+        Returns:
+            np.ndarray: Sorted unique wall indices.
+        """
+        if len(cells) == 0:
+            return np.zeros(0, dtype=int)
+
+        starts = self._cell_start[cells]
+        ends = self._cell_start[cells + 1]
+        if len(cells) == 1:
+            return _unique(self._cell_walls[starts[0]:ends[0]])
+
+        walls = [self._cell_walls[s:e] for s, e in zip(starts, ends) if e > s]
+        if not walls:
+            return np.zeros(0, dtype=int)
+        return _unique(np.concatenate(walls))
+
+    def query_box(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Returns the walls which may lie inside of an axis aligned box.
+
+        Args:
+            low (np.ndarray): The box's minimum corner in centimeters.
+            high (np.ndarray): The box's maximum corner in centimeters.
+
+        Returns:
+            np.ndarray: Sorted wall indices.
+        """
+        low, high = np.asarray(low, dtype=float), np.asarray(high, dtype=float)
+        if np.any(high < self._origin) or \
+                np.any(low >= self._origin + self._shape * self._cell_size):
+            return np.zeros(0, dtype=int)
+
+        (x1, y1), (x2, y2) = self._cell_of(low), self._cell_of(high)
+        cells = np.arange(x1, x2 + 1)[:, None] * self._shape[1] + np.arange(y1, y2 + 1)
+        return self._walls_in(cells.ravel())
+
+    def query_ray(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Returns the walls which may be hit by a ray, walking only the cells the ray crosses
+        (Amanatides & Woo DDA traversal).
+
+        Args:
+            start (np.ndarray): The ray's start in centimeters.
+            end (np.ndarray): The ray's end in centimeters.
+
+        Returns:
+            np.ndarray: Sorted wall indices.
+        """
+        start = (np.asarray(start, dtype=float) - self._origin) / self._cell_size
+        end = (np.asarray(end, dtype=float) - self._origin) / self._cell_size
+        direction = end - start
+
+        x, y = int(math.floor(start[0])), int(math.floor(start[1]))
+        end_x, end_y = int(math.floor(end[0])), int(math.floor(end[1]))
+        step_x = 1 if direction[0] > 0 else -1
+        step_y = 1 if direction[1] > 0 else -1
+
+        # the ray parameter at which the next vertical/horizontal cell border is crossed
+        max_x, delta_x = math.inf, math.inf
+        if direction[0] != 0:
+            max_x = (x + (step_x > 0) - start[0]) / direction[0]
+            delta_x = abs(1 / direction[0])
+        max_y, delta_y = math.inf, math.inf
+        if direction[1] != 0:
+            max_y = (y + (step_y > 0) - start[1]) / direction[1]
+            delta_y = abs(1 / direction[1])
+
+        width, height = self._shape
+        cells = []
+        for _ in range(abs(end_x - x) + abs(end_y - y) + 1):
+            if 0 <= x < width and 0 <= y < height:
+                cells.append(x * height + y)
+
+            if max_x < max_y:
+                x += step_x
+                max_x += delta_x
+            else:
+                y += step_y
+                max_y += delta_y
+
+        return self._walls_in(np.array(cells, dtype=int))
+
+    def query_rays(self, start: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Returns the walls which may be hit by any ray of a fan of rays sharing the same
+        start. All rays are traversed at once.
+
+        Args:
+            start (np.ndarray): The rays' start in centimeters (2,).
+            ends (np.ndarray): The rays' ends in centimeters (R, 2).
+
+        Returns:
+            np.ndarray: Sorted wall indices.
+        """
+        _, walls = self.query_fans(np.asarray(start)[None], np.asarray(ends)[None])
+        return walls
+
+    def query_fans(self, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the walls which may be hit by the rays of several fans, e.g. the sensors of
+        many cars. The rays of all fans are traversed at once.
+
+        Args:
+            starts (np.ndarray): The start of each fan in centimeters (F, 2).
+            ends (np.ndarray): The rays' ends of each fan in centimeters (F, R, 2).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Pairs of fan and wall index, sorted by fan and wall.
+        """
+        starts = (np.asarray(starts, dtype=float).reshape(-1, 2) - self._origin) / \
+            self._cell_size
+        ends = (np.asarray(ends, dtype=float) - self._origin) / self._cell_size
+        fans, rays = ends.shape[0], ends.shape[1]
+        starts = np.repeat(starts, rays, axis=0)
+        ends = ends.reshape(-1, 2)
+        direction = ends - starts
+
+        cell = np.floor(starts).astype(int)
+        steps = np.where(direction > 0, 1, -1)
+        remaining = np.sum(np.abs(np.floor(ends).astype(int) - cell), axis=-1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            border = cell + (steps > 0) - starts
+            max_t = np.where(direction != 0, border / direction, np.inf)
+            delta_t = np.where(direction != 0, np.abs(1 / direction), np.inf)
+
+        # collect (fan, cell) keys of every cell visited by a ray
+        visited = []
+        rows = np.arange(len(ends))
+        fan_of_ray = rows // max(1, rays)
+        cell_count = self._shape[0] * self._shape[1]
+        for i in range(int(remaining.max(initial=0)) + 1):
+            inside = (remaining >= i) & np.all((cell >= 0) & (cell < self._shape), axis=-1)
+            visited.append(fan_of_ray[inside] * cell_count +
+                           cell[inside, 0] * self._shape[1] + cell[inside, 1])
+
+            # advance each ray along the axis with the closer cell border
+            axis = (max_t[:, 1] <= max_t[:, 0]).astype(int)
+            cell[rows, axis] += steps[rows, axis]
+            max_t[rows, axis] += delta_t[rows, axis]
+
+        keys = np.concatenate(visited) if visited else np.zeros(0, dtype=int)
+        return self._owned_walls(keys // cell_count, keys % cell_count)
+
+    def query_neighborhood(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the walls registered in the 3x3 cells around each point. This includes every
+        wall closer to the point than the cell size.
+
+        Args:
+            points (np.ndarray): The points in centimeters (P, 2).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Pairs of point and wall index, sorted by point and
+            wall.
+        """
+        cells = np.floor((np.asarray(points, dtype=float).reshape(-1, 2) - self._origin) /
+                         self._cell_size).astype(int)
+        offsets = np.stack(np.meshgrid([-1, 0, 1], [-1, 0, 1], indexing="ij"), -1).reshape(-1, 2)
+        cells = cells[:, None] + offsets
+
+        owners = np.repeat(np.arange(len(cells)), len(offsets)).reshape(cells.shape[:2])
+        inside = np.all((cells >= 0) & (cells < self._shape), axis=-1)
+        cells = cells[inside]
+        return self._owned_walls(owners[inside], cells[:, 0] * self._shape[1] + cells[:, 1])
+
+    def _owned_walls(self, owners: np.ndarray, cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Expands pairs of an owner (e.g. a ray fan or a point) and a cell to the walls
+        registered in the cell.
+
+        Args:
+            owners (np.ndarray): The owner of each cell.
+            cells (np.ndarray): Flat cell indices.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Unique pairs of owner and wall index, sorted by
+            owner and wall.
+        """
+        cell_count = self._shape[0] * self._shape[1]
+        keys = _unique(owners * cell_count + cells)
+        owners, cells = keys // cell_count, keys % cell_count
+
+        # expand each cell to the walls registered in it
+        counts = self._cell_start[cells + 1] - self._cell_start[cells]
+        offsets = np.repeat(self._cell_start[cells] - np.cumsum(counts) + counts, counts)
+        walls = self._cell_walls[offsets + np.arange(len(offsets))]
+
+        wall_count = max(1, len(self._lines))
+        keys = _unique(np.repeat(owners, counts) * wall_count + walls)
+        return keys // wall_count, keys % wall_count
+
+
+def _unique(values: np.ndarray) -> np.ndarray:
+    """Sorts integers and drops duplicates like np.unique(), whose hash based implementation is
+    much slower for the large key arrays of the fan and neighborhood queries.
+
+    Args:
+        values (np.ndarray): The integers.
+
+    Returns:
+        np.ndarray: The sorted unique values.
+    """
+    values = np.sort(values)
+    if len(values) < 2:
+        return values
+    return values[np.concatenate([[True], values[1:] != values[:-1]])]
+
+
+def _point_segment_distance(points: np.ndarray, start: np.ndarray,
+                            end: np.ndarray) -> np.ndarray:
+    """Calculates the distance of points to a single segment.
+
+    Args:
+        points (np.ndarray): Points of shape (P, 2).
+        start (np.ndarray): The segment's start (2,).
+        end (np.ndarray): The segment's end (2,).
+
+    Returns:
+        np.ndarray: The distances of shape (P,).
+    """
+    segment = end - start
+    length_sq = np.dot(segment, segment)
+    if length_sq == 0:
+        return np.linalg.norm(points - start, axis=-1)
+
+    t = np.clip(np.dot(points - start, segment) / length_sq, 0, 1)
+    return np.linalg.norm(points - (start + t[:, None] * segment), axis=-1)
@@ -1,8 +1,7 @@
 """This module handles the loading and definition of a map."""
-import yaml
 import numpy as np
 
-from OpenRCSimulator.state import get_data_folder, MAPS_FOLDER
+from OpenRCSimulator.simulation.compiled_map import MAP_LOADER
 from OpenRCSimulator.simulation.openrc import OpenRC
 from OpenRCSimulator.simulation.wall import Wall
 
@@ -11,43 +10,58 @@ class Map:
     """A map is loaded from the app's MAP_FOLDER and contains the window's dimension,
     the wall's and the car's position.
     """
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, field_resolution: float = None) -> None:
+        """Loads the map.
+
+        Args:
+            name (str): The map's name.
+            field_resolution (float, optional): If given, a distance field with this resolution
+            (in centimeters) speeds up collision checks. It is cached next to the map. Defaults
+            to None.
+
+        Raises:
+            FileNotFoundError: If the map does not exist.
+        """
         self.__map_name = name
+        self.__field_resolution = field_resolution
 
         self.__car = None
-        self.__walls = []
+        self.__lines = None
+        self.__walls = None
+        self.__wall_set = None
 
         self.__width = 0
         self.__height = 0
 
+        self._load_map()
+
     def _load_map(self) -> None:
-        path = f"{get_data_folder(MAPS_FOLDER)}{self.__map_name}.yaml"
-        with open(path, "r", encoding="UTF-8") as file:
-            dict_file: dict = yaml.load(file, Loader=yaml.FullLoader)
-
-        # load car location/direction from map info
-        robot_dict = dict_file.get(OpenRC.dict_name, None)
-        self.__car = OpenRC(
-            np.array([robot_dict["x"], robot_dict["y"]]), robot_dict["direction"])
-
-        # load all walls
-        self.__walls = []
-        walls_dict: dict = dict_file.get(Wall.dict_name, None)
-        for wall in walls_dict.items():
-            wall = wall[1]
-            start_pos = (wall["start_x"], wall["start_y"])
-            end_pos = (wall["end_x"], wall["end_y"])
-            self.__walls.append(Wall(start_pos, end_pos))
+        # the compiled map is shared with every other user of the map in this process
+        compiled = MAP_LOADER.get(self.__map_name)
+        self.__lines = compiled.lines
+
+        # load car location/direction from map info, the map stores the displayed direction,
+        # which is the negated angle of the simulation, see OpenRC.drive()
+        x, y, direction = compiled.car.tolist()
+        self.__car = OpenRC(np.array([x, y], dtype=float))
+        self.__car.set_theta(-direction)
+
+        # the walls are compiled once per map into the simulation's coordinate system
+        self.__wall_set = MAP_LOADER.get_wall_set(self.__map_name, self.__field_resolution)
 
         # load width, height
-        size_dict = dict_file.get("app", None)
-        self.__width = size_dict["width"]
-        self.__height = size_dict["height"]
+        self.__width, self.__height = compiled.map_size
 
     @property
     def walls(self):
+        if self.__walls is None:
+            self.__walls = [Wall((sx, sy), (ex, ey)) for sx, sy, ex, ey in self.__lines.tolist()]
         return self.__walls
 
+    @property
+    def wall_set(self):
+        return self.__wall_set
+
     @property
     def car(self):
         return self.__car
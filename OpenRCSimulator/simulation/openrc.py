@@ -1,6 +1,7 @@
 """This module represents the car used within the backend simulation, including the physics."""
-from typing import List, Tuple
+from typing import List, Tuple, Union
 import math
+import time
 
 from shapely.geometry import LineString, Point
 import numpy as np
@@ -8,6 +9,12 @@ import numpy as np
 from OpenRCSimulator.graphics import CENTIMETER_TO_PIXEL, PIXEL_TO_CENTIMETER
 from OpenRCSimulator.simulation import CHASSIS_SIZE, INITIAL_THETA, MOTOR_POWER, \
     SENSOR_DISTANCE, SENSOR_POINTS, TURNING_BOUNDARIES, WEIGHT
+from OpenRCSimulator.simulation import profiler
+from OpenRCSimulator.simulation.collision import collide
+from OpenRCSimulator.simulation.profiler import PROFILER
+from OpenRCSimulator.simulation.raycast import MARCH_ITERATIONS, MARCH_TOLERANCE, cast_rays, \
+    march_rays, sensor_rays
+from OpenRCSimulator.simulation.wall import WallSet
 
 
 class OpenRC:
@@ -15,7 +22,12 @@ class OpenRC:
     The car is able to drive forwards, backwards, steer to both sides, and it can break.
     """
 
-    def __init__(self, pixel_pos: np.array, delta: float = 0.1):
+    SENSOR_SHAPELY = 0
+    SENSOR_NUMPY = 1
+    SENSOR_SPHERE_TRACE = 2
+
+    def __init__(self, pixel_pos: np.array, delta: float = 0.1,
+                 sensor_mode: int = SENSOR_NUMPY):
         self._dict_name = "open-rc"
         # handling coordinate system in pixel diemnsion
         # calculation:
@@ -37,13 +49,18 @@ class OpenRC:
         # simulation related measuremnets
         self._delta = delta
 
-        # create distance sensorsa
+        # create distance sensorsa, either measured one by one using shapely, all at once or
+        # sphere traced through the map's distance field
+        self._sensor_mode = sensor_mode
+        self._march_tolerance = MARCH_TOLERANCE
+        self._march_iterations = MARCH_ITERATIONS
         self.sensor_lines = np.array([np.zeros(2)
                                      for _ in range(SENSOR_POINTS)])
         self._distances = np.array(
             [SENSOR_DISTANCE for sensor in self.sensor_lines])
 
         self._stop = False
+        self._collided = False
 
     @property
     def dict_name(self) -> str:
@@ -54,6 +71,33 @@ class OpenRC:
         """
         return self._dict_name
 
+    @property
+    def position(self) -> np.ndarray:
+        """The car's position in pixels.
+
+        Returns:
+            np.ndarray: The position (x, y).
+        """
+        return self._pos * CENTIMETER_TO_PIXEL
+
+    @property
+    def theta(self) -> float:
+        """The car's angle to the coordinate system's x-axis, drive() returns it negated.
+
+        Returns:
+            float: The angle in radians.
+        """
+        return self._theta
+
+    @property
+    def collided(self) -> bool:
+        """Marks if the car collided with a wall in the last tick.
+
+        Returns:
+            bool: True on collision.
+        """
+        return self._collided
+
     def set_position(self, position: Tuple[float, float], pixel: bool = False) -> None:
         """This method places the car to a specified (real-world/pixel) coordinate.
 
@@ -67,6 +111,14 @@ class OpenRC:
         else:
             self._pos = position * CENTIMETER_TO_PIXEL
 
+    def set_theta(self, theta: float) -> None:
+        """Turns the car to an angle, e.g. to the spawn direction of a map.
+
+        Args:
+            theta (float): The angle to the coordinate system's x-axis in radians.
+        """
+        self._theta = theta % (2 * math.pi)
+
     def copy(self) -> "OpenRC":
         """Copies this object.
 
@@ -74,8 +126,10 @@ class OpenRC:
             OpenRC: The copied object.
         """
         delta = self._delta
-        car = OpenRC([0, 0], delta)
+        car = OpenRC(np.zeros(2), delta, self._sensor_mode)
+        car.set_march_parameters(self._march_tolerance, self._march_iterations)
         car.set_position(self._pos)
+        car.set_theta(self._theta)
 
         return car
 
@@ -136,10 +190,52 @@ class OpenRC:
     def brake(self, brake_const: float = 2):
         self._velocity /= brake_const
 
-    def _update_sensors(self, lines):
+    def set_march_parameters(self, tolerance: float, max_iterations: int) -> None:
+        """Configures the sphere tracing sensors. The measured distances stay exact, the
+        parameters only decide how far the sensors march before they are intersected with the
+        walls, see march_rays().
+
+        Args:
+            tolerance (float): The distance to a wall counted as hit in centimeters.
+            max_iterations (int): The maximum number of steps of a sensor ray.
+        """
+        self._march_tolerance = tolerance
+        self._march_iterations = max_iterations
+
+    def measure(self, walls: Union[WallSet, List]) -> List[int]:
+        """Measures the sensors at the current pose without moving the car, e.g. to observe
+        the car before its first tick.
+
+        Args:
+            walls (Union[WallSet, List]): The compiled walls of the map.
+
+        Returns:
+            List[int]: The measured distances, as returned by drive().
+        """
+        if not isinstance(walls, WallSet):
+            walls = WallSet(walls, indexed=False)
+
+        self._update_sensors(walls)
+        return list((self._distances).astype(int))
+
+    def _update_sensors(self, walls: WallSet):
+        # sphere tracing requires a distance field, otherwise the exact sensors are used
+        if self._sensor_mode == OpenRC.SENSOR_SPHERE_TRACE and walls.distance_field is not None:
+            self._update_sensors_traced(walls)
+            return
+
+        if self._sensor_mode != OpenRC.SENSOR_SHAPELY:
+            self._update_sensors_vectorized(walls)
+            return
+
+        lines, grid = walls.lines, walls.grid
+
         # the factor which is used to get the sensors end position
         factor = 2 * math.pi / SENSOR_POINTS
 
+        if PROFILER.enabled:
+            PROFILER.count(profiler.RAYS_CAST, SENSOR_POINTS)
+
         # iterate of each sensor
         for i, _ in enumerate(self.sensor_lines):
             # and create its stock position
@@ -155,9 +251,13 @@ class OpenRC:
             temp_sensor[1] += math.sin(factor * i -
                                        self._theta) * SENSOR_DISTANCE
 
-            # calculate distances
-            distance = self._calc_distance(lines, temp_sensor)
+            # calculate distances, only walls of cells crossed by the sensor can be hit
+            candidates = lines if grid is None else \
+                lines[grid.query_ray(self._pos, temp_sensor)]
+            distance = self._calc_distance(candidates, temp_sensor)
             self._distances[i] = distance
+            if PROFILER.enabled:
+                PROFILER.count(profiler.WALLS_TESTED, len(candidates))
 
             # update the sensor
             sensor[0] += math.cos(factor * i - self._theta) * distance
@@ -165,22 +265,63 @@ class OpenRC:
 
             self.sensor_lines[i] = sensor
 
-    def _update_state(self, lines) -> bool:
-        # calculate Pro-Ackerman condition of car turning
+    def _update_sensors_vectorized(self, walls: WallSet):
+        """Measures all sensors at once by intersecting each sensor with each wall in a
+        single NumPy broadcast. The results match the shapely backend.
+
+        Args:
+            walls (WallSet): The compiled walls.
+        """
+        position = np.asarray(self._pos, dtype=float)
+        starts, directions, ends = sensor_rays(position, self._theta, SENSOR_DISTANCE)
+
+        lines, grid = walls.lines, walls.grid
+        if grid is not None:
+            lines = lines[grid.query_rays(position, ends)]
+
+        distances = cast_rays(position, ends, lines, SENSOR_DISTANCE)
+        self._distances[:] = distances
+        if PROFILER.enabled:
+            PROFILER.count(profiler.RAYS_CAST, SENSOR_POINTS)
+            PROFILER.count(profiler.WALLS_TESTED, SENSOR_POINTS * len(lines))
+        self.sensor_lines = starts + directions * distances[:, None]
+
+    def _update_sensors_traced(self, walls: WallSet):
+        """Measures all sensors at once by sphere tracing them through the distance field of
+        the walls. Sensors which stop close to a wall are intersected exactly with the walls
+        along the rest of the sensor, so the results match the other modes, see march_rays().
+
+        Args:
+            walls (WallSet): The compiled walls with a distance field.
+        """
+        position = np.asarray(self._pos, dtype=float)
+        starts, directions, ends = sensor_rays(position, self._theta, SENSOR_DISTANCE)
+
+        distances = march_rays(position, ends, walls.distance_field, SENSOR_DISTANCE,
+                               self._march_tolerance, self._march_iterations, walls)
+        self._distances[:] = distances
+        self.sensor_lines = starts + directions * distances[:, None]
+
+        if PROFILER.enabled:
+            PROFILER.count(profiler.RAYS_CAST, SENSOR_POINTS)
+
+    def _update_state(self, walls: WallSet) -> bool:
+        profiling = PROFILER.enabled
+        if profiling:
+            now = time.perf_counter()
+
+        # calculate Pro-Ackerman condition of car turning, tan and tanh are taken from numpy
+        # to match the OpenRCBatch results bit by bit
         turning_angle = math.radians(180 - 90 - (90 - self._turn_angle))
-        rear_radius = CHASSIS_SIZE[1] / math.tan(
-            turning_angle) - 0.5 * CHASSIS_SIZE[0] if turning_angle != 0 else 0
+        rear_radius = CHASSIS_SIZE[1] / float(np.tan(
+            turning_angle)) - 0.5 * CHASSIS_SIZE[0] if turning_angle != 0 else 0
 
         # calculate the current velocity
         velocity = self._velocity * self._acceleration
-        print("velocity (internal):", self._velocity)
-        print("velocity (calculated in km/h):", velocity * 0.036)
-        print("acceleration:", self._acceleration)
-        print("turn:", self._turn_angle)
 
         # calculate the vehicles angle emplyoing the distance traveled: distance = velocity * time
         theta = self._theta + \
-            math.tanh(velocity * self._delta) / \
+            float(np.tanh(velocity * self._delta)) / \
             rear_radius if rear_radius != 0 else self._theta
         theta = theta % (2 * math.pi)
         self._theta = theta
@@ -191,7 +332,12 @@ class OpenRC:
         update_pos[1] = -velocity * math.sin(theta) * self._delta
 
         # stop if a collision was detected
-        collision_detected = self._collision(lines, theta, update_pos)
+        if profiling:
+            now = PROFILER.lap(profiler.STATE, now)
+        collision_detected = self._collision(walls, theta, update_pos)
+        self._collided = collision_detected
+        if profiling:
+            PROFILER.lap(profiler.COLLISION, now)
         if collision_detected:
             return False, np.zeros_like(self._pos)
 
@@ -222,11 +368,11 @@ class OpenRC:
 
         return min_distance
 
-    def _collision(self, lines, theta, update_pos) -> bool:
+    def _collision(self, walls: WallSet, theta, update_pos) -> bool:
         """Calculates the collision of the car with walls,.
 
         Args:
-            lines (np.array): Array of walls.
+            walls (WallSet): The compiled walls.
             theta (float): Current angle of the car.
             update_pos (np.array): Update to the car's position.
 
@@ -241,57 +387,50 @@ class OpenRC:
         vect = np.array([math.cos(theta), -math.sin(theta)])
         vect = vect / np.linalg.norm(vect)
 
-        # calc points in sensor directions for second shapely line
-        future_position = Point(self._pos + update_pos)
-        sliding_position = Point(self._pos)
-        collisions = 0
-        for wall in lines:
-            line = LineString(wall)
-            wall = np.asarray(wall)
-
-            # check if the car has collided with a wall
-            distance = line.distance(future_position)
-            if distance < CHASSIS_SIZE[1] / 2:
-                collisions += 1
-
-                # calculate the lines direction vector
-                line_vect = [wall[1][0] - wall[0][0], wall[1][1] - wall[0][1]]
-                if line_vect[0] == 0 and line_vect[1] == 0:
-                    continue
-
-                # calculate the car's new direction (sliding along a wall)
-                line_vect = line_vect / np.linalg.norm(line_vect)
-                line_vect = line_vect * \
-                    np.dot(vect * velocity, line_vect) / \
-                    np.dot(line_vect, line_vect)
-                
-                sliding_position = Point(sliding_position.x + line_vect[0], 
-                                         sliding_position.y + line_vect[1])
-
-        if collisions == 0:
+        # the distance field tells in O(1) if the car is far from every wall
+        future = np.asarray(self._pos + update_pos, dtype=float)
+        radius = CHASSIS_SIZE[1] / 2
+        field = walls.distance_field
+        if field is not None and field.far_from_walls(future, radius):
             return False
 
-        # only one collision, the car slides along a wall
-        if collisions == 1:
-            self._pos = [sliding_position.x, sliding_position.y]
-            return True
+        # only walls in cells near the car's future footprint can be hit
+        segments, grid = walls.segments, walls.grid
+        if grid is not None:
+            segments = segments[grid.query_box(future - radius, future + radius)]
 
-        # if the car collides with more than one wall, stop it
-        return True
+        # a car hitting one wall slides along it, hitting more walls it keeps its position
+        position, collided, _ = collide(self._pos[None], update_pos[None],
+                                        (vect * velocity)[None], segments,
+                                        CHASSIS_SIZE[1] / 2)
+        if collided[0]:
+            self._pos = position[0]
 
-    def drive(self, lines: List, controls: np.array):
+        if PROFILER.enabled:
+            PROFILER.count(profiler.WALLS_TESTED, len(segments))
+            PROFILER.count(profiler.COLLISIONS, int(collided[0]))
+
+        return bool(collided[0])
+
+    def drive(self, walls: Union[WallSet, List], controls: np.array):
         """This method simulates one simulation tick. To be accurate with the real time,
         a tick should happen every self.delta seconds. Use the set_time_delta() method.
 
         Args:
-            lines (List): A list of points representing the walls on the map.   
+            walls (Union[WallSet, List]): The compiled walls of the map. A list of points 
+            representing the walls in pixels is compiled on every call, so prefer a WallSet.
             controls (np.array): The control input of the car (accelerate, backwards, left, right)
 
         Returns:
             Tuple: Current orientation, x, y, sensors, measured distances
         """
+        profiling = PROFILER.enabled
+        if profiling:
+            start = now = time.perf_counter()
+
         # transferr walls into the simulations coordinate system
-        lines = np.array(lines) * PIXEL_TO_CENTIMETER
+        if not isinstance(walls, WallSet):
+            walls = WallSet(walls, indexed=False)
 
         # apply the controls
         if controls.any():
@@ -324,8 +463,12 @@ class OpenRC:
             self.hard_stop()
 
         # calculate the rotation and movement
-        self._update_sensors(lines)
-        if not self._update_state(lines):
+        if profiling:
+            now = PROFILER.lap(profiler.CONTROLS, now)
+        self._update_sensors(walls)
+        if profiling:
+            PROFILER.lap(profiler.SENSORS, now)
+        if not self._update_state(walls):
             self.hard_stop()
 
         # transfer back to pixel data
@@ -337,4 +480,53 @@ class OpenRC:
         sensor_lines = [(int(sensor[0] * CENTIMETER_TO_PIXEL), int(sensor[1] * CENTIMETER_TO_PIXEL))
                         for sensor in self.sensor_lines]
 
+        if profiling:
+            PROFILER.tick(time.perf_counter() - start)
+
         return -self._theta, x, y, sensor_lines, distances
+
+
+def compare_sensor_modes(walls: WallSet, pixel_positions: np.ndarray, thetas: np.ndarray,
+                         mode: int = OpenRC.SENSOR_SPHERE_TRACE,
+                         reference: int = OpenRC.SENSOR_SHAPELY,
+                         tolerance: float = MARCH_TOLERANCE,
+                         max_iterations: int = MARCH_ITERATIONS) -> dict:
+    """Measures the sensors of cars placed on a map with two sensor modes and compares the
+    results, e.g. to find a distance field resolution and tolerance for sphere tracing.
+
+    Args:
+        walls (WallSet): The compiled walls, with a distance field for sphere tracing.
+        pixel_positions (np.ndarray): The cars' positions in pixels (N, 2).
+        thetas (np.ndarray): The cars' angles (N,).
+        mode (int, optional): The mode to evaluate. Defaults to OpenRC.SENSOR_SPHERE_TRACE.
+        reference (int, optional): The mode to compare with. Defaults to OpenRC.SENSOR_SHAPELY.
+        tolerance (float, optional): See OpenRC.set_march_parameters(). Defaults to
+        MARCH_TOLERANCE.
+        max_iterations (int, optional): See OpenRC.set_march_parameters(). Defaults to
+        MARCH_ITERATIONS.
+
+    Returns:
+        dict: The mean, 95th percentile and max absolute error in centimeters, and the time
+        both modes took per car in seconds.
+    """
+    results, timings = [], []
+    for sensor_mode in (mode, reference):
+        distances = []
+        start = time.perf_counter()
+        for position, theta in zip(np.asarray(pixel_positions, dtype=float), thetas):
+            car = OpenRC(position.copy(), sensor_mode=sensor_mode)
+            car.set_march_parameters(tolerance, max_iterations)
+            car.set_theta(theta)
+            distances.append(np.array(car.measure(walls), dtype=float))
+
+        timings.append((time.perf_counter() - start) / max(1, len(thetas)))
+        results.append(np.array(distances))
+
+    errors = np.abs(results[0] - results[1])
+    return {
+        "mean_error": float(errors.mean()),
+        "p95_error": float(np.percentile(errors, 95)),
+        "max_error": float(errors.max()),
+        "time": timings[0],
+        "reference_time": timings[1]
+    }
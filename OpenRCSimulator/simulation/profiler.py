@@ -0,0 +1,205 @@
+"""This module instruments the simulation's hot path. It measures the time spent in each phase
+of a tick, counts the work done and keeps a histogram of the tick latency. Instrumentation is
+opt-in, while disabled the simulation only checks a boolean per phase."""
+from typing import Dict, TextIO
+import atexit
+import math
+import os
+import sys
+import time
+
+
+# the phases of a simulation tick
+CONTROLS = "controls"
+SENSORS = "sensors"
+STATE = "state"
+COLLISION = "collision"
+PHASES = (CONTROLS, SENSORS, STATE, COLLISION)
+
+# the counted work, walls tested counts each tested pair of a ray or car and a wall
+WALLS_TESTED = "walls_tested"
+RAYS_CAST = "rays_cast"
+COLLISIONS = "collisions"
+TICKS = "ticks"
+
+# the latency histogram covers 1µs to 10s with a fixed amount of logarithmic bins per decade,
+# faster or slower ticks are put into the first or last bin
+HISTOGRAM_MIN_EXPONENT = -6
+HISTOGRAM_BINS_PER_DECADE = 8
+HISTOGRAM_BINS = 7 * HISTOGRAM_BINS_PER_DECADE
+
+# setting this environment variable enables the instrumentation and dumps it at exit
+PROFILE_ENV = "OPENRC_PROFILE"
+
+
+class Profiler:
+    """The Profiler collects per-phase timers, counters and a tick latency histogram. Callers
+    check enabled before taking any measurement, so a disabled profiler costs close to nothing.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._dump_registered = False
+
+        self._timers = {}
+        self._counters = {}
+        self._histogram = []
+        self.reset()
+
+    def enable(self, dump_at_exit: bool = False) -> None:
+        """Enables the instrumentation.
+
+        Args:
+            dump_at_exit (bool, optional): Prints the collected data when the interpreter
+            exits. Defaults to False.
+        """
+        self.enabled = True
+        if dump_at_exit and not self._dump_registered:
+            atexit.register(self.dump)
+            self._dump_registered = True
+
+    def disable(self) -> None:
+        """Disables the instrumentation, the collected data is kept.
+        """
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Clears all collected data.
+        """
+        self._timers = {phase: 0.0 for phase in PHASES}
+        self._counters = {name: 0 for name in (WALLS_TESTED, RAYS_CAST, COLLISIONS, TICKS)}
+        self._histogram = [0] * HISTOGRAM_BINS
+
+    def collect(self) -> Dict:
+        """Returns the collected data and clears it, e.g. to send it from a worker process to
+        the process merging it.
+
+        Returns:
+            Dict: The timers, counters and histogram bins, see merge().
+        """
+        data = {"timers": self.timers, "counters": self.counters,
+                "histogram": list(self._histogram)}
+        self.reset()
+        return data
+
+    def merge(self, data: Dict) -> None:
+        """Adds data collected by another profiler, e.g. of a worker process.
+
+        Args:
+            data (Dict): The data returned by collect().
+        """
+        for phase, seconds in data["timers"].items():
+            self._timers[phase] = self._timers.get(phase, 0.0) + seconds
+        for name, count in data["counters"].items():
+            self.count(name, count)
+        for i, count in enumerate(data["histogram"]):
+            self._histogram[i] += count
+
+    def lap(self, phase: str, since: float) -> float:
+        """Adds the time passed since a previous measurement to a phase.
+
+        Args:
+            phase (str): The phase to add the time to.
+            since (float): The time of the previous measurement from time.perf_counter().
+
+        Returns:
+            float: The current time, to be used as start of the next phase.
+        """
+        now = time.perf_counter()
+        self._timers[phase] += now - since
+        return now
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increases a counter.
+
+        Args:
+            name (str): The counter's name.
+            amount (int, optional): The amount to add. Defaults to 1.
+        """
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def tick(self, latency: float) -> None:
+        """Records the latency of one simulation tick.
+
+        Args:
+            latency (float): The tick's duration in seconds.
+        """
+        self._counters[TICKS] += 1
+        index = 0
+        if latency > 0:
+            index = int((math.log10(latency) - HISTOGRAM_MIN_EXPONENT) *
+                        HISTOGRAM_BINS_PER_DECADE)
+        self._histogram[min(max(index, 0), HISTOGRAM_BINS - 1)] += 1
+
+    @property
+    def timers(self) -> Dict[str, float]:
+        """The total time spent in each phase in seconds.
+
+        Returns:
+            Dict[str, float]: The time by phase.
+        """
+        return dict(self._timers)
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        """The counted work, e.g. the number of walls tested and rays cast.
+
+        Returns:
+            Dict[str, int]: The counts by name.
+        """
+        return dict(self._counters)
+
+    @property
+    def histogram(self) -> Dict[float, int]:
+        """The tick latency histogram.
+
+        Returns:
+            Dict[float, int]: The number of ticks by the lower bound of the bin in seconds.
+        """
+        return {10 ** (HISTOGRAM_MIN_EXPONENT + i / HISTOGRAM_BINS_PER_DECADE): count
+                for i, count in enumerate(self._histogram)}
+
+    def percentile(self, percent: float) -> float:
+        """Estimates a percentile of the tick latency from the histogram.
+
+        Args:
+            percent (float): The percentile between 0 and 100.
+
+        Returns:
+            float: The upper bound of the bin containing the percentile in seconds.
+        """
+        total = sum(self._histogram)
+        if total == 0:
+            return 0.0
+
+        seen = 0
+        for i, count in enumerate(self._histogram):
+            seen += count
+            if seen >= total * percent / 100:
+                break
+        return 10 ** (HISTOGRAM_MIN_EXPONENT + (i + 1) / HISTOGRAM_BINS_PER_DECADE)
+
+    def dump(self, file: TextIO = None) -> None:
+        """Prints a summary of the collected data.
+
+        Args:
+            file (TextIO, optional): The output stream. Defaults to stderr.
+        """
+        file = file or sys.stderr
+        ticks = max(1, self._counters[TICKS])
+
+        print(f"OpenRC profile over {self._counters[TICKS]} ticks", file=file)
+        for phase, seconds in self._timers.items():
+            print(f"  {phase:<12} {seconds:10.4f}s  {seconds / ticks * 1e6:10.1f}µs/tick",
+                  file=file)
+        for name, count in self._counters.items():
+            if name != TICKS:
+                print(f"  {name:<12} {count:10d}  {count / ticks:10.1f}/tick", file=file)
+        print(f"  latency p50 < {self.percentile(50) * 1e3:.3f}ms, " +
+              f"p99 < {self.percentile(99) * 1e3:.3f}ms", file=file)
+
+
+# the instrumentation shared by all cars of a process
+PROFILER = Profiler()
+if os.getenv(PROFILE_ENV):
+    PROFILER.enable(dump_at_exit=True)
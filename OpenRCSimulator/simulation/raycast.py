@@ -0,0 +1,226 @@
+"""This module casts the car's sensor rays against all walls at once using NumPy, which
+replaces the per-ray and per-wall shapely calls of the simulation's hot path. Alternatively, the
+rays are sphere traced through a distance field of the walls."""
+import math
+
+import numpy as np
+
+from OpenRCSimulator.simulation import SENSOR_POINTS
+
+
+# angle of each sensor relative to the coordinate system's x-axis
+SENSOR_ANGLES = np.arange(SENSOR_POINTS) * (2 * math.pi / SENSOR_POINTS)
+
+# a sphere traced ray stops if it is closer than this to a wall (in centimeters)
+MARCH_TOLERANCE = 1.0
+
+# the maximum number of steps of a sphere traced ray
+MARCH_ITERATIONS = 64
+
+
+def sensor_rays(position: np.ndarray, theta: float, length: float):
+    """Calculates the start points and directions of all sensors of a car. The start points
+    are placed on the unit circle around the car as it is done by the shapely backend.
+
+    Args:
+        position (np.ndarray): The car's position in centimeters (..., 2).
+        theta (float): The car's angle to the coordinate system's x-axis (...).
+        length (float): The maximum distance a sensor can measure.
+
+    Returns:
+        Tuple: Start points (..., SENSOR_POINTS, 2), unit directions (..., SENSOR_POINTS, 2)
+        and the end points of the sensors at full length (..., SENSOR_POINTS, 2).
+    """
+    position = np.asarray(position, dtype=float)
+    theta = np.asarray(theta, dtype=float)[..., None]
+
+    starts = np.stack([np.cos(SENSOR_ANGLES), np.sin(SENSOR_ANGLES)], axis=-1)
+    starts = position[..., None, :] + starts
+
+    directions = np.stack([np.cos(SENSOR_ANGLES - theta),
+                           np.sin(SENSOR_ANGLES - theta)], axis=-1)
+    ends = starts + directions * length
+
+    return starts, directions, ends
+
+
+def cast_rays(origins: np.ndarray, ends: np.ndarray, lines: np.ndarray,
+              max_distance: float) -> np.ndarray:
+    """Intersects every ray with every wall in one broadcast and returns the distance from the
+    ray's origin to the closest hit. Rays which do not hit a wall return max_distance.
+
+    Args:
+        origins (np.ndarray): The ray origins of shape (..., 2).
+        ends (np.ndarray): The ray end points of shape (..., R, 2).
+        lines (np.ndarray): The walls of shape (W, 2, 2) given as start and end point, or of
+        shape (..., W, 2, 2) to test each origin against its own walls. NaN walls are ignored.
+        max_distance (float): The distance returned if nothing was hit.
+
+    Returns:
+        np.ndarray: The measured distances of shape (..., R).
+    """
+    origins = np.asarray(origins, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    lines = np.asarray(lines, dtype=float)
+    if lines.ndim < 3:
+        lines = lines.reshape(-1, 2, 2)
+
+    distances = np.full(ends.shape[:-1], float(max_distance))
+    if lines.shape[-3] == 0:
+        return distances
+
+    # walls given per origin are shared by all of its rays
+    start_x, start_y = lines[..., 0, 0], lines[..., 0, 1]
+    wall_x, wall_y = lines[..., 1, 0] - start_x, lines[..., 1, 1] - start_y
+    if lines.ndim > 3:
+        start_x, start_y = start_x[..., None, :], start_y[..., None, :]
+        wall_x, wall_y = wall_x[..., None, :], wall_y[..., None, :]
+
+    # rays as origin + t * ray, walls as start + u * wall with t, u in [0, 1]
+    ray_x = (ends[..., 0] - origins[..., 0, None])[..., None]
+    ray_y = (ends[..., 1] - origins[..., 1, None])[..., None]
+    to_start_x = start_x - origins[..., 0, None, None]
+    to_start_y = start_y - origins[..., 1, None, None]
+
+    denom = ray_x * wall_y - ray_y * wall_x
+    t_num = to_start_x * wall_y - to_start_y * wall_x
+    u_num = to_start_x * ray_y - to_start_y * ray_x
+    ray_length_sq = ray_x * ray_x + ray_y * ray_y
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # regular intersection of two non-parallel segments
+        t = t_num / denom
+        u = u_num / denom
+        t = np.where((t >= 0) & (t <= 1) & (u >= 0) & (u <= 1), t, np.inf)
+
+        # collinear walls overlapping the ray, the closest point of the overlap is hit
+        collinear = np.nonzero((denom == 0) & (u_num == 0))
+        if len(collinear[0]):
+            shape = denom.shape
+            to_start_x = np.broadcast_to(to_start_x, shape)[collinear]
+            to_start_y = np.broadcast_to(to_start_y, shape)[collinear]
+            to_end_x = to_start_x + np.broadcast_to(wall_x, shape)[collinear]
+            to_end_y = to_start_y + np.broadcast_to(wall_y, shape)[collinear]
+            along_x = np.broadcast_to(ray_x, shape)[collinear]
+            along_y = np.broadcast_to(ray_y, shape)[collinear]
+            length_sq = np.broadcast_to(ray_length_sq, shape)[collinear]
+
+            t_start = (to_start_x * along_x + to_start_y * along_y) / length_sq
+            t_end = (to_end_x * along_x + to_end_y * along_y) / length_sq
+            t_low = np.minimum(t_start, t_end)
+            t_high = np.maximum(t_start, t_end)
+            overlap = (t_high >= 0) & (t_low <= 1)
+            t[collinear] = np.where(overlap, np.maximum(t_low, 0), np.inf)
+
+    closest = np.min(t, axis=-1) * np.sqrt(ray_length_sq[..., 0])
+
+    return np.minimum(distances, closest)
+
+
+def gather_walls(lines: np.ndarray, owners: np.ndarray, indices: np.ndarray,
+                 size: int) -> np.ndarray:
+    """Builds one set of walls per origin from pairs of origin and wall index, e.g. as returned
+    by WallGrid.query_fans(). The sets are padded with NaN walls, which are never hit.
+
+    Args:
+        lines (np.ndarray): All walls of shape (W, 2, 2).
+        owners (np.ndarray): The origin of each pair, sorted.
+        indices (np.ndarray): The wall of each pair.
+        size (int): The number of origins.
+
+    Returns:
+        np.ndarray: The walls of each origin of shape (size, max. walls per origin, 2, 2).
+    """
+    counts = np.bincount(owners, minlength=size)
+    columns = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    padded = np.full((size, max(1, counts.max(initial=0))), len(lines))
+    padded[owners, columns] = indices
+    return np.concatenate([lines, np.full((1, 2, 2), np.nan)])[padded]
+
+
+def march_rays(origins: np.ndarray, ends: np.ndarray, field, max_distance: float,
+               tolerance: float = MARCH_TOLERANCE, max_iterations: int = MARCH_ITERATIONS,
+               walls=None) -> np.ndarray:
+    """Sphere traces every ray through a distance field. Each ray advances by the distance to
+    the closest wall minus the field's error bound, so it never passes through a wall, until it
+    comes closer to a wall than the tolerance, reaches its end or runs out of iterations.
+
+    If the indexed walls are given, the rays which stopped close to a wall or ran out of
+    iterations are intersected exactly with the walls along the rest of the ray, so the
+    distances equal those of cast_rays(). The tolerance and max_iterations only shift work
+    between marching and the exact intersection. Without walls, a ray closer to a wall than
+    the tolerance counts as hit at the distance marched so far. Its end lies within the
+    tolerance plus the field's error of a wall, but a ray passing a wall at a flat angle may
+    stop long before the wall it actually hits. Rays which ran out of iterations count as not
+    hit.
+
+    Args:
+        origins (np.ndarray): The ray origins of shape (..., 2).
+        ends (np.ndarray): The ray end points of shape (..., R, 2).
+        field (DistanceField): The distance field of the walls.
+        max_distance (float): The distance returned if nothing was hit.
+        tolerance (float, optional): The distance to a wall at which a ray stops marching.
+        Defaults to MARCH_TOLERANCE.
+        max_iterations (int, optional): The maximum number of steps of a ray. Defaults to
+        MARCH_ITERATIONS.
+        walls (WallSet, optional): The indexed walls to intersect the stopped rays with.
+        Defaults to None.
+
+    Returns:
+        np.ndarray: The measured distances of shape (..., R).
+    """
+    origins = np.asarray(origins, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    shape = ends.shape[:-1]
+
+    sources = np.broadcast_to(origins[..., None, :], ends.shape).reshape(-1, 2)
+    targets = ends.reshape(-1, 2)
+    rays = targets - sources
+    lengths = np.sqrt(np.sum(rays * rays, axis=-1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        directions = np.nan_to_num(rays / lengths[:, None])
+
+    # the point and distance each ray stopped at, and whether it stopped close to a wall
+    reached = sources.copy()
+    marched = np.zeros(len(rays))
+    stopped = np.zeros(len(rays), dtype=bool)
+
+    # the state of the rays which are still marching, compacted after each step
+    active = np.arange(len(rays))
+    points, travelled, remaining = sources, np.zeros(len(rays)), lengths
+    for _ in range(max_iterations):
+        if len(active) == 0:
+            break
+
+        steps = field.sample(points) - field.error
+        near = steps <= tolerance
+        travelled = travelled + np.where(near, 0, steps)
+        points = points + directions[active] * np.where(near, 0, steps)[:, None]
+
+        done = near | (travelled >= remaining)
+        reached[active[done]] = points[done]
+        marched[active[done]] = travelled[done]
+        stopped[active[done]] = near[done]
+
+        keep = ~done
+        active, points = active[keep], points[keep]
+        travelled, remaining = travelled[keep], remaining[keep]
+
+    distances = np.full(len(rays), float(max_distance))
+    if walls is None:
+        distances[stopped] = marched[stopped]
+        return np.minimum(distances, max_distance).reshape(shape)
+
+    # the marched part of a ray is free, so the walls along the rest of the ray are
+    # intersected from the ray's origin, which gives the same result as cast_rays()
+    reached[active] = points
+    unresolved = np.concatenate([np.flatnonzero(stopped), active])
+    if len(unresolved):
+        owners, indices = walls.grid.query_fans(reached[unresolved],
+                                                targets[unresolved, None])
+        lines = gather_walls(walls.lines, owners, indices, len(unresolved))
+        distances[unresolved] = cast_rays(sources[unresolved], targets[unresolved, None],
+                                          lines, max_distance)[:, 0]
+
+    return np.minimum(distances, max_distance).reshape(shape)
@@ -0,0 +1,114 @@
+"""This module publishes compiled maps into shared memory, so worker processes attach to the
+same wall arrays and spatial index instead of loading and compiling the map on their own."""
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from OpenRCSimulator.simulation.map import Map
+from OpenRCSimulator.simulation.openrc import OpenRC
+from OpenRCSimulator.simulation.wall import WallSet
+
+
+class SharedMapHandle:
+    """The SharedMapHandle describes a published map. It is small and picklable, so it can be
+    passed to worker processes, e.g. as initializer argument of a process pool. Workers have to
+    be started by multiprocessing from the publishing process, so they share its resource
+    tracker and the blocks are only freed by the publisher.
+    """
+
+    def __init__(self, name: str, blocks: Dict[str, Tuple[str, Tuple, str]],
+                 car_position: np.ndarray, car_theta: float, map_size: List[int]) -> None:
+        self.name = name
+        self.blocks = blocks
+        self.car_position = car_position
+        self.car_theta = car_theta
+        self.map_size = map_size
+
+
+class SharedMap:
+    """The SharedMap copies the compiled arrays of a map into shared memory blocks. The owner
+    of a SharedMap has to close it once all workers are done, this frees the memory.
+    """
+
+    def __init__(self, game_map: Map, name: str = "") -> None:
+        """Publishes the map.
+
+        Args:
+            game_map (Map): The loaded map.
+            name (str, optional): The map's name, passed on to the handle. Defaults to "".
+        """
+        self._memory = []
+        blocks = {}
+        for key, array in game_map.wall_set.arrays().items():
+            array = np.ascontiguousarray(array)
+            memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, array.dtype, buffer=memory.buf)[...] = array
+
+            self._memory.append(memory)
+            blocks[key] = (memory.name, array.shape, array.dtype.str)
+
+        self._handle = SharedMapHandle(name, blocks, game_map.car.position, game_map.car.theta,
+                                       game_map.map_size)
+
+    @property
+    def handle(self) -> SharedMapHandle:
+        return self._handle
+
+    def close(self) -> None:
+        """Releases all shared memory blocks. Attached maps must not be used afterwards.
+        """
+        for memory in self._memory:
+            memory.close()
+            memory.unlink()
+        self._memory = []
+
+    def __enter__(self) -> "SharedMap":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class AttachedMap:
+    """The AttachedMap provides the same simulation data as a Map, but its walls are read-only
+    views of the shared memory published by a SharedMap. Nothing is copied or compiled.
+    """
+
+    def __init__(self, handle: SharedMapHandle) -> None:
+        """Attaches to the blocks of a published map.
+
+        Args:
+            handle (SharedMapHandle): The handle of the published map.
+        """
+        self._memory = []
+        arrays = {}
+        for key, (block, shape, dtype) in handle.blocks.items():
+            memory = shared_memory.SharedMemory(name=block)
+            array = np.ndarray(shape, np.dtype(dtype), buffer=memory.buf)
+            array.flags.writeable = False
+
+            self._memory.append(memory)
+            arrays[key] = array
+
+        self.__name = handle.name
+        self.__wall_set = WallSet.from_arrays(arrays)
+        self.__car = OpenRC(np.array(handle.car_position, dtype=float))
+        self.__car.set_theta(handle.car_theta)
+        self.__map_size = handle.map_size
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def wall_set(self):
+        return self.__wall_set
+
+    @property
+    def car(self):
+        return self.__car
+
+    @property
+    def map_size(self):
+        return self.__map_size
@@ -1,32 +1,218 @@
 """This module handles the training of an agent"""
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple, Union
 import os
 import random
+import time
 import yaml
 
-from OpenRCSimulator.state import get_data_folder, CONFIGS_FOLDER, MAPS_FOLDER
+import numpy as np
+
+from OpenRCSimulator.state import get_data_folder, CONFIGS_FOLDER, MAPS_FOLDER, MODELS_FOLDER
+from OpenRCSimulator.simulation import SENSOR_DISTANCE, SENSOR_POINTS
+from OpenRCSimulator.simulation.env import ACTION_SIZE, VectorOpenRCEnv
 from OpenRCSimulator.simulation.map import Map
+from OpenRCSimulator.simulation.openrc import OpenRC
+from OpenRCSimulator.simulation.profiler import PROFILER
+from OpenRCSimulator.simulation.shared import AttachedMap, SharedMap, SharedMapHandle
+
+
+# number of ticks simulated per map if the config does not specify it
+STEPS_PER_MAP = 1_000
+
+# a genome holds the weights and biases of a linear policy from sensors to controls
+GENOME_SIZE = (SENSOR_POINTS + 1) * ACTION_SIZE
+
+# maps attached (or compiled) by a worker process, they are reused across generations and maps
+_WORKER_MAPS: Dict[str, Union[Map, AttachedMap]] = {}
+
+
+def _init_worker(handles: List[SharedMapHandle], profile: bool = False) -> None:
+    """Attaches to the maps published in shared memory once when a worker process starts.
+
+    Args:
+        handles (List[SharedMapHandle]): The maps to train on.
+        profile (bool, optional): Instruments the simulation of this worker, the data is
+        returned by evaluate(). Defaults to False.
+    """
+    # workers never run atexit, their data is merged into the trainer's profiler instead
+    PROFILER.reset()
+    if profile:
+        PROFILER.enable()
+    else:
+        PROFILER.disable()
+
+    for handle in handles:
+        _WORKER_MAPS[handle.name] = AttachedMap(handle)
+
+
+def _worker_map(map_name: str) -> Union[Map, AttachedMap]:
+    """Returns the map of this worker, loading it on first use if it was not published.
+
+    Args:
+        map_name (str): The map's name.
+
+    Returns:
+        Union[Map, AttachedMap]: The compiled map.
+    """
+    if map_name not in _WORKER_MAPS:
+        _WORKER_MAPS[map_name] = Map(map_name)
+    return _WORKER_MAPS[map_name]
+
+
+def policy_controls(genomes: np.ndarray, observations: np.ndarray) -> np.ndarray:
+    """Decides on the controls of each car by its linear policy.
+
+    Args:
+        genomes (np.ndarray): The policies of shape (K, GENOME_SIZE).
+        observations (np.ndarray): The measured distances of shape (K, SENSOR_POINTS).
+
+    Returns:
+        np.ndarray: The controls of shape (K, 5).
+    """
+    weights = genomes[:, :-ACTION_SIZE].reshape(-1, SENSOR_POINTS, ACTION_SIZE)
+    bias = genomes[:, -ACTION_SIZE:]
+    inputs = observations / SENSOR_DISTANCE
+    return np.einsum("kr,kra->ka", inputs, weights) + bias > 0
+
+
+def evaluate(map_name: str, genomes: np.ndarray, steps: int,
+             sensor_mode: int = OpenRC.SENSOR_NUMPY) -> Tuple[np.ndarray, int, Optional[Dict]]:
+    """Drives one episode per genome on a map. All genomes of the call are simulated at once,
+    the result only depends on the genomes and not on the other cars of the batch.
+
+    Args:
+        map_name (str): The map to drive on.
+        genomes (np.ndarray): The policies of shape (K, GENOME_SIZE).
+        steps (int): The maximum length of an episode.
+        sensor_mode (int, optional): How the sensors are measured, see OpenRC. Defaults to
+        OpenRC.SENSOR_NUMPY.
+
+    Returns:
+        Tuple[np.ndarray, int, Optional[Dict]]: The fitness (distance driven until the first
+        collision) of shape (K,), the number of simulated car ticks and the profiler data
+        collected meanwhile, or None if the profiler is disabled.
+    """
+    env = VectorOpenRCEnv(_worker_map(map_name), len(genomes), max_steps=steps,
+                          sensor_mode=sensor_mode)
+    observations = env.reset()
+
+    fitness = np.zeros(len(genomes))
+    alive = np.ones(len(genomes), dtype=bool)
+    ticks = 0
+    for _ in range(steps):
+        observations, rewards, dones, _ = env.step(policy_controls(genomes, observations))
+        fitness += np.where(alive, rewards, 0)
+        ticks += len(genomes)
+        alive &= ~dones
+        if not alive.any():
+            break
+
+    return fitness, ticks, PROFILER.collect() if PROFILER.enabled else None
 
 
 class Trainer:
     """The Trainer class trains an agent on a specific map or randomly on a set of maps.
+    The population of each generation is evaluated in parallel by a pool of worker processes.
     """
 
     def __init__(self, config_name: str, map_name: str = None) -> None:
         self.__config_name = config_name
         self.__map_name = map_name
+        self.__executor = None
+
+        # configurable training parameters
+        self.__steps = STEPS_PER_MAP
+        self.__population_size = 64
+        self.__generations = 10
+        self.__elite = 8
+        self.__sigma = 0.1
+        self.__workers = os.cpu_count() or 1
+        self.__deterministic = False
+        self.__seed = None
+        self.__field_resolution = None
+        self.__sensor_mode = OpenRC.SENSOR_NUMPY
+
+        self.__rng = None
+        self.__population = None
 
     def _load_config(self) -> None:
         path = f"{get_data_folder(CONFIGS_FOLDER)}{self.__config_name}.yaml"
+        if not os.path.exists(path):
+            print(f"Config {self.__config_name} not found, using defaults.")
+            return
+
         with open(path, "r", encoding="UTF-8") as file:
-            # Configure this class [todo]
-            _ = yaml.load(file, Loader=yaml.FullLoader)
+            config = yaml.load(file, Loader=yaml.FullLoader) or {}
+
+        self.__steps = int(config.get("steps", self.__steps))
+        self.__population_size = int(config.get("population", self.__population_size))
+        self.__generations = int(config.get("generations", self.__generations))
+        self.__elite = int(config.get("elite", self.__elite))
+        self.__sigma = float(config.get("sigma", self.__sigma))
+        self.__workers = int(config.get("workers", self.__workers))
+        self.__deterministic = bool(config.get("deterministic", self.__deterministic))
+        self.__seed = config.get("seed", self.__seed)
+        self.__field_resolution = config.get("distance_field", self.__field_resolution)
+        if config.get("sphere_tracing", False):
+            self.__sensor_mode = OpenRC.SENSOR_SPHERE_TRACE
+
+        if self.__population_size < 1:
+            raise ValueError(f"Config {self.__config_name}: the population has to be at " +
+                             "least 1.")
+        if not 1 <= self.__elite <= self.__population_size:
+            raise ValueError(f"Config {self.__config_name}: elite has to be between 1 and " +
+                             f"the population ({self.__population_size}).")
+        if self.__workers < 1:
+            raise ValueError(f"Config {self.__config_name}: workers has to be at least 1.")
 
     def _get_maps(self) -> List[str]:
         """
         Get map names of files located in 'maps/'
         """
-        return [name.replace(".yaml", "") for name in os.listdir(get_data_folder(MAPS_FOLDER))]
+        return [name.replace(".yaml", "") for name in os.listdir(get_data_folder(MAPS_FOLDER))
+                if name.endswith(".yaml")]
+
+    def _evaluate_population(self, map_name: str) -> Tuple[np.ndarray, int]:
+        """Splits the population into one chunk per worker and evaluates all chunks in parallel.
+        The chunks only depend on the population size and the number of workers, and results
+        are collected in order, so the fitness does not depend on the scheduling of workers.
+
+        Args:
+            map_name (str): The map to evaluate on.
+
+        Returns:
+            Tuple[np.ndarray, int]: The fitness of each genome and the number of simulated
+            car ticks.
+        """
+        chunks = np.array_split(self.__population, min(self.__workers, len(self.__population)))
+        results = self.__executor.map(evaluate, [map_name] * len(chunks), chunks,
+                                      [self.__steps] * len(chunks),
+                                      [self.__sensor_mode] * len(chunks))
+        fitness, ticks, profiles = zip(*results)
+        for profile in profiles:
+            if profile is not None:
+                PROFILER.merge(profile)
+        return np.concatenate(fitness), sum(ticks)
+
+    def _next_generation(self, fitness: np.ndarray) -> None:
+        """Keeps the best genomes and fills the population with their mutated copies.
+
+        Args:
+            fitness (np.ndarray): The fitness of each genome.
+        """
+        # a stable sort keeps the ranking of equal fitness reproducible
+        elite = self.__population[np.argsort(-fitness, kind="stable")[:self.__elite]]
+        parents = elite[self.__rng.integers(0, len(elite), self.__population_size - len(elite))]
+        children = parents + self.__rng.normal(0, self.__sigma, parents.shape)
+        self.__population = np.concatenate([elite, children])
+
+    def _save_model(self) -> None:
+        """Stores the best genome of the last evaluated generation in the app's MODELS_FOLDER.
+        """
+        path = f"{get_data_folder(MODELS_FOLDER)}{self.__config_name}.npy"
+        np.save(path, self.__population[0])
 
     def train_map(self, map_name: str):
         """This method trains the agent on a given map.
@@ -34,23 +220,49 @@ class Trainer:
         Args:
             map_name (str): The map to train on.
         """
-        # Train an agent on this map [todo]
-        _ = Map(map_name)
+        for generation in range(self.__generations):
+            start = time.perf_counter()
+            fitness, ticks = self._evaluate_population(map_name)
+            elapsed = time.perf_counter() - start
+
+            print(f"{map_name} generation {generation}: best {fitness.max():.1f}, " +
+                  f"mean {fitness.mean():.1f}, {ticks / elapsed:.1f} steps/s")
+            self._next_generation(fitness)
 
     def train(self) -> None:
         """This method trains the agent on a set of maps randomly. The set includes all
         maps available in the app's MAP_FOLDER.
         """
+        self._load_config()
+
+        # in deterministic mode the maps' order and the population only depend on the seed
+        seed = self.__seed
+        if self.__deterministic and seed is None:
+            seed = 0
+        self.__rng = np.random.default_rng(seed)
+        self.__population = self.__rng.normal(0, self.__sigma,
+                                              (self.__population_size, GENOME_SIZE))
+
         # map specified, only training specific map
-        if self.__map_name:
-            self.train_map(self.__map_name)
-            return
+        map_names = [self.__map_name] if self.__map_name else self._get_maps()
+        if not self.__map_name:
+            # adjust training parameters based on number of maps
+            # (e.g. epochs to play / number of maps) [todo]
+            order = random.Random(seed).sample(range(0, len(map_names)), len(map_names))
+            map_names = [map_names[i] for i in order]
 
-        # get all maps to train on
-        map_names = self._get_maps()
+        # the maps are compiled once and shared with all workers, which live as long as the
+        # training and attach to the maps on start
+        with ExitStack() as stack:
+            handles = [stack.enter_context(SharedMap(Map(name, self.__field_resolution),
+                                                     name)).handle for name in map_names]
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=self.__workers, initializer=_init_worker,
+                initargs=(handles, PROFILER.enabled)))
 
-        # adjust training parameters based on number of maps
-        # (e.g. epochs to play / number of maps) [todo]
+            self.__executor = executor
+            for map_name in map_names:
+                self.train_map(map_name)
+        self.__executor = None
 
-        for i in random.sample(range(0, len(map_names)), len(map_names)):
-            self.train_map(map_names[i])
+        self._save_model()
@@ -1,5 +1,11 @@
 """This module represents a wall used within the backend simulation."""
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from OpenRCSimulator.graphics import PIXEL_TO_CENTIMETER
+from OpenRCSimulator.simulation.distance_field import DistanceField
+from OpenRCSimulator.simulation.grid import WallGrid
 
 
 class Wall:
@@ -20,3 +26,212 @@ class Wall:
             str: The name of this class.
         """
         return self._dict_name
+
+    def get_start(self) -> Tuple:
+        """Returns the wall's start position.
+
+        Returns:
+            Tuple: The start position in pixels.
+        """
+        return self._start_pos
+
+    def get_end(self) -> Tuple:
+        """Returns the wall's end position.
+
+        Returns:
+            Tuple: The end position in pixels.
+        """
+        return self._end_pos
+
+
+class WallSet:
+    """The WallSet compiles walls into one contiguous (N, 4) float array in the simulation's 
+    centimeter dimension, along with their direction vectors, lengths, normals and bounding 
+    boxes. The arrays are read-only, a changed map requires a new WallSet.
+    """
+
+    def __init__(self, lines: Iterable, pixel: bool = True, indexed: bool = True) -> None:
+        """Compiles the walls.
+
+        Args:
+            lines (Iterable): Walls given as [[start_x, start_y], [end_x, end_y]] or as rows of
+            (start_x, start_y, end_x, end_y).
+            pixel (bool, optional): If true, the given coordinates are pixels, otherwise 
+            centimeter coordinates. Defaults to True.
+            indexed (bool, optional): If true, a spatial index is built on first access of 
+            the grid. Defaults to True.
+        """
+        segments = np.array(lines, dtype=float).reshape(-1, 4)
+        if pixel:
+            segments *= PIXEL_TO_CENTIMETER
+        self._segments = np.ascontiguousarray(segments)
+
+        self._directions = self._segments[:, 2:] - self._segments[:, :2]
+        self._lengths = np.hypot(self._directions[:, 0], self._directions[:, 1])
+
+        # unit normals, walls without length have none
+        self._normals = np.zeros_like(self._directions)
+        valid = self._lengths > 0
+        self._normals[valid, 0] = -self._directions[valid, 1] / self._lengths[valid]
+        self._normals[valid, 1] = self._directions[valid, 0] / self._lengths[valid]
+
+        self._aabbs = np.concatenate([
+            np.minimum(self._segments[:, :2], self._segments[:, 2:]),
+            np.maximum(self._segments[:, :2], self._segments[:, 2:])], axis=1)
+
+        for array in (self._segments, self._directions, self._lengths, self._normals,
+                      self._aabbs):
+            array.flags.writeable = False
+
+        self._indexed = indexed
+        self._grid = None
+        self._distance_field = None
+
+    @classmethod
+    def from_walls(cls, walls: Iterable, indexed: bool = True) -> "WallSet":
+        """Compiles walls given as objects providing get_start() and get_end() in pixels, e.g.
+        simulation or sprite walls.
+
+        Args:
+            walls (Iterable): The wall objects.
+            indexed (bool, optional): Build a spatial index on demand. Defaults to True.
+
+        Returns:
+            WallSet: The compiled walls.
+        """
+        lines = [[*wall.get_start(), *wall.get_end()] for wall in walls]
+        return cls(lines, pixel=True, indexed=indexed)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "WallSet":
+        """Restores compiled walls from the arrays returned by arrays() without compiling them
+        again. The arrays are used as they are, e.g. as read-only views of shared memory.
+
+        Args:
+            arrays (Dict[str, np.ndarray]): The compiled arrays, grid arrays are prefixed with
+            "grid_" and distance field arrays with "field_".
+
+        Returns:
+            WallSet: The restored walls.
+        """
+        walls = cls.__new__(cls)
+        walls._segments = arrays["segments"]
+        walls._directions = arrays["directions"]
+        walls._lengths = arrays["lengths"]
+        walls._normals = arrays["normals"]
+        walls._aabbs = arrays["aabbs"]
+
+        grid = {name[5:]: array for name, array in arrays.items() if name.startswith("grid_")}
+        walls._indexed = len(grid) > 0
+        walls._grid = WallGrid.from_arrays(walls.lines, grid) if grid else None
+
+        field = {name[6:]: array for name, array in arrays.items() if name.startswith("field_")}
+        walls._distance_field = DistanceField.from_arrays(field) if field else None
+        return walls
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The compiled arrays of the walls and of the spatial index, if this set is indexed.
+
+        Returns:
+            Dict[str, np.ndarray]: The arrays by name, grid arrays are prefixed with "grid_" and
+            distance field arrays with "field_".
+        """
+        arrays = {
+            "segments": self._segments,
+            "directions": self._directions,
+            "lengths": self._lengths,
+            "normals": self._normals,
+            "aabbs": self._aabbs
+        }
+        if self.grid is not None:
+            for name, array in self.grid.arrays().items():
+                arrays[f"grid_{name}"] = array
+        if self._distance_field is not None:
+            for name, array in self._distance_field.arrays().items():
+                arrays[f"field_{name}"] = array
+        return arrays
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def segments(self) -> np.ndarray:
+        """The walls as rows of (start_x, start_y, end_x, end_y) in centimeters.
+
+        Returns:
+            np.ndarray: Array of shape (N, 4).
+        """
+        return self._segments
+
+    @property
+    def lines(self) -> np.ndarray:
+        """The walls as start and end point in centimeters, a view of the segments.
+
+        Returns:
+            np.ndarray: Array of shape (N, 2, 2).
+        """
+        return self._segments.reshape(-1, 2, 2)
+
+    @property
+    def directions(self) -> np.ndarray:
+        """The vectors from each wall's start to its end.
+
+        Returns:
+            np.ndarray: Array of shape (N, 2).
+        """
+        return self._directions
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """The length of each wall.
+
+        Returns:
+            np.ndarray: Array of shape (N,).
+        """
+        return self._lengths
+
+    @property
+    def normals(self) -> np.ndarray:
+        """The unit normal of each wall, zero for walls without length.
+
+        Returns:
+            np.ndarray: Array of shape (N, 2).
+        """
+        return self._normals
+
+    @property
+    def aabbs(self) -> np.ndarray:
+        """The axis aligned bounding box of each wall as (min_x, min_y, max_x, max_y).
+
+        Returns:
+            np.ndarray: Array of shape (N, 4).
+        """
+        return self._aabbs
+
+    @property
+    def grid(self) -> WallGrid:
+        """The spatial index of the walls, built on first access.
+
+        Returns:
+            WallGrid: The index or None if this set is not indexed.
+        """
+        if self._indexed and self._grid is None:
+            self._grid = WallGrid(self.lines)
+        return self._grid
+
+    @property
+    def distance_field(self) -> DistanceField:
+        """The distance field of the walls, used to skip exact collision tests far from walls.
+
+        Returns:
+            DistanceField: The field or None if no field was set.
+        """
+        return self._distance_field
+
+    def set_distance_field(self, field: DistanceField) -> None:
+        """Sets the distance field, it has to be built from the walls of this set.
+
+        Args:
+            field (DistanceField): The field.
+        """
+        self._distance_field = field
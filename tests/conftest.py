@@ -0,0 +1,37 @@
+"""Fixtures shared by the tests."""
+from typing import Callable, Sequence
+
+import pytest
+import yaml
+
+from OpenRCSimulator.simulation.compiled_map import MAP_LOADER
+
+
+# an empty box of 800x600 pixels with one diagonal wall
+BOX = [[0, 0, 800, 0], [800, 0, 800, 600], [800, 600, 0, 600], [0, 600, 0, 0],
+       [200, 100, 600, 400]]
+
+
+@pytest.fixture
+def data_folder(tmp_path, monkeypatch):
+    """Redirects the app's data folder into a temporary directory and forgets loaded maps."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    MAP_LOADER.clear()
+    yield tmp_path / ".openrc-simulator"
+    MAP_LOADER.clear()
+
+
+@pytest.fixture
+def make_map(data_folder) -> Callable[..., str]:
+    """Writes YAML maps as the editor does and returns their path."""
+    def make(name: str, lines: Sequence = BOX, car: Sequence = (400, 300, 0)) -> str:
+        path = MAP_LOADER.path(name)
+        walls = {f"sprite_wall_{i}": {"start_x": sx, "start_y": sy, "end_x": ex, "end_y": ey}
+                 for i, (sx, sy, ex, ey) in enumerate(lines)}
+        with open(path, "w", encoding="UTF-8") as file:
+            yaml.dump({"app": {"width": 800, "height": 600},
+                       "car": {"x": car[0], "y": car[1], "direction": car[2]},
+                       "walls": walls}, file)
+        return path
+
+    return make
@@ -0,0 +1,75 @@
+"""Tests of the distance field and its cache next to the map."""
+import os
+
+import numpy as np
+
+from OpenRCSimulator.simulation.collision import point_segment_distances
+from OpenRCSimulator.simulation.distance_field import DistanceField, load_distance_field
+
+
+SEGMENTS = np.array([[0, 0, 100, 0], [0, 0, 0, 100]], dtype=float)
+
+
+def _map_file(tmp_path) -> str:
+    path = tmp_path / "map.yaml"
+    path.write_text("walls: {}")
+    return str(path)
+
+
+def test_cache_is_written_at_once(tmp_path):
+    path = _map_file(tmp_path)
+    load_distance_field(path, SEGMENTS)
+    assert sorted(os.listdir(tmp_path)) == ["map.sdf.npz", "map.yaml"]
+
+
+def test_truncated_cache_is_built_again(tmp_path):
+    path = _map_file(tmp_path)
+    field = load_distance_field(path, SEGMENTS)
+
+    cache = tmp_path / "map.sdf.npz"
+    data = cache.read_bytes()
+    cache.write_bytes(data[:len(data) // 2])
+
+    rebuilt = load_distance_field(path, SEGMENTS)
+    np.testing.assert_array_equal(rebuilt.arrays()["values"], field.arrays()["values"])
+    with np.load(cache) as data:
+        np.testing.assert_array_equal(data["values"], field.arrays()["values"])
+
+
+def test_cache_is_reused_until_the_map_changes(tmp_path):
+    path = _map_file(tmp_path)
+    load_distance_field(path, SEGMENTS)
+    cache = tmp_path / "map.sdf.npz"
+    written = cache.stat().st_mtime_ns
+
+    # the same walls and map file are read from the cache
+    os.utime(cache, ns=(written - 10**9, written - 10**9))
+    load_distance_field(path, SEGMENTS)
+    assert cache.stat().st_mtime_ns == written - 10**9
+
+    moved = SEGMENTS + [0, 0, 50, 50]
+    field = load_distance_field(path, moved)
+    np.testing.assert_array_equal(field.arrays()["values"],
+                                  DistanceField(moved).arrays()["values"])
+    with np.load(cache) as data:
+        digest = str(data["digest"])
+
+    # an edited map file invalidates the cache even if the walls are the same
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+    load_distance_field(path, moved)
+    with np.load(cache) as data:
+        assert float(data["mtime"]) == mtime
+        assert str(data["digest"]) == digest
+
+
+def test_samples_bound_the_true_distance():
+    field = DistanceField(SEGMENTS, resolution=7.0, padding=50.0)
+    points = np.random.default_rng(0).uniform(-80, 180, (2000, 2))
+    distances = point_segment_distances(points, SEGMENTS).min(axis=-1)
+
+    # the field stores at most padding and is off by at most its error in both directions
+    samples = field.sample(points)
+    assert np.all(samples - field.error <= distances + 1e-9)
+    assert np.all(samples + field.error >= np.minimum(distances, 50.0) - 1e-9)
+    assert np.all(samples <= 50.0)
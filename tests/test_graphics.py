@@ -0,0 +1,125 @@
+"""Unit tests of the containers used by the window: the zindex ordered SpriteStore and the
+SpatialHash used for hit-testing and wall rasterization."""
+import pygame as py
+import pytest
+
+from OpenRCSimulator.graphics.objects.sprite import Sprite
+from OpenRCSimulator.graphics.spatial_hash import SpatialHash
+from OpenRCSimulator.graphics.sprite_store import SpriteStore
+
+
+@pytest.fixture
+def surface() -> py.Surface:
+    return py.Surface((10, 10))
+
+
+def _order(store: SpriteStore):
+    return [(zindex, sprite) for zindex, sprite in store.ordered()]
+
+
+def test_store_orders_by_zindex_then_insertion(surface):
+    store = SpriteStore()
+    front, back, first, second = (Sprite(surface) for _ in range(4))
+    store.add("front", front, -1)
+    store.add("first", first)
+    store.add("back", back, 5)
+    store.add("second", second)
+
+    assert _order(store) == [(5, back), (0, first), (0, second), (-1, front)]
+    assert len(store) == 4
+    assert "first" in store and "missing" not in store
+    assert store.get("back") is back and store.get("missing") is None
+
+
+def test_store_replaces_sprite_of_same_name_in_place(surface):
+    store = SpriteStore()
+    first, second, third, replacement = (Sprite(surface) for _ in range(4))
+    store.add("first", first)
+    store.add("second", second)
+    store.add("third", third)
+
+    store.add("second", replacement)
+    assert _order(store) == [(0, first), (0, replacement), (0, third)]
+    assert len(store) == 3
+
+    # a new zindex moves the sprite to its new layer
+    store.add("second", replacement, 1)
+    assert _order(store) == [(1, replacement), (0, first), (0, third)]
+    assert store.get("second") is replacement
+
+
+def test_store_add_and_remove_many(surface):
+    store = SpriteStore()
+    before, after = Sprite(surface), Sprite(surface)
+    walls = [(f"wall{i}", Sprite(surface)) for i in range(5)]
+    store.add("before", before)
+    store.add_many(walls)
+    store.add("after", after)
+
+    assert _order(store) == [(0, before)] + [(0, s) for _, s in walls] + [(0, after)]
+
+    store.remove_many(["wall1", "wall3", "missing"])
+    assert _order(store) == [(0, before), (0, walls[0][1]), (0, walls[2][1]),
+                             (0, walls[4][1]), (0, after)]
+    assert "wall1" not in store and len(store) == 5
+
+    # sprites added again are placed behind the sprites added later
+    store.add_many(walls[:2], 1)
+    assert _order(store)[:2] == [(1, walls[0][1]), (1, walls[1][1])]
+    assert len(store) == 6
+
+    store.remove("before")
+    store.remove("missing")
+    assert (0, before) not in _order(store) and len(store) == 5
+
+
+def test_store_orders_after_mixed_changes(surface):
+    store = SpriteStore()
+    sprites = {f"s{i}": Sprite(surface) for i in range(20)}
+    for i, (name, sprite) in enumerate(sprites.items()):
+        store.add(name, sprite, i % 3)
+    store.remove_many([f"s{i}" for i in range(0, 20, 4)])
+    store.add("s1", sprites["s1"], 2)
+
+    zindices = [zindex for zindex, _ in store.ordered()]
+    assert zindices == sorted(zindices, reverse=True)
+
+    # the keys used for bisecting still match the order, a new sprite goes behind its zindex
+    last = Sprite(surface)
+    store.add("last", last, 1)
+    ordered = store.ordered()
+    assert ordered.index((1, last)) == len(ordered) - 1 - zindices.count(0)
+
+
+def test_spatial_hash_insert_and_query():
+    index = SpatialHash(10)
+    index.insert("a", (0, 0, 5, 5))
+    index.insert("b", (12, 12, 15, 15))
+
+    assert index.query_point((2, 2)) == ["a"]
+    assert index.query_point((15, 15)) == ["b"]
+    assert index.query_point((100, 100)) == []
+    assert index.query_rect((0, 0, 9, 9)) == {"a"}
+    assert index.query_rect((0, 0, 12, 12)) == {"a", "b"}
+    assert len(index) == 2 and "a" in index
+
+
+def test_spatial_hash_move_and_remove():
+    index = SpatialHash(10)
+    index.insert("a", (0, 0, 5, 5))
+    index.insert("a", (50, 50, 5, 5))
+
+    assert len(index) == 1
+    assert index.query_point((2, 2)) == []
+    assert index.query_point((52, 52)) == ["a"]
+
+    index.remove("a")
+    index.remove("missing")
+    assert len(index) == 0 and "a" not in index
+    assert index.query_rect((0, 0, 100, 100)) == set()
+    assert index.query_point((52, 52)) == []
+
+
+def test_spatial_hash_rejects_invalid_cell_size():
+    with pytest.raises(ValueError):
+        SpatialHash(0)
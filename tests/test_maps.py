@@ -0,0 +1,212 @@
+"""Tests of loading maps: the compiled map format, the map loader and sharing maps between
+processes."""
+import json
+import math
+import multiprocessing
+import os
+import struct
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from OpenRCSimulator.simulation.compiled_map import ALIGNMENT, MAGIC, MAP_LOADER, CompiledMap, \
+    compiled_path, load_map
+from OpenRCSimulator.simulation.env import OpenRCEnv, VectorOpenRCEnv
+from OpenRCSimulator.simulation.map import Map
+from OpenRCSimulator.simulation.openrc import OpenRC
+from OpenRCSimulator.simulation.shared import AttachedMap, SharedMap
+from conftest import BOX
+
+
+def test_spawn_direction_is_applied(make_map):
+    make_map("spawn", car=(400, 300, math.pi / 2))
+    game_map = Map("spawn")
+
+    # the map stores the displayed direction, which drive() returns
+    assert game_map.car.theta == pytest.approx(3 * math.pi / 2)
+    theta, *_ = game_map.car.copy().drive(game_map.wall_set, np.zeros(5, dtype=bool))
+    assert theta % (2 * math.pi) == pytest.approx(math.pi / 2)
+
+    with SharedMap(game_map, "spawn") as shared:
+        attached = AttachedMap(shared.handle)
+        assert attached.car.theta == game_map.car.theta
+
+
+def test_environments_reset_to_spawn_pose(make_map):
+    make_map("spawn", car=(300, 450, 1.0))
+    game_map = Map("spawn")
+    car = OpenRC(np.array([300.0, 450.0]))
+    car.set_theta(-1.0)
+    expected = np.array(car.measure(game_map.wall_set), dtype=float)
+
+    np.testing.assert_array_equal(OpenRCEnv(game_map).reset(), expected)
+
+    env = VectorOpenRCEnv(game_map, 3, max_steps=1)
+    np.testing.assert_array_equal(env.reset(), np.repeat(expected[None], 3, axis=0))
+
+    # every environment is done after one tick and starts at the spawn pose again
+    observations, _, dones, _ = env.step(np.zeros((3, 5), dtype=bool))
+    assert dones.all()
+    np.testing.assert_array_equal(observations, np.repeat(expected[None], 3, axis=0))
+
+
+def _map_dict():
+    walls = {f"sprite_wall_{i + 1}": {"start_x": sx, "start_y": sy, "end_x": ex, "end_y": ey}
+             for i, (sx, sy, ex, ey) in enumerate(BOX)}
+    return {"app": {"width": 800, "height": 600}, "car": {"x": 400, "y": 300, "direction": 0.5},
+            "walls": walls}
+
+
+def test_compiled_map_round_trip(tmp_path):
+    compiled = CompiledMap.from_dict(_map_dict())
+    path = str(tmp_path / "box.orcmap")
+    compiled.save(path)
+    loaded = CompiledMap.load(path)
+
+    assert loaded.to_dict() == _map_dict()
+    np.testing.assert_array_equal(loaded.lines, compiled.lines)
+    np.testing.assert_array_equal(loaded.car, compiled.car)
+    assert loaded.map_size == compiled.map_size
+
+    arrays, loaded_arrays = compiled.wall_set.arrays(), loaded.wall_set.arrays()
+    assert arrays.keys() == loaded_arrays.keys()
+    for name, array in arrays.items():
+        np.testing.assert_array_equal(loaded_arrays[name], array)
+
+    # the loaded arrays are read-only views of the file
+    assert not loaded.lines.flags.writeable
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_compiled_map_arrays_are_aligned(tmp_path):
+    path = str(tmp_path / "box.orcmap")
+    CompiledMap.from_dict(_map_dict()).save(path)
+
+    with open(path, "rb") as file:
+        assert file.read(len(MAGIC)) == MAGIC
+        length, = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(length).decode("UTF-8"))
+    start = len(MAGIC) + 8 + length
+    start += -start % ALIGNMENT
+    for offset, _, _ in header["arrays"].values():
+        assert (start + offset) % ALIGNMENT == 0
+
+    # memory maps start at a page, so the views of the file are aligned as well
+    loaded = CompiledMap.load(path)
+    for array in (loaded.lines, loaded.car, loaded.wall_set.segments):
+        assert array.ctypes.data % ALIGNMENT == 0
+
+
+def test_load_map_compiles_outdated_and_broken_files(make_map):
+    path = make_map("box")
+    compiled = compiled_path(path)
+    load_map(path)
+    assert os.path.exists(compiled)
+
+    # a compiled file of another version is compiled again
+    with open(compiled, "wb") as file:
+        file.write(b"ORCMAP\x00\x00")
+    np.testing.assert_array_equal(load_map(path).lines, BOX)
+    assert CompiledMap.load(compiled).lines.shape == (len(BOX), 4)
+
+    # an edited YAML file is newer than its compiled file
+    make_map("box", lines=BOX[:4])
+    mtime = os.path.getmtime(compiled)
+    os.utime(path, (mtime + 10, mtime + 10))
+    assert load_map(path).lines.shape == (4, 4)
+
+
+def test_map_loader_shares_maps_until_they_change(make_map):
+    path = make_map("box")
+    compiled = MAP_LOADER.get("box")
+    assert MAP_LOADER.get("box") is compiled
+    assert Map("box").wall_set is compiled.wall_set
+
+    walls = MAP_LOADER.get_wall_set("box", 10)
+    assert walls.distance_field is not None
+    assert MAP_LOADER.get_wall_set("box", 10) is walls
+    assert compiled.wall_set.distance_field is None
+
+    # an edited map is loaded again, together with its walls
+    make_map("box", lines=BOX[:4])
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+    edited = MAP_LOADER.get("box")
+    assert edited is not compiled
+    assert edited.lines.shape == (4, 4)
+    assert MAP_LOADER.get_wall_set("box", 10) is not walls
+    assert len(MAP_LOADER.get_wall_set("box", 10).segments) == 4
+
+
+def _measure_attached(handle):
+    attached = AttachedMap(handle)
+    return attached.car.measure(attached.wall_set)
+
+
+def test_shared_map_is_attached_and_unlinked(make_map):
+    make_map("shared", car=(300, 450, 1.0))
+    game_map = Map("shared")
+    expected = game_map.wall_set.arrays()
+
+    with SharedMap(game_map, "shared") as shared:
+        blocks = [block for block, _, _ in shared.handle.blocks.values()]
+        attached = AttachedMap(shared.handle)
+        assert attached.name == "shared"
+        assert attached.map_size == game_map.map_size
+        np.testing.assert_array_equal(attached.car.position, game_map.car.position)
+
+        arrays = attached.wall_set.arrays()
+        assert arrays.keys() == expected.keys()
+        for key, array in arrays.items():
+            np.testing.assert_array_equal(array, expected[key])
+
+        # the walls and the grid's cells are views of the shared memory, not copies
+        for key in ("segments", "normals", "aabbs", "grid_cell_start", "grid_cell_walls"):
+            assert not arrays[key].flags.writeable
+            assert not arrays[key].flags.owndata
+
+        # workers measure the same distances as the publishing process
+        with multiprocessing.get_context("fork").Pool(1) as pool:
+            distances = pool.apply(_measure_attached, (shared.handle,))
+        assert distances == game_map.car.measure(game_map.wall_set)
+        del attached, arrays
+
+    for block in blocks:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=block)
+
+
+def test_vector_env_resets_done_environments(make_map):
+    make_map("wall", car=(760, 300, 0))
+    env = VectorOpenRCEnv(Map("wall"), 2, delta=1.0, max_steps=30)
+    single = OpenRCEnv(Map("wall"), delta=1.0, max_steps=30)
+    spawn = single.reset()
+    np.testing.assert_array_equal(env.reset(), [spawn, spawn])
+
+    # the first car drives into the wall in front of it, the second one stands still until its
+    # episode ends after max_steps
+    actions = np.zeros((2, 5), dtype=bool)
+    actions[0, 0] = True
+    collisions = 0
+    for tick in range(1, 61):
+        expected, _, done, single_info = single.step(actions[0])
+        observations, _, dones, info = env.step(actions)
+        assert list(dones) == [done, tick % 30 == 0]
+        assert info["collided"][0] == single_info["collided"]
+
+        if dones.any():
+            final = info["final_observation"]
+            np.testing.assert_array_equal(final[0], expected)
+            np.testing.assert_array_equal(observations[dones], np.repeat(
+                spawn[None], np.count_nonzero(dones), axis=0))
+            np.testing.assert_array_equal(observations[~dones], final[~dones])
+        else:
+            assert "final_observation" not in info
+            np.testing.assert_array_equal(observations[0], expected)
+
+        if done:
+            collisions += single_info["collided"]
+            single.reset()
+
+    assert collisions >= 2
@@ -0,0 +1,127 @@
+"""Tests of the FixedStepScheduler driven by a fake clock. The times are multiples of the step
+size, so the accumulated time is exact."""
+import time
+
+import pytest
+
+from OpenRCSimulator.graphics.scheduler import REAL_TIME_INTERVAL, WARP_MAX, \
+    FixedStepScheduler
+
+
+class FakeClock:
+    """A clock which only moves when the test advances it."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def test_update_consumes_fixed_steps(clock):
+    scheduler = FixedStepScheduler(rate=4, clock=clock)
+    assert scheduler.step_size == 0.25
+
+    clock.advance(0.625)
+    assert scheduler.update() == 2
+    assert scheduler.alpha == 0.5
+
+    # the remainder is kept for the next update
+    clock.advance(0.125)
+    assert scheduler.update() == 1
+    assert scheduler.alpha == 0.0
+
+    clock.advance(0.125)
+    assert scheduler.update() == 0
+    assert scheduler.alpha == 0.5
+
+
+def test_update_drops_time_beyond_max_steps(clock):
+    scheduler = FixedStepScheduler(rate=4, max_steps=3, clock=clock)
+
+    clock.advance(10)
+    assert scheduler.update() == 3
+    assert scheduler.alpha == 0.0
+
+    clock.advance(0.25)
+    assert scheduler.update() == 1
+
+
+def test_wait_sleeps_until_the_next_step(clock, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    scheduler = FixedStepScheduler(rate=4, clock=clock)
+
+    clock.advance(0.125)
+    scheduler.update()
+    clock.advance(0.0625)
+    scheduler.wait()
+    scheduler.wait(limit=0.03125)
+
+    # a step which is already due still yields the thread
+    clock.advance(1)
+    scheduler.wait()
+    assert sleeps == [0.0625, 0.03125, 0]
+
+
+def test_invalid_rate_and_warp_are_rejected(clock):
+    with pytest.raises(ValueError):
+        FixedStepScheduler(rate=0, clock=clock)
+
+    scheduler = FixedStepScheduler(clock=clock)
+    with pytest.raises(ValueError):
+        scheduler.rate = -1
+    with pytest.raises(ValueError):
+        scheduler.warp = 0
+    assert scheduler.warp == 1.0
+
+
+def test_warp_scales_steps_and_clamp(clock):
+    scheduler = FixedStepScheduler(rate=4, max_steps=3, clock=clock)
+    clock.advance(0.125)
+    scheduler.warp = 4
+
+    # changing the warp drops the time accumulated before
+    assert scheduler.update() == 0
+    clock.advance(0.25)
+    assert scheduler.update() == 4
+
+    clock.advance(10)
+    assert scheduler.update() == 12
+    assert scheduler.alpha == 0.0
+
+
+def test_warp_max_runs_until_the_budget_is_spent(clock):
+    scheduler = FixedStepScheduler(rate=4, clock=clock)
+    scheduler.warp = WARP_MAX
+    sizes = []
+
+    def step(size: float) -> None:
+        sizes.append(size)
+        clock.advance(0.015625)
+
+    assert scheduler.run(step, budget=0.125) == 8
+    assert sizes == [0.25] * 8
+    assert scheduler.alpha == 1.0
+
+
+def test_real_time_factor_is_measured_per_interval(clock):
+    scheduler = FixedStepScheduler(rate=4, clock=clock)
+    scheduler.warp = 4
+
+    steps = 0
+    while clock.now < REAL_TIME_INTERVAL:
+        assert scheduler.real_time_factor == 0.0
+        clock.advance(0.25)
+        steps += scheduler.run(lambda size: None)
+
+    assert steps == REAL_TIME_INTERVAL * 16
+    assert scheduler.real_time_factor == 4.0
@@ -0,0 +1,171 @@
+"""Regression tests of the simulation kernels: the batched physics has to match the single car
+and all sensor backends have to measure the same distances."""
+import numpy as np
+import pytest
+
+from OpenRCSimulator.simulation import SENSOR_DISTANCE, SENSOR_POINTS
+from OpenRCSimulator.simulation.batch import OpenRCBatch
+from OpenRCSimulator.simulation.distance_field import DistanceField
+from OpenRCSimulator.simulation.openrc import OpenRC, compare_sensor_modes
+from OpenRCSimulator.simulation.raycast import MARCH_ITERATIONS, MARCH_TOLERANCE, \
+    SENSOR_ANGLES, cast_rays, march_rays, sensor_rays
+from OpenRCSimulator.simulation.wall import WallSet
+
+
+# probability of each control (accelerate, backwards, brake, left, right) per tick, the car
+# drives around and hits walls
+CONTROL_PROBABILITIES = np.array([0.95, 0.0, 0.02, 0.3, 0.3])
+
+
+def _lines(seed: int = 0) -> np.ndarray:
+    """A box of 800x600 pixels with random walls inside."""
+    rng = np.random.default_rng(seed)
+    box = [[0, 0, 800, 0], [800, 0, 800, 600], [800, 600, 0, 600], [0, 600, 0, 0]]
+    starts = rng.uniform([50, 50], [750, 550], (40, 2))
+    ends = rng.uniform([50, 50], [750, 550], (40, 2))
+    return np.vstack([box, np.hstack([starts, ends])])
+
+
+def _poses(count: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    return rng.uniform([100, 100], [700, 500], (count, 2)), rng.uniform(0, 2 * np.pi, count)
+
+
+def _grazing_poses(lines: np.ndarray, count: int, seed: int = 6):
+    """Poses close to a wall with one sensor running almost parallel to the wall."""
+    rng = np.random.default_rng(seed)
+    segments = lines[rng.integers(0, len(lines), count)]
+    directions = segments[:, 2:] - segments[:, :2]
+    normals = np.stack([-directions[:, 1], directions[:, 0]], axis=-1) / \
+        np.linalg.norm(directions, axis=-1)[:, None]
+
+    offsets = rng.uniform(0.5, 10, count) * rng.choice([-1, 1], count)
+    positions = segments[:, :2] + directions * rng.uniform(0.1, 0.9, (count, 1)) + \
+        normals * offsets[:, None]
+
+    # a sensor points along SENSOR_ANGLES - theta, see sensor_rays()
+    sensors = rng.integers(0, SENSOR_POINTS, count)
+    thetas = SENSOR_ANGLES[sensors] - np.arctan2(directions[:, 1], directions[:, 0]) + \
+        rng.normal(0, 1e-3, count)
+    return positions, thetas % (2 * np.pi)
+
+
+def _mixed_poses(count: int, grazing: int, seed: int):
+    """Random poses all over the map followed by poses grazing a wall."""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform([10, 10], [790, 590], (count, 2))
+    thetas = rng.uniform(0, 2 * np.pi, count)
+    grazing_positions, grazing_thetas = _grazing_poses(_lines(), grazing, seed)
+    return np.vstack([positions, grazing_positions]), np.concatenate([thetas, grazing_thetas])
+
+
+@pytest.fixture(scope="module")
+def walls() -> WallSet:
+    walls = WallSet(_lines())
+    walls.set_distance_field(DistanceField(walls.segments, 2.0))
+    return walls
+
+
+def test_batch_of_one_matches_single_car(walls):
+    rng = np.random.default_rng(2)
+    car = OpenRC(np.array([400.0, 300.0]), 0.5)
+    batch = OpenRCBatch(np.array([[400.0, 300.0]]), 0.5)
+
+    collisions = 0
+    for controls in rng.random((300, 5)) < CONTROL_PROBABILITIES:
+        theta, x, y, sensors, distances = car.drive(walls, controls)
+        thetas, positions, batch_sensors, batch_distances = batch.step(walls, controls[None])
+        collisions += bool(car.collided)
+
+        assert theta == thetas[0]
+        assert (x, y) == tuple(positions[0])
+        assert distances == list(batch_distances[0])
+        assert sensors == [tuple(sensor) for sensor in batch_sensors[0]]
+        np.testing.assert_array_equal(car.position, batch.positions[0])
+        assert bool(car.collided) == bool(batch.collided[0])
+
+    # the comparison only covers the collision response if the car hit walls
+    assert collisions > 0
+
+
+def test_batch_cars_are_independent(walls):
+    rng = np.random.default_rng(3)
+    starts = np.array([[400.0, 300.0], [200.0, 200.0], [600.0, 450.0]])
+    batch = OpenRCBatch(starts, 0.5)
+    cars = [OpenRC(start.copy(), 0.5) for start in starts]
+
+    for controls in rng.random((100, 3, 5)) < CONTROL_PROBABILITIES:
+        batch.step(walls, controls)
+        for car, car_controls in zip(cars, controls):
+            car.drive(walls, car_controls)
+
+    np.testing.assert_array_equal(batch.positions, [car.position for car in cars])
+
+
+def test_numpy_sensors_match_shapely(walls):
+    # shapely is slow, the other modes are compared with the numpy sensors on more poses
+    positions, thetas = _mixed_poses(16, 16, seed=7)
+    errors = compare_sensor_modes(walls, positions, thetas, mode=OpenRC.SENSOR_NUMPY,
+                                  reference=OpenRC.SENSOR_SHAPELY)
+    assert errors["max_error"] == 0
+
+
+@pytest.mark.parametrize("tolerance, max_iterations", [
+    (MARCH_TOLERANCE, MARCH_ITERATIONS), (MARCH_TOLERANCE, 1), (20.0, 4)])
+def test_sphere_tracing_matches_numpy(walls, tolerance, max_iterations):
+    positions, thetas = _mixed_poses(300, 100, seed=8)
+    errors = compare_sensor_modes(walls, positions, thetas, mode=OpenRC.SENSOR_SPHERE_TRACE,
+                                  reference=OpenRC.SENSOR_NUMPY, tolerance=tolerance,
+                                  max_iterations=max_iterations)
+    assert errors["max_error"] == 0
+
+
+def test_march_rays_matches_cast_rays(walls):
+    positions, thetas = _mixed_poses(300, 100, seed=9)
+    _, _, ends = sensor_rays(positions, thetas, SENSOR_DISTANCE)
+
+    distances = march_rays(positions, ends, walls.distance_field, SENSOR_DISTANCE, walls=walls)
+    expected = cast_rays(positions, ends, walls.lines, SENSOR_DISTANCE)
+    np.testing.assert_array_equal(distances, expected)
+
+
+def test_march_rays_grazing_ray():
+    walls = WallSet([[0, 0, 800, 0], [800, 0, 800, 600], [800, 600, 0, 600], [0, 600, 0, 0],
+                     [200, 100, 600, 400]])
+    walls.set_distance_field(DistanceField(walls.segments))
+    position = np.array([617.907, 424.877])
+    _, _, ends = sensor_rays(position, 0.5276, SENSOR_DISTANCE)
+
+    # sensor 241 runs along the diagonal wall without hitting it and does not converge
+    assert cast_rays(position, ends, walls.lines, SENSOR_DISTANCE)[241] == SENSOR_DISTANCE
+    for max_iterations in (MARCH_ITERATIONS, 200):
+        distances = march_rays(position, ends, walls.distance_field, SENSOR_DISTANCE,
+                               max_iterations=max_iterations, walls=walls)
+        assert distances[241] == SENSOR_DISTANCE
+
+    # without walls a ray which did not converge counts as not hit
+    distances = march_rays(position, ends, walls.distance_field, SENSOR_DISTANCE, max_iterations=8)
+    assert distances[241] == SENSOR_DISTANCE
+
+
+def test_grid_candidates_match_all_walls(walls):
+    lines = walls.lines
+    for position, theta in zip(*_poses(8, seed=4)):
+        _, _, ends = sensor_rays(position, theta, SENSOR_DISTANCE)
+        expected = cast_rays(position, ends, lines, SENSOR_DISTANCE)
+
+        for end, distance in zip(ends, expected):
+            candidates = lines[walls.grid.query_ray(position, end)]
+            assert cast_rays(position, end[None], candidates, SENSOR_DISTANCE)[0] == distance
+
+
+def test_cast_rays_matches_shapely(walls):
+    plain = WallSet(_lines(), indexed=False)
+    for position, theta in zip(*_poses(4, seed=5)):
+        car = OpenRC(position.copy(), sensor_mode=OpenRC.SENSOR_SHAPELY)
+        car.set_theta(theta)
+        reference = np.array(car.measure(plain), dtype=float)
+
+        _, _, ends = sensor_rays(position, theta, SENSOR_DISTANCE)
+        distances = cast_rays(position, ends, walls.lines, SENSOR_DISTANCE)
+        np.testing.assert_array_equal(distances.astype(int), reference)
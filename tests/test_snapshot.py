@@ -0,0 +1,54 @@
+"""Tests of the SnapshotBuffer handing state from the controller thread to the render thread."""
+import sys
+import threading
+
+import pytest
+
+from OpenRCSimulator.graphics.snapshot import SnapshotBuffer
+
+
+# snapshots published by the writer thread
+PUBLISHES = 20_000
+
+
+def test_publish_increments_the_version():
+    buffer = SnapshotBuffer("start")
+    assert buffer.read() == (0, "start")
+
+    buffer.publish("first")
+    buffer.publish("second")
+    assert buffer.version == 2
+    assert buffer.snapshot == "second"
+    assert buffer.read() == (2, "second")
+
+
+@pytest.fixture
+def switch_often():
+    """Switches threads as often as possible to provoke interleavings."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.mark.usefixtures("switch_often")
+def test_reader_sees_consistent_snapshots():
+    buffer = SnapshotBuffer((0, 0))
+
+    def write():
+        for version in range(1, PUBLISHES + 1):
+            buffer.publish((version, -version))
+
+    writer = threading.Thread(target=write)
+    writer.start()
+
+    # every snapshot stores its own version, a torn read would mix two of them
+    last = 0
+    while True:
+        version, (stored, negated) = buffer.read()
+        assert version == stored == -negated
+        assert version >= last
+        last = version
+        if not writer.is_alive() and version == PUBLISHES:
+            break
+    writer.join()